@@ -1,20 +1,35 @@
+import gc
+import logging
+import os
 import pygame
 import sys
+import time
 from settings import *
-from src.player import Player
 from src.manager import GameManager, ParticleSystem
 from src.ui import UI, SkillSelectionUI, MainMenu
+from src.simulation import FixedTimestep, create_players, step_simulation
+from src.controllers import keyboard_controllers, read_actions
+from src.render import (Camera, StaticLayer, CachedLayer, RenderBuffer, FullPresenter, DirtyRectPresenter,
+                        LAYER_BACKGROUND, LAYER_PICKUPS, LAYER_ENEMIES, LAYER_PROJECTILES,
+                        LAYER_PLAYERS, LAYER_EFFECTS, LAYER_DAMAGE_NUMBERS, LAYER_HUD, LAYER_OVERLAY)
+from src.assets import assets
+from src.replay import ReplayRecorder
+from src.netplay import open_session
+from src.profiler import profiler
+
+logger = logging.getLogger(__name__)
 
 class Game:
-    def __init__(self):
+    def __init__(self, dirty_rects=DIRTY_RECT_RENDERING, record_replays=REPLAY_RECORDING, session=None):
         pygame.init()
         
         # Set up display
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Dual Fury - Cooperative Survival Game")
         
-        # Clock for FPS
+        # Clock for FPS; the simulation runs on its own fixed timestep
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
         
         # Game components
         self.game_manager = GameManager()
@@ -25,23 +40,102 @@ class Game:
         self.skill_selection_ui = SkillSelectionUI()
         self.main_menu = MainMenu()
         
-        # Players
+        # Players and the controllers driving them
         self.players = []
+        self.controllers = []
+        
+        # Static world layers, painted once and drawn below everything else
+        self.static_layers = []
+        self.add_static_layer(self.draw_background_grid_on_surface)
+        self.render_buffer = RenderBuffer()
+        self.presenter = DirtyRectPresenter() if dirty_rects else FullPresenter()
+        self.camera = Camera()  # View of the world; screen shake moves it
+        
+        # Debug overlay with frame timings, toggled with PROFILER_KEY
+        self.show_debug = False
+        self.debug_layer = CachedLayer((420, SCREEN_HEIGHT - 150 - UI_MARGIN))
+        if PROFILER_TRACE_RECORDING:
+            profiler.start_trace()
         
+        # Replay of the current game, when recording
+        self.record_replays = record_replays
+        self.recorder = None
+        
+        # Online game, when playing with a remote player
+        self.session = session
+        self.pending_skill = None  # Local skill pick waiting to be sent with the next input
+        self.picked_level = None
+        if session:
+            self.join_session()
+            
         # Game state
         self.running = True
         
+    def add_static_layer(self, painter, transparent=False):
+        """Add a world layer that is painted once by painter(surface)"""
+        layer = StaticLayer(painter, transparent=transparent)
+        self.static_layers.append(layer)
+        return layer
+        
     def create_players(self):
-        """Create the two players"""
-        player1 = Player(1, SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
-        player2 = Player(2, 3 * SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
-        self.players = [player1, player2]
+        """Create the two players, driven from the keyboard"""
+        self.players = create_players()
+        self.controllers = keyboard_controllers(self.players)
         
+    def toggle_debug(self):
+        """Show or hide the debug overlay, profiling only while it is shown"""
+        self.show_debug = not self.show_debug
+        profiler.enable(self.show_debug)
+        self.debug_layer.invalidate()
+        
+    def trace_key(self):
+        """Start recording a timeline trace, or save the one being recorded"""
+        if not profiler.tracing:
+            profiler.start_trace()
+            logger.info("Recording a trace, press %s again to save it", pygame.key.name(PROFILER_TRACE_KEY).upper())
+        else:
+            logger.info("Trace saved to %s", profiler.dump_trace())
+            
+    def join_session(self):
+        """Play the online session: its simulation replaces the local one"""
+        # Leave everything loaded so far (assets, fonts, modules) out of garbage collections for
+        # the rest of the process, so a full collection costs little in the middle of a rollback
+        gc.freeze()
+        self.game_manager = self.session.game_manager
+        self.players = self.session.players
+        self.controllers = keyboard_controllers(self.players)
+        
+    def handle_online_event(self, event):
+        """Handle an event of an online game, where only the local player's input counts"""
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            self.running = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_l:
+            toggle_language()
+        elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+            self.toggle_debug()
+        elif event.type == pygame.KEYDOWN and event.key == PROFILER_TRACE_KEY:
+            self.trace_key()
+            
+        # Skill picks are sent to the other player as part of the input
+        selection_result = self.skill_selection_ui.handle_input(event)
+        if selection_result and selection_result['player_id'] == self.session.local_index + 1:
+            self.pending_skill = selection_result['skill']
+            self.picked_level = self.players[self.session.local_index].level
+            self.skill_selection_ui.hide(selection_result['player_id'])
+            
     def handle_events(self):
         """Handle all game events"""
         for event in pygame.event.get():
+            if self.session:
+                self.handle_online_event(event)
+                continue
+                
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                self.toggle_debug()
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_TRACE_KEY:
+                self.trace_key()
                 
             # Handle different game states
             if self.game_manager.game_state == GAME_STATE_MENU:
@@ -57,6 +151,8 @@ class Game:
                  self.skill_selection_ui.player2_selection['active'])):
                 selection_result = self.skill_selection_ui.handle_input(event)
                 if selection_result:
+                    if self.recorder:
+                        self.recorder.record_skill_pick(selection_result['player_id'], selection_result['skill'])
                     player_id = self.game_manager.complete_skill_selection(selection_result)
                     if player_id:
                         self.skill_selection_ui.hide(player_id)
@@ -81,127 +177,190 @@ class Game:
                     # Toggle language
                     toggle_language()
                         
-    def start_new_game(self):
+    def start_new_game(self, seed=None):
         """Start a new game"""
+        self.save_replay()
         self.create_players()
-        self.game_manager.start_new_game()
+        self.game_manager.start_new_game(seed)
         self.particle_system = ParticleSystem()
+        self.skill_selection_ui.hide()
+        
+        if self.record_replays:
+            self.recorder = ReplayRecorder(self.game_manager, self.players)
+            
+    def save_replay(self):
+        """Save the replay of the current game, if one is being recorded"""
+        if not self.recorder or not len(self.recorder.replay):
+            return
+            
+        os.makedirs(REPLAY_DIRECTORY, exist_ok=True)
+        name = time.strftime('%Y%m%d-%H%M%S') + f'-{self.recorder.replay.seed}.replay'
+        self.recorder.replay.save(os.path.join(REPLAY_DIRECTORY, name))
+        self.recorder = None
         
     def update(self, dt):
         """Update game state"""
+        if self.session:
+            self.update_online(dt)
+            return
+            
         if self.game_manager.game_state == GAME_STATE_PLAYING:
-            # Update players with enemies list for targeting
+            # Update players and game manager
             keys_pressed = pygame.key.get_pressed()
-            for i, player in enumerate(self.players):
-                other_player = self.players[1 - i] if len(self.players) > 1 else None
-                player.update(dt, keys_pressed, other_player, self.game_manager.enemies)
-                
-            # Update game manager
-            self.game_manager.update(dt, self.players)
+            actions = read_actions(self.game_manager, self.players, self.controllers, keys_pressed)
+            if self.recorder:
+                self.recorder.record_tick(actions)
+            step_simulation(self.game_manager, self.players, dt, actions)
             
             # Update particle system
             self.particle_system.update(dt)
             
             # Check for skill selection trigger
             if self.game_manager.skill_selection_player:
-                self.skill_selection_ui.show(self.game_manager.skill_selection_player)
+                self.skill_selection_ui.show(self.game_manager.skill_selection_player,
+                                             self.game_manager.skill_options)
                     
-    def draw(self):
-        """Draw everything"""
-        self.screen.fill(BLACK)
+    def update_online(self, dt):
+        """Send the local input and advance the online session, which may roll back"""
+        session = self.session
+        local_player = self.players[session.local_index]
+        action = self.controllers[session.local_index].act(local_player, self.game_manager,
+                                                           pygame.key.get_pressed())
+        if session.advance(action, self.pending_skill):
+            self.pending_skill = None
+        if session.disconnected:
+            self.running = False
+            
+        # Rolling back replaces the simulation objects
+        self.game_manager = session.game_manager
+        self.players = session.players
+        self.particle_system.update(dt)
+        
+        local_player = self.players[session.local_index]
+        if (self.game_manager.skill_selection_player is local_player and self.game_manager.skill_options and
+                local_player.level != self.picked_level):
+            self.skill_selection_ui.show(local_player, self.game_manager.skill_options)
+            
+    def draw(self, alpha=1.0):
+        """Draw everything, alpha of the way from the previous simulation tick to the current one"""
+        # Everything is recorded into the command buffer and presented at the end
+        screen = self.render_buffer
         
         if self.game_manager.game_state == GAME_STATE_MENU:
-            self.main_menu.draw(self.screen)
+            screen.layer = LAYER_HUD
+            self.main_menu.draw(screen)
             
         elif self.game_manager.game_state == GAME_STATE_PLAYING:
             # Draw game world
-            self.draw_game_world()
+            self.draw_game_world(alpha)
             
             # Draw UI overlays
+            screen.layer = LAYER_OVERLAY
             if self.game_manager.is_wave_break():
                 self.ui.draw_wave_break(
-                    self.screen, 
+                    screen,
                     self.game_manager.current_wave,
                     self.game_manager.get_wave_break_time_remaining()
                 )
                 
             # Draw skill selection UI (can appear during gameplay)
-            self.skill_selection_ui.draw(self.screen)
+            self.skill_selection_ui.draw(screen)
+            
+            if self.show_debug:
+                self.draw_debug_overlay(screen)
                 
         elif self.game_manager.game_state == GAME_STATE_GAME_OVER:
             # Draw game world (faded)
             self.draw_game_world()
             
             # Draw game over screen
-            self.ui.draw_game_over(self.screen, self.game_manager.current_wave - 1)
+            screen.layer = LAYER_OVERLAY
+            self.ui.draw_game_over(screen, self.game_manager.current_wave - 1)
             
-        pygame.display.flip()
+        profiler.count('blits', len(screen))
+        with profiler.phase('draw.present'):
+            self.presenter.present(self.screen, screen)
+            
+    def draw_debug_overlay(self, buffer):
+        """Draw the debug overlay, repainted every PROFILER_OVERLAY_INTERVAL frames"""
+        key = profiler.frames // PROFILER_OVERLAY_INTERVAL
+        with profiler.phase('draw.overlay'):
+            self.debug_layer.draw(buffer, (UI_MARGIN, 150), key, self.game_manager.draw_debug_info,
+                                  self.ui.small_font)
         
-    def draw_game_world(self):
+    def draw_game_world(self, alpha=1.0):
         """Draw the main game world"""
-        # Get screen shake offset
+        # Screen shake moves the camera instead of redrawing into a shaken surface
         shake_x, shake_y = self.game_manager.get_screen_shake_offset()
-        
-        # Create a surface for the game world with shake offset
-        if shake_x != 0 or shake_y != 0:
-            # Create temporary surface for shaking
-            temp_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            temp_surface.fill(BLACK)
-            self._draw_world_content(temp_surface)
-            self.screen.blit(temp_surface, (shake_x, shake_y))
-        else:
-            self._draw_world_content(self.screen)
+        self.camera.move_to(-shake_x, -shake_y)
+        self._draw_world_content(self.render_buffer, self.camera, alpha)
             
-    def _draw_world_content(self, surface):
-        """Draw the actual game world content"""
-        # Draw background grid (optional)
-        self.draw_background_grid_on_surface(surface)
+    def _draw_world_content(self, buffer, camera, alpha=1.0):
+        """Record the actual game world content, as seen from the camera, into a render buffer
+        
+        Moving entities are drawn alpha of the way between their previous and
+        current tick positions.
+        """
+        # Draw static layers (background grid)
+        buffer.layer = LAYER_BACKGROUND
+        for layer in self.static_layers:
+            layer.draw(buffer, camera.point(0, 0))
         
         # Draw XP orbs
-        for orb in self.game_manager.xp_orbs:
-            orb.draw(surface)
-            
-        # Draw items
-        self.game_manager.item_manager.draw(surface, 0, 0)  # No camera offset for now
+        with profiler.phase('draw.pickups'):
+            buffer.layer = LAYER_PICKUPS
+            for orb in self.game_manager.xp_orbs:
+                orb.draw(buffer, camera, alpha)
+                
+            # Draw items
+            self.game_manager.item_manager.draw(buffer, camera)
             
         # Draw enemies
-        for enemy in self.game_manager.enemies:
-            enemy.draw(surface)
+        with profiler.phase('draw.enemies'):
+            buffer.layer = LAYER_ENEMIES
+            for enemy in self.game_manager.enemies:
+                enemy.draw(buffer, camera, alpha)
+                
+        # Draw enemy projectiles
+        with profiler.phase('draw.projectiles'):
+            buffer.layer = LAYER_PROJECTILES
+            self.game_manager.enemy_bullets.draw(buffer, camera, alpha)
             
         # Draw players
-        for player in self.players:
-            if player.is_alive:
-                player.draw(surface)
-            else:
-                # Draw dead player with transparency
-                dead_surface = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
-                dead_surface.fill(GRAY)
-                dead_surface.set_alpha(100)
-                surface.blit(dead_surface, player.rect)
+        with profiler.phase('draw.players'):
+            buffer.layer = LAYER_PLAYERS
+            for player in self.players:
+                if player.is_alive:
+                    player.draw(buffer, camera, alpha)
+                else:
+                    # Draw dead player with transparency
+                    dead_surface = assets.get_image(player.archetype, 'ghost')
+                    buffer.blit(dead_surface, camera.rect(player.rect))
+                    
+        # Draw particles and damage numbers
+        with profiler.phase('draw.effects'):
+            buffer.layer = LAYER_EFFECTS
+            self.particle_system.draw(buffer, camera)
+            
+            buffer.layer = LAYER_DAMAGE_NUMBERS
+            for damage_number in self.game_manager.damage_numbers:
+                damage_number.draw(buffer, camera)
                 
-        # Draw particles
-        self.particle_system.draw(surface)
-        
-        # Draw damage numbers
-        for damage_number in self.game_manager.damage_numbers:
-            damage_number.draw(surface)
-        
         # Draw UI
-        if len(self.players) >= 1:
-            self.ui.draw_player_hud(self.screen, self.players[0], 'left')
-        if len(self.players) >= 2:
-            self.ui.draw_player_hud(self.screen, self.players[1], 'right')
-            
-        # Draw wave info
-        if self.game_manager.wave_active:
-            enemies_remaining = self.game_manager.get_enemies_remaining()
-            self.ui.draw_wave_info(self.screen, self.game_manager.current_wave, enemies_remaining)
-        else:
-            self.ui.draw_wave_info(self.screen, self.game_manager.current_wave)
-            
-        # Draw debug info (optional)
-        # self.game_manager.draw_debug_info(self.screen, self.ui.small_font)
-        
+        with profiler.phase('draw.hud'):
+            buffer.layer = LAYER_HUD
+            if len(self.players) >= 1:
+                self.ui.draw_player_hud(buffer, self.players[0], 'left')
+            if len(self.players) >= 2:
+                self.ui.draw_player_hud(buffer, self.players[1], 'right')
+                
+            # Draw wave info
+            if self.game_manager.wave_active:
+                enemies_remaining = self.game_manager.get_enemies_remaining()
+                self.ui.draw_wave_info(buffer, self.game_manager.current_wave, enemies_remaining)
+            else:
+                self.ui.draw_wave_info(buffer, self.game_manager.current_wave)
+                
     def draw_background_grid(self):
         """Draw a subtle background grid on main screen"""
         self.draw_background_grid_on_surface(self.screen)
@@ -222,26 +381,53 @@ class Game:
     def run(self):
         """Main game loop"""
         while self.running:
-            # Calculate delta time
-            dt = self.clock.tick(FPS) / 1000.0  # Convert to seconds
+            # Real time since the last frame, in seconds
+            frame_time = self.clock.tick(FPS) / 1000.0
             
             # Handle events
-            self.handle_events()
-            
-            # Update game
-            self.update(dt)
-            
-            # Draw everything
-            self.draw()
+            with profiler.phase('events'):
+                self.handle_events()
+                
+            # Update game in fixed steps, however long the frame took
+            with profiler.phase('update'):
+                for _ in range(self.timestep.advance(frame_time)):
+                    self.update(self.timestep.dt)
+                    
+            # Draw everything, unless the simulation needs the time to catch up
+            with profiler.phase('draw'):
+                if self.timestep.should_render():
+                    self.draw(self.timestep.alpha)
+            profiler.end_frame()
             
+        self.save_replay()
+        if self.session:
+            self.session.close()
         pygame.quit()
         sys.exit()
 
 
-def main():
+def main(argv=None):
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Dual Fury - Cooperative Survival Game")
+    online = parser.add_mutually_exclusive_group()
+    online.add_argument('--host', nargs='?', const=f':{NETPLAY_PORT}', metavar='[HOST]:PORT',
+                        help="host an online game and wait for player 2")
+    online.add_argument('--join', metavar='HOST[:PORT]', help="join an online game as player 2")
+    parser.add_argument('--delay', type=int, default=NETPLAY_INPUT_DELAY,
+                        help="online input delay in frames (default: picked from the round trip)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     try:
-        game = Game()
+        session = None
+        if args.host or args.join:
+            session = open_session(args.host, args.join, input_delay=args.delay)
+            if session is None:
+                print("Could not connect to the other player")
+                sys.exit(1)
+        game = Game(session=session)
         game.run()
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -5,6 +5,68 @@ import pygame
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
 FPS = 60
+SIMULATION_DT = 1.0 / FPS  # fixed simulation timestep, independent of the render rate
+SIMULATION_MAX_STEPS = 5  # most simulation steps run to catch up before a frame is drawn
+SIMULATION_MAX_SKIPPED_FRAMES = 5  # most frames left undrawn in a row while behind
+SIMULATION_MAX_FRAME_TIME = 0.25  # longer frames (stalls, window drags) are clamped to this
+
+# Replays
+REPLAY_RECORDING = False  # record every game the window plays
+REPLAY_DIRECTORY = 'replays'
+REPLAY_KEYFRAME_INTERVAL = 300  # ticks between state snapshots used for seeking
+
+# Balance runs (src/balance.py)
+BALANCE_MAX_TICKS = FPS * 60 * 20  # stop a game after 20 simulated minutes
+BALANCE_CHUNK_SIZE = 8  # games per worker task
+
+# Scripted bot controllers (src/controllers.py)
+BOT_SIGHT_RANGE = 300  # how far bots look for orbs, items and enemies to approach
+BOT_KITE_RADIUS = 150  # enemies closer than this are run away from
+BOT_EDGE_MARGIN = 100  # kiting bots steer back towards the middle within this of a wall
+BOT_DODGE_RADIUS = 120  # enemy bullets closer than this and heading for a bot are sidestepped
+BOT_DODGE_WEIGHT = 3.0  # how much more a bullet counts than an enemy at the same distance
+
+# Batched training environments (src/vec_env.py)
+VEC_ENV_MAX_TICKS = FPS * 60 * 10  # episodes end after 10 simulated minutes
+VEC_ENV_MAX_ENEMIES = 32  # enemies observed per env, nearest first
+VEC_ENV_MAX_BULLETS = 32
+VEC_ENV_MAX_ORBS = 16
+
+# Online co-op with rollback netcode (src/netplay.py)
+NETPLAY_PORT = 7777
+NETPLAY_INPUT_DELAY = None  # frames local inputs are held back; None picks one from the measured round trip
+NETPLAY_MAX_INPUT_DELAY = 6
+NETPLAY_ROLLBACK_TARGET = 2  # frames of one-way latency left for rollback to hide when picking the delay
+NETPLAY_MAX_ROLLBACK = 8  # most frames simulated ahead of the remote inputs before waiting for them
+NETPLAY_SYNC_INTERVAL = 10  # fewest frames between waits that let a lagging peer catch up
+NETPLAY_SYNC_SAMPLES = 8  # round trips measured before the game starts
+NETPLAY_CHECKSUM_INTERVAL = 60  # frames between state checksums compared to detect desyncs
+NETPLAY_CONNECT_TIMEOUT = 30.0  # seconds to wait for the other player
+NETPLAY_TIMEOUT = 5.0  # seconds without packets before the other player counts as gone
+
+# Authoritative game server (src/server.py)
+SERVER_PORT = 7800  # lobby port; worker process i listens on SERVER_PORT + 1 + i
+SERVER_WORKERS = None  # worker processes hosting sessions; None uses one per CPU
+SERVER_STATE_INTERVAL = 2  # ticks between state messages to clients (30 per second)
+SERVER_MAX_WRITE_BUFFER = 64 * 1024  # state messages are skipped for clients this far behind
+SERVER_REPORT_INTERVAL = 5.0  # seconds between load reports
+
+# Delta-compressed state replication (src/replication.py)
+REPLICATION_INTEREST_MARGIN = 64  # pixels beyond a viewer's view still replicated, so entering things don't pop in
+REPLICATION_HISTORY = 32  # unacknowledged snapshots kept per viewer as possible delta baselines
+REPLICATION_COMPRESSION = 1  # zlib level of state message bodies (1 is fastest)
+
+# Performance overlay (src/profiler.py)
+PROFILER_KEY = pygame.K_F3  # toggles the overlay and the profiling behind it
+PROFILER_WINDOW = 300  # frames the rolling percentiles cover (5 seconds at 60 FPS)
+PROFILER_FRAME_BUDGET = 1.0 / FPS  # frame time the overlay measures against
+PROFILER_OVERLAY_INTERVAL = 15  # frames between overlay repaints, so its text doesn't cost a render every frame
+PROFILER_TRACE_KEY = pygame.K_F4  # starts recording a trace, then saves it on each later press
+PROFILER_TRACE_RECORDING = False  # record a trace from startup
+PROFILER_TRACE_CAPACITY = 1 << 16  # trace events kept (about 20 seconds of a busy game at 60 FPS)
+PROFILER_SPIKE_TIME = 0.050  # frame time that saves the trace on its own while recording
+PROFILER_SPIKE_COOLDOWN = 10.0  # seconds between automatic saves
+PROFILER_TRACE_DIRECTORY = 'traces'
 
 # Language settings
 CURRENT_LANGUAGE = 'zh'  # 'en' for English, 'zh' for Chinese - Default to Chinese
@@ -116,6 +178,7 @@ ENEMY_BASE_DAMAGE = 10
 ENEMY_HP_SCALING = 5  # HP increase per wave (reduced from 10)
 ENEMY_DAMAGE_SCALING = 2  # Damage increase per wave
 ENEMY_XP_REWARD = 5
+ENEMY_HORDE_CAPACITY = 64  # initial slots in the enemy arrays (grows as needed)
 
 # Projectile settings
 PROJECTILE_SPEED = 150
@@ -123,6 +186,8 @@ PROJECTILE_SIZE = 12  # Increased from 6 for better collision detection
 ENEMY_SHOOT_COOLDOWN = 2.0
 BOSS_SHOOT_COOLDOWN = 1.5
 BOSS_SPECIAL_ATTACK_COOLDOWN = 5.0
+ENEMY_BULLET_CAPACITY = 256  # preallocated enemy bullet slots (grows as needed)
+PLAYER_PROJECTILE_CAPACITY = 64  # preallocated slots per player (grows as needed)
 
 # Boss settings
 BOSS_SIZE = 64
@@ -132,6 +197,9 @@ BOSS_DAMAGE = 35    # Increased from 25
 BOSS_XP_REWARD = 50
 BOSS_WAVE_INTERVAL = 5  # Boss appears every 5 waves
 
+# Collision broadphase
+SPATIAL_HASH_CELL_SIZE = 64  # pixels per grid cell
+
 # Wave settings
 WAVE_BASE_ENEMY_COUNT = 8
 WAVE_ENEMY_INCREASE = 2  # Additional enemies per wave
@@ -146,6 +214,14 @@ HEALTH_BAR_HEIGHT = 20
 XP_BAR_WIDTH = 150
 XP_BAR_HEIGHT = 15
 UI_MARGIN = 20
+UI_FONT_NAMES = 'simsun,arial,helvetica'  # System fonts that support Chinese characters
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept by the shared text cache
+TEXT_ALPHA_LEVELS = 16  # Fade steps cached for faded text
+
+# Rendering
+DIRTY_RECT_RENDERING = False  # Update only the changed screen regions instead of flipping
+DIRTY_RECT_MAX_COVERAGE = 0.5  # Fraction of the screen above which a full redraw is cheaper
+DIRTY_RECT_LIMIT = 64  # Dirty rects above which a full redraw is cheaper
 
 # Skill selection UI
 SKILL_SELECTION_BACKGROUND_ALPHA = 180
@@ -547,6 +623,9 @@ SKILLS = {
 PARTICLE_LIFETIME = 1.0
 BLOOD_PARTICLE_COUNT = 5
 XP_PARTICLE_SPEED = 100
+PARTICLE_CAPACITY = 2048  # New particles are dropped while the system is full
+PARTICLE_ALPHA_LEVELS = 16  # Fade steps with a prebuilt sprite each
+PARTICLE_GRAVITY = 100
 
 # Audio settings (for future implementation)
 MASTER_VOLUME = 0.7
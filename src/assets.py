@@ -0,0 +1,97 @@
+import pygame
+from settings import *
+from src.profiler import profiler
+
+# Archetype name -> (image size, color)
+ARCHETYPES = {
+    'player1': ((PLAYER_SIZE, PLAYER_SIZE), BLUE),
+    'player2': ((PLAYER_SIZE, PLAYER_SIZE), RED),
+    'enemy': ((ENEMY_SIZE, ENEMY_SIZE), RED),
+    'fast_enemy': ((ENEMY_SIZE, ENEMY_SIZE), ORANGE),
+    'tank_enemy': ((ENEMY_SIZE + 12, ENEMY_SIZE + 12), PURPLE),
+    'boss': ((BOSS_SIZE, BOSS_SIZE), BLACK),
+    'boss_charge': ((BOSS_SIZE + 10, BOSS_SIZE + 10), YELLOW),
+    'major_boss': ((BOSS_SIZE + 20, BOSS_SIZE + 20), (128, 0, 64)),  # Dark purple
+    'xp_orb': ((8, 8), YELLOW)
+}
+
+# Variant name -> (color override, alpha) applied to an archetype's size
+VARIANTS = {
+    'normal': (None, None),
+    'flash': (WHITE, None),  # Shown while taking damage
+    'ghost': (GRAY, 100)  # Dead players
+}
+
+
+class AssetManager:
+    """Builds each image once and hands out shared references
+    
+    Images are converted to the display format when a display exists, so
+    blits take SDL's fast path. Shared images must not be drawn on or filled;
+    ask for a different image instead.
+    """
+    def __init__(self):
+        self.solids = {}  # (size, color, alpha) -> Surface
+        self.images = {}  # (archetype, variant) -> Surface
+        self.keys = {}  # id(Surface) -> solids key, to refer to a shared image by name
+        
+    def get_solid(self, size, color, alpha=None):
+        """Get a shared surface filled with one color"""
+        key = (tuple(size), tuple(color), alpha)
+        surface = self.solids.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            profiler.count('surfaces')
+            surface.fill(color)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            if alpha is not None:
+                surface.set_alpha(alpha)
+            self.solids[key] = surface
+            self.keys[id(surface)] = key
+        return surface
+        
+    def get_frame(self, size, color, width):
+        """Get a shared transparent surface with a rect outline"""
+        key = (tuple(size), tuple(color), 'frame', width)
+        surface = self.solids.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            profiler.count('surfaces')
+            pygame.draw.rect(surface, color, surface.get_rect(), width)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            self.solids[key] = surface
+            self.keys[id(surface)] = key
+        return surface
+        
+    def get_image(self, archetype, variant='normal'):
+        """Get the shared image for an archetype and variant"""
+        key = (archetype, variant)
+        surface = self.images.get(key)
+        if surface is None:
+            size, color = ARCHETYPES[archetype]
+            variant_color, alpha = VARIANTS[variant]
+            surface = self.get_solid(size, variant_color or color, alpha)
+            self.images[key] = surface
+        return surface
+        
+    def get_key(self, surface):
+        """Get the key a shared image was built from, or None if it isn't one"""
+        return self.keys.get(id(surface))
+        
+    def get_by_key(self, key):
+        """Get the shared image for a key returned by get_key()"""
+        if len(key) == 4:
+            size, color, _, width = key
+            return self.get_frame(size, color, width)
+        return self.get_solid(*key)
+        
+    def clear(self):
+        """Drop every image, e.g. after the display mode changes"""
+        self.solids.clear()
+        self.images.clear()
+        self.keys.clear()
+
+
+assets = AssetManager()
@@ -0,0 +1,299 @@
+import ast
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import settings
+from settings import *
+from src.manager import GameManager
+from src.simulation import HeadlessGame, ScriptedKeys, first_skill_option
+from src.stats import refresh_skill_modifiers
+from src.controllers import CONTROLLERS
+
+# Columns of one game's result, in the order workers send them back
+RESULT_FIELDS = ('config', 'seed', 'wave', 'ticks', 'game_over', 'kills', 'mean_time_to_kill',
+                 'damage_taken_p1', 'damage_taken_p2')
+
+_NO_KEYS = ScriptedKeys()
+_ATTACK_KEYS = ScriptedKeys([PLAYER1_CONTROLS['attack'], PLAYER2_CONTROLS['attack']])
+
+# Named input scripts the players follow, tick -> keys
+INPUT_SCRIPTS = {
+    'idle': lambda tick: _NO_KEYS,
+    'hold_attack': lambda tick: _ATTACK_KEYS,  # Melee once, then the special weapon when unlocked
+    'tap_attack': lambda tick: _ATTACK_KEYS if tick % 10 < 2 else _NO_KEYS  # Melee and short-press shots
+}
+
+_MISSING = object()
+
+
+def _settings_modules():
+    """Get settings and every loaded game module that star-imported it"""
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and (name == 'settings' or name.startswith('src.'))]
+
+
+def apply_overrides(overrides):
+    """Override settings in this process; returns a function that undoes the overrides
+    
+    A plain name such as 'ENEMY_BASE_HP' is rebound in settings and every
+    game module that imported it. A dotted name such as
+    'SKILLS.vitality.effect.max_hp_bonus' sets a value inside a settings
+    dictionary. Values already baked into default arguments at import time
+    are not affected; skill modifiers are recompiled.
+    """
+    undo = []
+    for name, value in overrides.items():
+        path = name.split('.')
+        if len(path) == 1:
+            if not hasattr(settings, name):
+                raise KeyError(f"unknown setting {name}")
+            for module in _settings_modules():
+                if hasattr(module, name):
+                    undo.append((module, name, getattr(module, name)))
+                    setattr(module, name, value)
+        else:
+            container = getattr(settings, path[0])
+            for key in path[1:-1]:
+                container = container[key]
+            undo.append((container, path[-1], container.get(path[-1], _MISSING)))
+            container[path[-1]] = value
+    refresh_skill_modifiers()
+    
+    def restore():
+        for target, key, value in reversed(undo):
+            if isinstance(target, dict):
+                if value is _MISSING:
+                    del target[key]
+                else:
+                    target[key] = value
+            else:
+                setattr(target, key, value)
+        refresh_skill_modifiers()
+        
+    return restore
+
+
+def build_order_picker(build_order):
+    """Skill picker taking the first offered skill in build order, else the first option
+    
+    build_order is a list of skill names for both players, or a dict of
+    player_id -> list.
+    """
+    def pick(player, options):
+        order = build_order.get(player.player_id, ()) if isinstance(build_order, dict) else build_order
+        for skill in order:
+            if skill in options:
+                return skill
+        return first_skill_option(player, options)
+        
+    return pick
+
+
+class BalanceGameManager(GameManager):
+    """Game manager that also records how long each enemy lived"""
+    def start_new_game(self, seed=None):
+        super().start_new_game(seed)
+        self.elapsed = 0.0
+        self.spawn_times = {}  # Enemy -> elapsed time it spawned
+        self.kill_times = []
+        
+    def update(self, dt, players):
+        self.elapsed += dt
+        super().update(dt, players)
+        
+    def spawn_enemy(self):
+        super().spawn_enemy()
+        # New enemies take the horde's last slot
+        self.spawn_times[self.horde.members[-1]] = self.elapsed
+        
+    def handle_enemy_death(self, enemy, killer_player):
+        spawned = self.spawn_times.pop(enemy, None)
+        if spawned is not None:
+            self.kill_times.append(self.elapsed - spawned)
+        super().handle_enemy_death(enemy, killer_player)
+
+
+def play_game(config_index, config, seed, max_ticks):
+    """Play one headless game of a configuration; returns a result row"""
+    build_order = config.get('build_order')
+    picker = build_order_picker(build_order) if build_order else first_skill_option
+    
+    inputs = config.get('inputs', 'kite')
+    if inputs in CONTROLLERS:
+        game = HeadlessGame(skill_picker=picker, controllers=[CONTROLLERS[inputs](), CONTROLLERS[inputs]()])
+    else:
+        game = HeadlessGame(input_script=INPUT_SCRIPTS[inputs], skill_picker=picker)
+    game.game_manager = BalanceGameManager()
+    game.reset(seed)
+    for player in game.players:
+        for skill in config.get('starting_skills', ()):
+            player.add_skill(skill)
+    ticks = game.run(max_ticks)
+    
+    game_manager = game.game_manager
+    kill_times = game_manager.kill_times
+    return (config_index, seed, game_manager.current_wave, ticks,
+            game_manager.game_state == GAME_STATE_GAME_OVER, len(kill_times),
+            sum(kill_times) / len(kill_times) if kill_times else 0.0,
+            game.players[0].damage_taken, game.players[1].damage_taken)
+
+
+# Configurations of the worker process, sent once when the pool starts
+_worker_configs = []
+
+
+def _init_worker(configs):
+    """Pool initializer: keep the configurations so tasks only carry indices and seeds"""
+    global _worker_configs
+    _worker_configs = configs
+
+
+def _run_chunk(config_index, seeds, max_ticks):
+    """Play a chunk of games for one configuration in a worker process"""
+    config = _worker_configs[config_index]
+    restore = apply_overrides(config.get('overrides', {}))
+    try:
+        return [play_game(config_index, config, seed, max_ticks) for seed in seeds]
+    finally:
+        restore()
+
+
+def run_batch(configs, games, max_ticks=BALANCE_MAX_TICKS, workers=None, chunk_size=BALANCE_CHUNK_SIZE,
+              base_seed=0):
+    """Play `games` games of every configuration across a process pool; returns result rows
+    
+    A configuration is a dict with optional 'name', 'overrides' (see
+    apply_overrides), 'build_order' (see build_order_picker),
+    'starting_skills' given to both players and 'inputs' (a key of
+    CONTROLLERS to have bots play, 'kite' by default, or of INPUT_SCRIPTS).
+    Game i of every configuration uses seed base_seed + i, so configurations
+    are compared on the same spawns.
+    """
+    tasks = []
+    for config_index in range(len(configs)):
+        for start in range(0, games, chunk_size):
+            seeds = list(range(base_seed + start, base_seed + min(start + chunk_size, games)))
+            tasks.append((config_index, seeds))
+            
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=(configs,)) as executor:
+        futures = [executor.submit(_run_chunk, config_index, seeds, max_ticks) for config_index, seeds in tasks]
+        for future in as_completed(futures):
+            rows.extend(future.result())
+            
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return rows
+
+
+def _distribution(values):
+    """Summarize a list of numbers as mean and percentiles"""
+    if not values:
+        return None
+    values = np.asarray(values, dtype=float)
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {'mean': float(values.mean()), 'p10': float(p10), 'p50': float(p50), 'p90': float(p90),
+            'min': float(values.min()), 'max': float(values.max())}
+
+
+def summarize(configs, rows):
+    """Aggregate result rows into per-configuration distributions"""
+    summaries = []
+    for config_index, config in enumerate(configs):
+        config_rows = [row for row in rows if row[0] == config_index]
+        columns = dict(zip(RESULT_FIELDS, zip(*config_rows))) if config_rows else {}
+        summaries.append({
+            'name': config.get('name', f'config {config_index}'),
+            'overrides': config.get('overrides', {}),
+            'build_order': config.get('build_order'),
+            'starting_skills': config.get('starting_skills', []),
+            'games': len(config_rows),
+            'game_over_rate': sum(columns.get('game_over', ())) / max(len(config_rows), 1),
+            'wave': _distribution(columns.get('wave', ())),
+            'mean_time_to_kill': _distribution([ttk for ttk, kills in zip(columns.get('mean_time_to_kill', ()),
+                                                                          columns.get('kills', ())) if kills]),
+            'damage_taken': _distribution(columns.get('damage_taken_p1', ()) + columns.get('damage_taken_p2', ()))
+        })
+    return summaries
+
+
+def write_csv(path, configs, rows):
+    """Write one line per game"""
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(('name',) + RESULT_FIELDS)
+        for row in rows:
+            writer.writerow((configs[row[0]].get('name', f'config {row[0]}'),) + tuple(row))
+
+
+def _parse_value(text):
+    """Parse an override value as a Python literal, falling back to a string"""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main(argv=None):
+    """Run a balance sweep and report wave-survival statistics"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play many headless Dual Fury games in parallel")
+    parser.add_argument('--games', type=int, default=100, help="games per configuration")
+    parser.add_argument('--max-ticks', type=int, default=BALANCE_MAX_TICKS, help="stop a game after this many ticks")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--config', metavar='PATH', help="JSON list of configurations to compare")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="override a setting, e.g. ENEMY_BASE_HP=40 or SKILLS.vitality.effect.max_hp_bonus=30")
+    parser.add_argument('--build', metavar='SKILLS', help="comma separated skill build order for both players")
+    parser.add_argument('--skills', metavar='SKILLS', help="comma separated skills both players start with")
+    parser.add_argument('--inputs', choices=sorted(INPUT_SCRIPTS) + sorted(CONTROLLERS), default='kite',
+                        help="input script, or bot controller, for both players")
+    parser.add_argument('--csv', metavar='PATH', help="write one row per game")
+    parser.add_argument('--json', metavar='PATH', help="write the per-configuration summary")
+    args = parser.parse_args(argv)
+    
+    if args.config:
+        with open(args.config) as file:
+            configs = json.load(file)
+    else:
+        overrides = {}
+        for assignment in args.set:
+            name, _, value = assignment.partition('=')
+            overrides[name.strip()] = _parse_value(value)
+        configs = [{
+            'name': 'custom' if overrides or args.build or args.skills else 'default',
+            'overrides': overrides,
+            'build_order': args.build.split(',') if args.build else None,
+            'starting_skills': args.skills.split(',') if args.skills else [],
+            'inputs': args.inputs
+        }]
+        
+    start = time.perf_counter()
+    rows = run_batch(configs, args.games, args.max_ticks, args.workers, base_seed=args.seed)
+    elapsed = time.perf_counter() - start
+    summaries = summarize(configs, rows)
+    
+    if args.csv:
+        write_csv(args.csv, configs, rows)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(summaries, file, indent=2)
+            
+    print(f"Played {len(rows)} games in {elapsed:.1f}s ({len(rows) / max(elapsed, 1e-9):.1f} games/s)")
+    for summary in summaries:
+        wave = summary['wave']
+        ttk = summary['mean_time_to_kill']
+        print(f"{summary['name']}: wave p10/p50/p90 {wave['p10']:.0f}/{wave['p50']:.0f}/{wave['p90']:.0f}, "
+              f"time to kill {ttk['mean'] if ttk else 0:.2f}s, "
+              f"damage taken {summary['damage_taken']['mean']:.0f}, game over {summary['game_over_rate']:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import math
+from collections import namedtuple
+import numpy as np
+from settings import *
+
+# One tick of player input. move_x and move_y are -1, 0 or 1 like the
+# direction keys; attack is whether the attack key is held.
+Action = namedtuple('Action', ('move_x', 'move_y', 'attack'))
+
+IDLE = Action(0, 0, False)
+
+
+def sign(value, dead_zone=0.0):
+    """Get -1, 0 or 1 for a value, treating anything within the dead zone as 0"""
+    if value > dead_zone:
+        return 1
+    if value < -dead_zone:
+        return -1
+    return 0
+
+
+def direction(dx, dy):
+    """Get the 8-way key direction closest to an offset"""
+    dead_zone = math.hypot(dx, dy) * 0.38  # sin(22.5 degrees)
+    return sign(dx, dead_zone), sign(dy, dead_zone)
+
+
+class KeyboardController:
+    """Reads a player's action from the keyboard, or anything indexed like it"""
+    def __init__(self, controls):
+        self.controls = controls
+        
+    def act(self, player, game_manager, keys_pressed):
+        """Get this tick's action for a player"""
+        controls = self.controls
+        return Action(keys_pressed[controls['right']] - keys_pressed[controls['left']],
+                      keys_pressed[controls['down']] - keys_pressed[controls['up']],
+                      bool(keys_pressed[controls['attack']]))
+
+
+class ReplayController:
+    """Plays one player's recorded actions back from a replay, one tick per call"""
+    def __init__(self, replay, player_id, start_tick=0):
+        self.replay = replay
+        self.index = player_id - 1
+        self.tick = start_tick
+        
+    def act(self, player, game_manager, keys_pressed):
+        """Get the recorded action for the next tick, idle once the replay runs out"""
+        # Imported here: src.replay builds on the simulation driver, which uses this module
+        from src.replay import decode_actions
+        
+        if self.tick >= len(self.replay):
+            return IDLE
+        action = decode_actions(self.replay.inputs[self.tick])[self.index]
+        self.tick += 1
+        return action
+
+
+class BotController:
+    """Base for cheap scripted bots
+    
+    Bots move in the 8 key directions, so their games record into replays
+    exactly, and tap attack on alternate ticks: every press is a melee
+    attack and every release a short-press shot, whenever off cooldown.
+    """
+    def __init__(self, sight_range=BOT_SIGHT_RANGE):
+        self.sight_range = sight_range
+        self.tick = 0
+        
+    def act(self, player, game_manager, keys_pressed):
+        """Get this tick's action for a player"""
+        self.tick += 1
+        if not player.is_alive:
+            return IDLE
+        move_x, move_y = self.choose_move(player, game_manager)
+        return Action(move_x, move_y, self.tick % 2 == 0)
+        
+    def choose_move(self, player, game_manager):
+        """Get the (move_x, move_y) key direction to take this tick; the base bot stands still"""
+        return 0, 0
+        
+    def nearest_enemy(self, player, game_manager):
+        """Get the closest enemy center, or None when there are no enemies"""
+        horde = game_manager.horde
+        if horde.count == 0:
+            return None
+        offsets = horde.position[:horde.count] - player.rect.center
+        nearest = np.einsum('ij,ij->i', offsets, offsets).argmin()
+        return horde.position[nearest]
+        
+    def threats(self, player, game_manager, radius):
+        """Get the enemies within radius of the player, from the collision grid"""
+        x, y = player.rect.center
+        return game_manager.enemy_grid.query_radius(x, y, radius)
+        
+    def incoming_bullets(self, player, game_manager, radius=BOT_DODGE_RADIUS):
+        """Get the (offsets to the player, velocities) of enemy bullets within radius heading for it"""
+        bullets = game_manager.enemy_bullets
+        slots = bullets.active_slots()
+        offsets = np.asarray(player.rect.center, dtype=float) - bullets.position[slots]
+        velocity = bullets.velocity[slots]
+        incoming = ((np.einsum('ij,ij->i', offsets, offsets) < radius * radius) &
+                    (np.einsum('ij,ij->i', offsets, velocity) > 0))
+        return offsets[incoming], velocity[incoming]
+        
+    def move_towards(self, player, x, y):
+        """Key direction towards a point"""
+        return direction(x - player.rect.centerx, y - player.rect.centery)
+        
+    def move_away(self, player, threats, bullets=None):
+        """Key direction away from a group of enemies and across incoming bullets, steering off the screen edges"""
+        x, y = player.rect.center
+        dx = dy = 0.0
+        for enemy in threats:
+            offset_x = x - enemy.rect.centerx
+            offset_y = y - enemy.rect.centery
+            distance_sq = offset_x * offset_x + offset_y * offset_y or 1.0
+            dx += offset_x / distance_sq
+            dy += offset_y / distance_sq
+            
+        # Sidestep bullets: push along the part of each offset across the bullet's path,
+        # or off to its side when it is dead on
+        if bullets is not None and len(bullets[0]):
+            offsets, velocity = bullets
+            speed_sq = np.einsum('ij,ij->i', velocity, velocity)
+            speed_sq[speed_sq == 0] = 1.0
+            along = np.einsum('ij,ij->i', offsets, velocity) / speed_sq
+            across = offsets - along[:, np.newaxis] * velocity
+            dead_on = np.einsum('ij,ij->i', across, across) < 1.0
+            across[dead_on] = velocity[dead_on][:, ::-1] * (1, -1)
+            across /= np.linalg.norm(across, axis=1)[:, np.newaxis]
+            distance = np.linalg.norm(offsets, axis=1)
+            distance[distance == 0] = 1.0
+            push = (across / distance[:, np.newaxis]).sum(axis=0) * BOT_DODGE_WEIGHT
+            dx += push[0]
+            dy += push[1]
+            
+        # Walls pen the player in, so lean towards the middle when close to them
+        margin = BOT_EDGE_MARGIN
+        if x < margin or x > SCREEN_WIDTH - margin:
+            dx += (SCREEN_WIDTH / 2 - x) / (margin * margin)
+        if y < margin or y > SCREEN_HEIGHT - margin:
+            dy += (SCREEN_HEIGHT / 2 - y) / (margin * margin)
+        return direction(dx, dy)
+
+
+class MeleeRushBot(BotController):
+    """Charges the closest enemy and hits it"""
+    def choose_move(self, player, game_manager):
+        target = self.nearest_enemy(player, game_manager)
+        if target is None:
+            return self.move_towards(player, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+            
+        # Bullets come first: a hit costs more than a late swing
+        bullets = self.incoming_bullets(player, game_manager)
+        if len(bullets[0]):
+            return self.move_away(player, (), bullets)
+            
+        # Stop once the attack hitbox reaches the target
+        reach = player.get_effective_stats().attack_range / 2
+        if abs(target[0] - player.rect.centerx) < reach and abs(target[1] - player.rect.centery) < reach:
+            return 0, 0
+        return self.move_towards(player, target[0], target[1])
+
+
+class KiteBot(BotController):
+    """Keeps its distance from enemies while its shots auto-aim at them"""
+    def choose_move(self, player, game_manager):
+        threats = self.threats(player, game_manager, BOT_KITE_RADIUS)
+        bullets = self.incoming_bullets(player, game_manager)
+        if threats or len(bullets[0]):
+            return self.move_away(player, threats, bullets)
+            
+        # Nothing close: hover near the middle, at range from the closest enemy
+        target = self.nearest_enemy(player, game_manager)
+        if target is not None and math.hypot(target[0] - player.rect.centerx,
+                                             target[1] - player.rect.centery) > self.sight_range:
+            return self.move_towards(player, target[0], target[1])
+        return self.move_towards(player, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+
+
+class OrbCollectorBot(KiteBot):
+    """Picks up XP orbs and items, kiting whenever enemies get close"""
+    def choose_move(self, player, game_manager):
+        if (self.threats(player, game_manager, BOT_KITE_RADIUS) or
+                len(self.incoming_bullets(player, game_manager)[0])):
+            return super().choose_move(player, game_manager)
+            
+        x, y = player.rect.center
+        closest = None
+        closest_distance_sq = self.sight_range * self.sight_range
+        for orb in game_manager.xp_orbs:
+            distance_sq = (orb.rect.centerx - x) ** 2 + (orb.rect.centery - y) ** 2
+            if distance_sq < closest_distance_sq:
+                closest, closest_distance_sq = orb.rect.center, distance_sq
+        for item in game_manager.item_manager.items:
+            distance_sq = (item.x - x) ** 2 + (item.y - y) ** 2
+            if distance_sq < closest_distance_sq:
+                closest, closest_distance_sq = (item.x, item.y), distance_sq
+                
+        if closest is None:
+            return super().choose_move(player, game_manager)
+        return self.move_towards(player, closest[0], closest[1])
+
+
+# Controllers by name, for command lines and batch configurations
+CONTROLLERS = {
+    'rush': MeleeRushBot,
+    'kite': KiteBot,
+    'collector': OrbCollectorBot
+}
+
+
+def keyboard_controllers(players):
+    """Get a keyboard controller for each player, using its own controls"""
+    return [KeyboardController(player.controls) for player in players]
+
+
+def read_actions(game_manager, players, controllers, keys_pressed):
+    """Ask each player's controller for this tick's action"""
+    return [controller.act(player, game_manager, keys_pressed) for player, controller in zip(players, controllers)]
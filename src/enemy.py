@@ -1,18 +1,24 @@
 import pygame
 import math
 import random
+import numpy as np
 from settings import *
+from src.projectiles import EnemyBulletStore
+from src.fonts import get_font, render_text
+from src.assets import assets
+from src.render import SCREEN_CAMERA, blit_overlay, draw_bar, interpolation_lag
+from src.profiler import profiler
 
 class DamageNumber(pygame.sprite.Sprite):
     """Floating damage number that appears when enemies take damage"""
     def __init__(self, x, y, damage, color=WHITE):
         super().__init__()
         
-        # Create text surface
-        font = pygame.font.Font(None, 24)
-        self.image = font.render(str(int(damage)), True, color)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
+        # Text is rendered through the shared cache when drawn
+        self.text = str(int(damage))
+        self.color = color
+        self.x = x
+        self.y = y
         
         # Animation properties
         self.velocity_y = -50  # Move upward
@@ -22,83 +28,255 @@ class DamageNumber(pygame.sprite.Sprite):
     def update(self, dt):
         """Update damage number animation"""
         # Move upward
-        self.rect.y += self.velocity_y * dt
+        self.y += self.velocity_y * dt
         
         # Fade out
         self.lifetime -= dt
         self.alpha = max(0, int(255 * (self.lifetime / 1.0)))
         
-        # Update alpha
-        self.image.set_alpha(self.alpha)
-        
         # Remove when lifetime expires
         if self.lifetime <= 0:
             return True  # Should be removed
         return False
         
-    def draw(self, screen):
+    def draw(self, screen, camera=SCREEN_CAMERA):
         """Draw damage number"""
-        screen.blit(self.image, self.rect)
+        image = render_text(get_font(24, names=None), self.text, self.color, self.alpha)
+        x, y = camera.point(self.x, self.y)
+        screen.blit(image, image.get_rect(center=(round(x), round(y))))
 
-class Projectile(pygame.sprite.Sprite):
-    """Projectile fired by enemies"""
-    def __init__(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=RED):
-        super().__init__()
-        
-        self.image = pygame.Surface((PROJECTILE_SIZE, PROJECTILE_SIZE))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        
-        # Calculate direction
-        dx = target_x - x
-        dy = target_y - y
-        distance = math.sqrt(dx * dx + dy * dy)
+class EnemyHorde:
+    """Structure-of-arrays store for enemy kinematics and status timers
+    
+    Every Enemy is a thin view onto one slot of these arrays. Slots are kept
+    dense with swap-remove, so [:count] of each array is the live horde and
+    targeting, movement and timers update in a few vectorized operations.
+    """
+    FIELDS = ('position', 'previous_position', 'velocity', 'speed', 'slow_factor', 'slow_timer', 'stun_timer',
+              'flash_timer', 'target', 'can_shoot', 'shoot_timer', 'shoot_cooldown')
+    
+    def __init__(self, capacity=ENEMY_HORDE_CAPACITY, bullets=None):
+        self.count = 0
+        self.bullets = bullets if bullets is not None else EnemyBulletStore()  # Shared by every enemy
+        self.members = []  # slot -> Enemy
+        self.behaviors = {}  # Enemies with per-object update logic (ordered set)
+        self.players = []
+        self._allocate(capacity)
+        
+    def _allocate(self, capacity):
+        """(Re)allocate the arrays, keeping the live slots"""
+        old = {name: getattr(self, name) for name in self.FIELDS} if self.count else {}
+        
+        self.capacity = capacity
+        self.position = np.zeros((capacity, 2))  # Center, in pixels
+        self.previous_position = np.zeros((capacity, 2))  # Center at the start of the tick, for interpolation
+        self.velocity = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+        self.slow_factor = np.ones(capacity)
+        self.slow_timer = np.zeros(capacity)
+        self.stun_timer = np.zeros(capacity)
+        self.flash_timer = np.zeros(capacity)
+        self.target = np.full(capacity, -1, dtype=np.intp)  # Index into players, -1 for none
+        self.can_shoot = np.zeros(capacity, dtype=bool)
+        self.shoot_timer = np.zeros(capacity)
+        self.shoot_cooldown = np.zeros(capacity)
+        
+        for name, array in old.items():
+            getattr(self, name)[:self.count] = array[:self.count]
+            
+    def add(self, enemy, x, y):
+        """Claim a slot for an enemy centered at (x, y); returns the slot index"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+            
+        slot = self.count
+        self.count += 1
+        self.members.append(enemy)
+        
+        self.position[slot] = (x, y)
+        self.previous_position[slot] = (x, y)
+        self.velocity[slot] = 0
+        self.speed[slot] = 0
+        self.slow_factor[slot] = 1.0
+        self.slow_timer[slot] = 0
+        self.stun_timer[slot] = 0
+        self.flash_timer[slot] = 0
+        self.target[slot] = -1
+        self.can_shoot[slot] = False
+        self.shoot_timer[slot] = 0
+        self.shoot_cooldown[slot] = 0
+        
+        # Only subclasses with their own update (bosses, tanks) need a per-object call
+        if type(enemy).update is not Enemy.update:
+            self.behaviors[enemy] = None
+            
+        return slot
+        
+    def remove(self, enemy):
+        """Release an enemy's slot, moving the last slot into the gap"""
+        enemy.detach()
+        slot = enemy._slot
+        last = self.count - 1
+        
+        if slot != last:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.members[last]
+            moved._slot = slot
+            self.members[slot] = moved
+            
+        self.members.pop()
+        self.count -= 1
+        self.behaviors.pop(enemy, None)
+        enemy._slot = -1
+        
+    def clear(self):
+        """Release every slot"""
+        for enemy in self.members:
+            enemy.detach()
+            enemy._slot = -1
+        self.members = []
+        self.behaviors = {}
+        self.count = 0
+        
+    def __getstate__(self):
+        """Pickle only the live slots, as raw bytes, so snapshots stay small and quick to take"""
+        state = self.__dict__.copy()
+        for name in self.FIELDS:
+            state[name] = state[name][:self.count].tobytes()
+        return state
+        
+    def __setstate__(self, state):
+        live = {name: state.pop(name) for name in self.FIELDS}
+        self.__dict__.update(state)
+        count = self.count
+        self.count = 0
+        self._allocate(self.capacity)
+        self.count = count
+        for name, data in live.items():
+            array = getattr(self, name)
+            values = np.frombuffer(data, dtype=array.dtype)
+            array.reshape(-1)[:len(values)] = values
         
-        if distance > 0:
-            self.velocity = pygame.math.Vector2(
-                (dx / distance) * speed,
-                (dy / distance) * speed
-            )
-        else:
-            self.velocity = pygame.math.Vector2(0, 0)
+    def update(self, dt, players):
+        """Advance status timers, targeting, movement and shooting for every enemy"""
+        self.players = players
+        n = self.count
+        if n == 0:
+            return
             
-        self.damage = damage
-        self.lifetime = 5.0  # Disappear after 5 seconds
+        self.previous_position[:n] = self.position[:n]
         
-    def update(self, dt):
-        """Update projectile position"""
-        self.rect.x += self.velocity.x * dt
-        self.rect.y += self.velocity.y * dt
+        # Status effect timers
+        slow_timer = self.slow_timer[:n]
+        np.maximum(slow_timer - dt, 0, out=slow_timer)
+        self.slow_factor[:n][slow_timer <= 0] = 1.0
         
-        self.lifetime -= dt
+        stun_timer = self.stun_timer[:n]
+        np.maximum(stun_timer - dt, 0, out=stun_timer)
         
-        # Remove if out of bounds or lifetime expired
-        if (self.rect.right < 0 or self.rect.left > SCREEN_WIDTH or
-            self.rect.bottom < 0 or self.rect.top > SCREEN_HEIGHT or
-            self.lifetime <= 0):
-            return True  # Should be removed
-            
-        return False
+        flash_timer = self.flash_timer[:n]
+        np.maximum(flash_timer - dt, 0, out=flash_timer)
         
-    def draw(self, screen):
-        """Draw projectile"""
-        screen.blit(self.image, self.rect)
+        # Stunned enemies keep their old target and don't move or shoot
+        active = stun_timer <= 0
+        target = self.target[:n]
+        position = self.position[:n]
         
-    def collides_with_player(self, player):
-        """Check collision with player"""
-        return self.rect.colliderect(player.rect)
+        alive_indices = [i for i, player in enumerate(players) if player.is_alive]
+        if alive_indices:
+            # Find closest living player
+            player_positions = np.array([players[i].rect.center for i in alive_indices], dtype=float)
+            offsets = player_positions[np.newaxis, :, :] - position[:, np.newaxis, :]
+            distance_sq = np.einsum('ijk,ijk->ij', offsets, offsets)
+            nearest = distance_sq.argmin(axis=1)
+            target[active] = np.asarray(alive_indices, dtype=np.intp)[nearest[active]]
+            
+            # Move towards the target player
+            rows = np.arange(n)
+            direction = offsets[rows, nearest]
+            distance = np.sqrt(distance_sq[rows, nearest])
+            moving = active & (distance > 0)
+            effective_speed = self.speed[:n] * self.slow_factor[:n]
+            scale = np.divide(effective_speed, distance, out=np.zeros(n), where=moving)
+            step_velocity = direction * scale[:, np.newaxis]
+            self.velocity[:n][moving] = step_velocity[moving]
+            position += step_velocity * dt
+        else:
+            target[active] = -1
+            
+        self.sync_rects()
+        
+        # Handle shooting
+        shooting = self.can_shoot[:n] & active & (target >= 0)
+        shoot_timer = self.shoot_timer[:n]
+        shoot_timer[shooting] += dt
+        firing = shooting & (shoot_timer >= self.shoot_cooldown[:n])
+        shoot_timer[firing] = 0
+        for slot in np.flatnonzero(firing).tolist():
+            self.members[slot].shoot_at_player()
+            
+        # Per-object behaviour (special attacks, charges)
+        for enemy in list(self.behaviors):
+            enemy.update(dt, players)
+            
+    def sync_rects(self):
+        """Copy the array positions back into each enemy's rect"""
+        centers = np.rint(self.position[:self.count]).astype(int).tolist()
+        for enemy, center in zip(self.members, centers):
+            enemy.rect.center = center
+
+
+class HordeField:
+    """Descriptor exposing one EnemyHorde column as an attribute of an Enemy view
+    
+    Once the enemy's slot is released the slot may hold another enemy, so
+    the field reads and writes the copy taken by Enemy.detach() instead.
+    """
+    def __init__(self, name):
+        self.name = name
+        
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        if enemy._slot < 0:
+            return enemy._detached[self.name]
+        return getattr(enemy.horde, self.name).item(enemy._slot)
+        
+    def __set__(self, enemy, value):
+        if enemy._slot < 0:
+            enemy._detached[self.name] = value
+        else:
+            getattr(enemy.horde, self.name)[enemy._slot] = value
+
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, wave_number=1):
+    # Views onto the horde arrays
+    speed = HordeField('speed')
+    slow_factor = HordeField('slow_factor')
+    slow_timer = HordeField('slow_timer')
+    stun_timer = HordeField('stun_timer')
+    flash_timer = HordeField('flash_timer')
+    can_shoot = HordeField('can_shoot')
+    shoot_timer = HordeField('shoot_timer')
+    shoot_cooldown = HordeField('shoot_cooldown')
+    HORDE_FIELDS = ('speed', 'slow_factor', 'slow_timer', 'stun_timer', 'flash_timer', 'can_shoot', 'shoot_timer',
+                    'shoot_cooldown')
+    
+    def __init__(self, x, y, wave_number, horde):
         super().__init__()
         
         # Create enemy sprite
-        self.image = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-        self.image.fill(RED)
+        self.archetype = 'enemy'
+        self.image = assets.get_image(self.archetype)
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         
+        # Kinematics live in the horde arrays
+        self.horde = horde
+        self._slot = self.horde.add(self, x, y)
+        
         # Base stats
         self.base_hp = ENEMY_BASE_HP
         self.base_speed = ENEMY_BASE_SPEED
@@ -115,101 +293,64 @@ class Enemy(pygame.sprite.Sprite):
         self.can_shoot = False
         self.shoot_timer = 0
         self.shoot_cooldown = ENEMY_SHOOT_COOLDOWN
-        self.projectiles = []
-        
-        # Movement and AI
-        self.velocity = pygame.math.Vector2(0, 0)
-        self.target_player = None
-        
-        # Status effects
-        self.slow_timer = 0
-        self.slow_factor = 1.0
-        self.stun_timer = 0
-        self.is_stunned = False
+        self.bullets = self.horde.bullets  # World-level bullet store
         
         # Visual effects
-        self.flash_timer = 0
         self.flash_duration = 0
         
-    def update(self, dt, players):
-        """Update enemy state"""
-        # Update status effects
-        self.slow_timer = max(0, self.slow_timer - dt)
-        if self.slow_timer <= 0:
-            self.slow_factor = 1.0
-            
-        self.stun_timer = max(0, self.stun_timer - dt)
-        if self.stun_timer <= 0:
-            self.is_stunned = False
-            
-        self.flash_timer = max(0, self.flash_timer - dt)
+    @property
+    def is_stunned(self):
+        """Whether the enemy is currently stunned"""
+        return self.stun_timer > 0
+        
+    @property
+    def target_player(self):
+        """The player this enemy is chasing, picked by the horde update"""
+        if self._slot < 0:
+            return None
+        index = self.horde.target.item(self._slot)
+        if index < 0 or index >= len(self.horde.players):
+            return None
+        return self.horde.players[index]
+        
+    @property
+    def velocity(self):
+        """Current movement velocity"""
+        if self._slot < 0:
+            return pygame.math.Vector2(self._detached['velocity'])
+        return pygame.math.Vector2(self.horde.velocity[self._slot])
         
-        # Update projectiles
-        self.projectiles = [p for p in self.projectiles if not p.update(dt)]
+    def update(self, dt, players):
+        """Per-object behaviour hook; kinematics are advanced by EnemyHorde.update"""
+        pass
         
-        # Don't move if stunned
-        if self.is_stunned:
+    def move(self, dx, dy):
+        """Move the enemy by an offset outside of the horde's movement step"""
+        if self._slot < 0:
+            self.rect.move_ip(dx, dy)
             return
+        position = self.horde.position[self._slot]
+        position += (dx, dy)
+        self.rect.center = (round(position[0]), round(position[1]))
+        
+    def detach(self):
+        """Copy this enemy's horde fields out of the arrays, before its slot is released"""
+        self._detached = {name: getattr(self, name) for name in self.HORDE_FIELDS}
+        for name in ('position', 'previous_position', 'velocity'):
+            self._detached[name] = tuple(getattr(self.horde, name)[self._slot].tolist())
+        
+    def kill(self):
+        """Remove the enemy from all groups and release its horde slot"""
+        super().kill()
+        if self._slot >= 0:
+            self.horde.remove(self)
             
-        # Find closest living player
-        self.target_player = self.find_closest_player(players)
-        
-        if self.target_player:
-            self.move_towards_target(dt)
-            
-            # Handle shooting
-            if self.can_shoot:
-                self.shoot_timer += dt
-                if self.shoot_timer >= self.shoot_cooldown:
-                    self.shoot_at_player()
-                    self.shoot_timer = 0
-            
-    def find_closest_player(self, players):
-        """Find the closest living player"""
-        closest_player = None
-        closest_distance = float('inf')
-        
-        for player in players:
-            if player.is_alive:
-                distance = self.distance_to_player(player)
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_player = player
-                    
-        return closest_player
-        
     def distance_to_player(self, player):
         """Calculate distance to a player"""
         dx = self.rect.centerx - player.rect.centerx
         dy = self.rect.centery - player.rect.centery
         return math.sqrt(dx * dx + dy * dy)
         
-    def move_towards_target(self, dt):
-        """Move towards the target player"""
-        if not self.target_player:
-            return
-            
-        # Calculate direction to target
-        dx = self.target_player.rect.centerx - self.rect.centerx
-        dy = self.target_player.rect.centery - self.rect.centery
-        distance = math.sqrt(dx * dx + dy * dy)
-        
-        if distance > 0:
-            # Normalize direction
-            dx /= distance
-            dy /= distance
-            
-            # Apply speed and slow factor
-            effective_speed = self.speed * self.slow_factor
-            
-            # Update velocity
-            self.velocity.x = dx * effective_speed
-            self.velocity.y = dy * effective_speed
-            
-            # Update position
-            self.rect.x += self.velocity.x * dt
-            self.rect.y += self.velocity.y * dt
-            
     def take_damage(self, damage, player=None):
         """Take damage and return True if enemy dies"""
         self.hp -= damage
@@ -230,46 +371,43 @@ class Enemy(pygame.sprite.Sprite):
         
     def apply_stun(self, duration):
         """Apply stun effect"""
-        self.is_stunned = True
         self.stun_timer = duration
         
     def shoot_at_player(self):
         """Shoot a projectile at the target player"""
         if self.target_player:
-            projectile = Projectile(
+            self.bullets.fire(
                 self.rect.centerx, self.rect.centery,
                 self.target_player.rect.centerx, self.target_player.rect.centery,
                 damage=self.damage // 2  # Projectile damage is half of melee damage
             )
-            self.projectiles.append(projectile)
         
-    def draw(self, screen):
+    def get_draw_rect(self, camera=SCREEN_CAMERA, alpha=1.0):
+        """Get the screen rect, alpha of the way from the previous tick's position to the current one"""
+        if self._slot < 0:
+            previous, position = self._detached['previous_position'], self._detached['position']
+        else:
+            previous, position = self.horde.previous_position[self._slot], self.horde.position[self._slot]
+        return camera.rect(self.rect, interpolation_lag(previous, position, alpha))
+        
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
         """Draw the enemy"""
+        rect = self.get_draw_rect(camera, alpha)  # Screen position
+        
         # Flash white when taking damage
         if self.flash_timer > 0:
-            flash_surface = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-            flash_surface.fill(WHITE)
-            screen.blit(flash_surface, self.rect)
+            screen.blit(assets.get_image(self.archetype, 'flash'), rect)
         else:
-            screen.blit(self.image, self.rect)
-            
-        # Draw projectiles
-        for projectile in self.projectiles:
-            projectile.draw(screen)
+            screen.blit(self.image, rect)
             
         # Draw health bar
         if self.hp < self.max_hp:
             bar_width = ENEMY_SIZE
             bar_height = 4
-            bar_x = self.rect.x
-            bar_y = self.rect.y - 8
-            
-            # Background
-            pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+            bar_x = rect.x
+            bar_y = rect.y - 8
             
-            # Health
-            health_width = int((self.hp / self.max_hp) * bar_width)
-            pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+            draw_bar(screen, bar_x, bar_y, bar_width, bar_height, self.hp / self.max_hp, GREEN)
             
     def get_center(self):
         """Get enemy center position"""
@@ -282,8 +420,8 @@ class Enemy(pygame.sprite.Sprite):
 
 class FastEnemy(Enemy):
     """Fast but weak enemy"""
-    def __init__(self, x, y, wave_number=1):
-        super().__init__(x, y, wave_number)
+    def __init__(self, x, y, wave_number, horde):
+        super().__init__(x, y, wave_number, horde)
         
         # Modify stats for fast enemy
         self.speed = self.base_speed * 1.5
@@ -296,13 +434,14 @@ class FastEnemy(Enemy):
         self.shoot_cooldown = ENEMY_SHOOT_COOLDOWN * 0.8  # Faster shooting
         
         # Different color
-        self.image.fill(ORANGE)
+        self.archetype = 'fast_enemy'
+        self.image = assets.get_image(self.archetype)
         
 
 class TankEnemy(Enemy):
     """Violet semi-boss enemy with multi-directional shooting"""
-    def __init__(self, x, y, wave_number=1):
-        super().__init__(x, y, wave_number)
+    def __init__(self, x, y, wave_number, horde):
+        super().__init__(x, y, wave_number, horde)
         
         # Modify stats for tank enemy - now faster and tankier
         self.speed = self.base_speed * 1.2  # Increased from 0.6 to 1.2
@@ -318,8 +457,8 @@ class TankEnemy(Enemy):
         self.multi_shot_cooldown = 4.0  # Multi-directional shot every 4 seconds
         
         # Different color and size
-        self.image = pygame.Surface((ENEMY_SIZE + 12, ENEMY_SIZE + 12))  # Larger size
-        self.image.fill(PURPLE)
+        self.archetype = 'tank_enemy'  # Larger size
+        self.image = assets.get_image(self.archetype)
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
     
@@ -342,72 +481,19 @@ class TankEnemy(Enemy):
             target_x = self.rect.centerx + math.cos(angle) * 150
             target_y = self.rect.centery + math.sin(angle) * 150
             
-            projectile = Projectile(
+            self.bullets.fire(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED * 0.9,
                 damage=self.damage // 3,  # Lower damage since multiple projectiles
                 color=PURPLE  # Purple projectiles for tank enemies
             )
-            self.projectiles.append(projectile)
         
 
-class HomingProjectile(Projectile):
-    """Projectile that follows the closest player"""
-    def __init__(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=RED, homing_strength=0.3):
-        super().__init__(x, y, target_x, target_y, speed, damage, color)
-        self.homing_strength = homing_strength
-        self.target_player = None
-        
-    def update(self, dt, players=None):
-        """Update homing projectile with player tracking"""
-        if players:
-            # Find closest living player
-            closest_player = None
-            closest_distance = float('inf')
-            
-            for player in players:
-                if player.is_alive:
-                    distance = math.sqrt(
-                        (player.rect.centerx - self.rect.centerx) ** 2 +
-                        (player.rect.centery - self.rect.centery) ** 2
-                    )
-                    if distance < closest_distance:
-                        closest_distance = distance
-                        closest_player = player
-            
-            # Adjust velocity towards closest player
-            if closest_player:
-                dx = closest_player.rect.centerx - self.rect.centerx
-                dy = closest_player.rect.centery - self.rect.centery
-                distance = math.sqrt(dx * dx + dy * dy)
-                
-                if distance > 0:
-                    # Blend current velocity with homing direction
-                    target_vel_x = (dx / distance) * self.velocity.length()
-                    target_vel_y = (dy / distance) * self.velocity.length()
-                    
-                    self.velocity.x += (target_vel_x - self.velocity.x) * self.homing_strength * dt
-                    self.velocity.y += (target_vel_y - self.velocity.y) * self.homing_strength * dt
-        
-        # Call parent update
-        return super().update(dt)
-
-class LargeProjectile(Projectile):
-    """Larger, slower projectile with more damage"""
-    def __init__(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=20, color=RED):
-        super().__init__(x, y, target_x, target_y, speed * 0.7, damage, color)  # 30% slower
-        
-        # Make it larger
-        self.image = pygame.Surface((PROJECTILE_SIZE * 2, PROJECTILE_SIZE * 2))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-
 class Boss(Enemy):
     """Boss enemy with special abilities"""
-    def __init__(self, x, y, wave_number=1):
-        super().__init__(x, y, wave_number)
+    def __init__(self, x, y, wave_number, horde):
+        super().__init__(x, y, wave_number, horde)
         
         # Boss stats
         self.max_hp = BOSS_BASE_HP + (wave_number - 1) * 100
@@ -417,8 +503,8 @@ class Boss(Enemy):
         self.xp_reward = BOSS_XP_REWARD
         
         # Boss appearance
-        self.image = pygame.Surface((BOSS_SIZE, BOSS_SIZE))
-        self.image.fill(BLACK)
+        self.archetype = 'boss'
+        self.image = assets.get_image(self.archetype)
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         
@@ -478,8 +564,7 @@ class Boss(Enemy):
     def handle_charge_attack(self, dt):
         """Handle the charge attack movement"""
         # Move with charge velocity
-        self.rect.x += self.charge_velocity.x * dt
-        self.rect.y += self.charge_velocity.y * dt
+        self.move(self.charge_velocity.x * dt, self.charge_velocity.y * dt)
         
         # Stop charging after 1 second or if hit wall
         if (self.charge_timer >= 1.0 or 
@@ -491,6 +576,7 @@ class Boss(Enemy):
             
     def perform_special_attack(self, players):
         """Perform special area coverage attack"""
+        profiler.mark('boss special attack')
         # Spiral shot pattern
         num_projectiles = 8
         for i in range(num_projectiles):
@@ -498,73 +584,60 @@ class Boss(Enemy):
             target_x = self.rect.centerx + math.cos(angle) * 200
             target_y = self.rect.centery + math.sin(angle) * 200
             
-            projectile = Projectile(
+            self.bullets.fire(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED * 0.8,
                 damage=self.damage // 3,
                 color=YELLOW  # Boss projectiles are yellow
             )
-            self.projectiles.append(projectile)
             
         # Additional targeted shots at players
         for player in players:
             if player.is_alive:
-                projectile = Projectile(
+                self.bullets.fire(
                     self.rect.centerx, self.rect.centery,
                     player.rect.centerx, player.rect.centery,
                     speed=PROJECTILE_SPEED * 1.2,
                     damage=self.damage // 2,
                     color=YELLOW
                 )
-                self.projectiles.append(projectile)
             
-    def draw(self, screen):
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
         """Draw the boss with special effects"""
+        rect = self.get_draw_rect(camera, alpha)  # Screen position
+        
         # Draw boss with pulsing effect
         if self.is_charging:
             # Draw charging effect
-            charge_surface = pygame.Surface((BOSS_SIZE + 10, BOSS_SIZE + 10))
-            charge_surface.fill(YELLOW)
-            charge_rect = charge_surface.get_rect(center=self.rect.center)
+            charge_surface = assets.get_image('boss_charge')
+            charge_rect = charge_surface.get_rect(center=rect.center)
             screen.blit(charge_surface, charge_rect)
             
         # Flash white when taking damage (correct size for boss)
         if self.flash_timer > 0:
-            flash_surface = pygame.Surface((BOSS_SIZE, BOSS_SIZE))
-            flash_surface.fill(WHITE)
-            screen.blit(flash_surface, self.rect)
+            screen.blit(assets.get_image(self.archetype, 'flash'), rect)
         else:
-            screen.blit(self.image, self.rect)
+            screen.blit(self.image, rect)
             
-        # Draw projectiles
-        for projectile in self.projectiles:
-            projectile.draw(screen)
-        
         # Draw boss health bar (larger)
         bar_width = BOSS_SIZE
         bar_height = 8
-        bar_x = self.rect.x
-        bar_y = self.rect.y - 15
-        
-        # Background
-        pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+        bar_x = rect.x
+        bar_y = rect.y - 15
         
-        # Health
-        health_width = int((self.hp / self.max_hp) * bar_width)
-        pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        draw_bar(screen, bar_x, bar_y, bar_width, bar_height, self.hp / self.max_hp, GREEN)
         
         # Draw boss name
-        font = pygame.font.Font(None, 24)
-        text = font.render("BOSS", True, WHITE)
-        text_rect = text.get_rect(center=(self.rect.centerx, self.rect.y - 25))
-        screen.blit(text, text_rect)
+        text = render_text(get_font(24, names=None), "BOSS", WHITE)
+        text_rect = text.get_rect(center=(rect.centerx, rect.y - 25))
+        blit_overlay(screen, text, text_rect)
 
 
 class MajorBoss(Enemy):
     """Major boss that appears at the end of each wave with special projectiles"""
-    def __init__(self, x, y, wave_number=1):
-        super().__init__(x, y, wave_number)
+    def __init__(self, x, y, wave_number, horde):
+        super().__init__(x, y, wave_number, horde)
         
         # Major boss stats - stronger than regular boss
         self.max_hp = BOSS_BASE_HP * 1.5 + (wave_number - 1) * 150
@@ -574,8 +647,8 @@ class MajorBoss(Enemy):
         self.xp_reward = BOSS_XP_REWARD * 2
         
         # Major boss appearance - larger and different color
-        self.image = pygame.Surface((BOSS_SIZE + 20, BOSS_SIZE + 20))
-        self.image.fill((128, 0, 64))  # Dark purple
+        self.archetype = 'major_boss'  # Dark purple
+        self.image = assets.get_image(self.archetype)
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         
@@ -615,15 +688,13 @@ class MajorBoss(Enemy):
         """Launch homing projectiles at players"""
         for player in players:
             if player.is_alive:
-                projectile = HomingProjectile(
+                self.bullets.fire_homing(
                     self.rect.centerx, self.rect.centery,
                     player.rect.centerx, player.rect.centery,
                     speed=PROJECTILE_SPEED * 0.8,
                     damage=self.damage // 2,
-                    color=(255, 100, 100),  # Light red for homing
-                    homing_strength=0.5
+                    color=(255, 100, 100)  # Light red for homing
                 )
-                self.projectiles.append(projectile)
     
     def perform_large_shot_attack(self, players):
         """Launch large projectiles in multiple directions"""
@@ -633,64 +704,53 @@ class MajorBoss(Enemy):
             target_x = self.rect.centerx + math.cos(angle) * 200
             target_y = self.rect.centery + math.sin(angle) * 200
             
-            projectile = LargeProjectile(
+            self.bullets.fire_large(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED,
                 damage=self.damage // 2,
                 color=(255, 200, 0)  # Orange for large shots
             )
-            self.projectiles.append(projectile)
     
     def perform_spiral_attack(self):
         """Launch a spiral pattern of projectiles"""
+        profiler.mark('major boss spiral attack')
         num_projectiles = 12
         for i in range(num_projectiles):
             angle = (i / num_projectiles) * 2 * math.pi
             target_x = self.rect.centerx + math.cos(angle) * 180
             target_y = self.rect.centery + math.sin(angle) * 180
             
-            projectile = Projectile(
+            self.bullets.fire(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED * 0.9,
                 damage=self.damage // 4,
                 color=(200, 0, 200)  # Purple for spiral
             )
-            self.projectiles.append(projectile)
     
-    def draw(self, screen):
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
         """Draw the major boss with special effects"""
+        rect = self.get_draw_rect(camera, alpha)  # Screen position
+        
         # Flash white when taking damage (correct size for major boss)
         if self.flash_timer > 0:
-            flash_surface = pygame.Surface((BOSS_SIZE + 20, BOSS_SIZE + 20))
-            flash_surface.fill(WHITE)
-            screen.blit(flash_surface, self.rect)
+            screen.blit(assets.get_image(self.archetype, 'flash'), rect)
         else:
-            screen.blit(self.image, self.rect)
+            screen.blit(self.image, rect)
             
-        # Draw projectiles
-        for projectile in self.projectiles:
-            projectile.draw(screen)
-        
         # Draw major boss health bar (even larger)
         bar_width = BOSS_SIZE + 20
         bar_height = 10
-        bar_x = self.rect.x
-        bar_y = self.rect.y - 20
-        
-        # Background
-        pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
+        bar_x = rect.x
+        bar_y = rect.y - 20
         
-        # Health
-        health_width = int((self.hp / self.max_hp) * bar_width)
-        pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        draw_bar(screen, bar_x, bar_y, bar_width, bar_height, self.hp / self.max_hp, GREEN)
         
         # Major boss name
-        font = pygame.font.Font(None, 28)
-        text = font.render("MAJOR BOSS", True, WHITE)
-        text_rect = text.get_rect(center=(self.rect.centerx, self.rect.y - 35))
-        screen.blit(text, text_rect)
+        text = render_text(get_font(28, names=None), "MAJOR BOSS", WHITE)
+        text_rect = text.get_rect(center=(rect.centerx, rect.y - 35))
+        blit_overlay(screen, text, text_rect)
 
 
 class XPOrb(pygame.sprite.Sprite):
@@ -698,10 +758,10 @@ class XPOrb(pygame.sprite.Sprite):
     def __init__(self, x, y, xp_value):
         super().__init__()
         
-        self.image = pygame.Surface((8, 8))
-        self.image.fill(YELLOW)
+        self.image = assets.get_image('xp_orb')
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
+        self.previous_center = self.rect.center  # For interpolated drawing
         
         self.xp_value = xp_value
         self.lifetime = 10.0  # Disappear after 10 seconds
@@ -713,6 +773,7 @@ class XPOrb(pygame.sprite.Sprite):
         
     def update(self, dt, players):
         """Update XP orb"""
+        self.previous_center = self.rect.center
         self.lifetime -= dt
         
         # Find closest player for attraction
@@ -752,6 +813,7 @@ class XPOrb(pygame.sprite.Sprite):
         dy = self.rect.centery - player.rect.centery
         return math.sqrt(dx * dx + dy * dy)
         
-    def draw(self, screen):
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
         """Draw XP orb"""
-        screen.blit(self.image, self.rect)
\ No newline at end of file
+        lag = interpolation_lag(self.previous_center, self.rect.center, alpha)
+        screen.blit(self.image, camera.rect(self.rect, lag))
\ No newline at end of file
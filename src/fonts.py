@@ -0,0 +1,91 @@
+import pygame
+from collections import OrderedDict
+import settings
+from settings import *
+from src.profiler import profiler
+
+_fonts = {}
+
+def get_font(size, names=UI_FONT_NAMES):
+    """Get the shared font for a size, creating it on first use
+    
+    names is a comma separated list of system fonts; None selects pygame's
+    default font.
+    """
+    key = (names, size)
+    font = _fonts.get(key)
+    if font is None:
+        if names is None:
+            font = pygame.font.Font(None, size)
+        else:
+            # Try to use a system font that supports Chinese characters
+            try:
+                font = pygame.font.SysFont(names, size)
+            except:
+                # Fallback to default font
+                font = pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """Bounded least-recently-used cache of rendered text surfaces
+    
+    Surfaces are shared between callers and must not be modified.
+    """
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def render(self, font, text, color, antialias=True, alpha=255):
+        """Get the rendered surface for a string, rendering it on a miss
+        
+        Faded text is a separate entry per alpha level, quantized to
+        TEXT_ALPHA_LEVELS steps, so shared surfaces never change alpha.
+        """
+        if alpha < 255:
+            alpha = int(alpha) * (TEXT_ALPHA_LEVELS - 1) // 255 * 255 // (TEXT_ALPHA_LEVELS - 1)
+        key = (font, text, tuple(color), antialias, alpha, settings.CURRENT_LANGUAGE)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+            
+        self.misses += 1
+        profiler.count('surfaces')
+        if alpha < 255:
+            surface = self.render(font, text, color, antialias).copy()
+            surface.set_alpha(alpha)
+        else:
+            surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+        
+    def clear(self):
+        """Drop every cached surface and reset the counters"""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+        
+    def get_stats(self):
+        """Get cache size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.surfaces),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+text_cache = TextCache()
+
+def render_text(font, text, color, alpha=255):
+    """Render antialiased text through the shared cache"""
+    return text_cache.render(font, text, color, alpha=alpha)
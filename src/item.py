@@ -1,5 +1,7 @@
 import pygame
-import random
+from src.rng import rng
+from src.profiler import profiler
+from src.render import SCREEN_CAMERA
 import math
 from settings import *
 
@@ -22,9 +24,9 @@ class Item:
         self.visible = True
         
         # Physics
-        self.velocity_x = random.uniform(-2, 2)
-        self.velocity_y = random.uniform(-3, -1)
-        self.friction = 0.95
+        self.velocity_x = rng.items.uniform(-2, 2) * FPS  # Pixels per second
+        self.velocity_y = rng.items.uniform(-3, -1) * FPS
+        self.friction = 0.95 ** FPS  # Fraction of velocity kept after one second
         
         # Pickup properties
         self.pickup_range = ITEM_PICKUP_RANGE
@@ -51,72 +53,126 @@ class Item:
             return
             
         # Update physics
-        self.x += self.velocity_x
-        self.y += self.velocity_y
+        self.x += self.velocity_x * dt
+        self.y += self.velocity_y * dt
         
         # Apply friction
-        self.velocity_x *= self.friction
-        self.velocity_y *= self.friction
+        decay = self.friction ** dt
+        self.velocity_x *= decay
+        self.velocity_y *= decay
         
         # Bounce animation
         self.bounce_timer += dt * ITEM_BOUNCE_SPEED
         self.bounce_offset = math.sin(self.bounce_timer) * ITEM_BOUNCE_HEIGHT
         
-    def draw(self, screen, camera_x, camera_y):
+    def draw(self, screen, camera=SCREEN_CAMERA):
         """Draw the item"""
         if self.collected or not self.visible:
             return
             
         # Calculate screen position
-        screen_x = self.x - camera_x
-        screen_y = self.y - camera_y + self.bounce_offset
+        screen_x, screen_y = camera.point(self.x, self.y + self.bounce_offset)
         
         # Don't draw if off screen
         if (screen_x < -50 or screen_x > SCREEN_WIDTH + 50 or 
             screen_y < -50 or screen_y > SCREEN_HEIGHT + 50):
             return
             
+        # Draw the pre-rendered icon (shape and glow) in one blit
+        atlas, area = item_icons.get_icon(self.item_type)
+        half = area.width // 2
+        screen.blit(atlas, (int(screen_x) - half, int(screen_y) - half), area)
+        
+    def get_rect(self):
+        """Get collision rectangle"""
+        return pygame.Rect(self.x - self.size, self.y - self.size, 
+                          self.size * 2, self.size * 2)
+                          
+    def is_near_player(self, player_x, player_y):
+        """Check if item is within pickup range of player"""
+        distance = math.sqrt((self.x - player_x) ** 2 + (self.y - player_y) ** 2)
+        return distance <= self.pickup_range
+        
+    def collect(self):
+        """Mark item as collected"""
+        self.collected = True
+        
+class ItemIconAtlas:
+    """Every item's icon, including the glow of rare items, rendered once into one surface
+    
+    Icons depend only on the item type, so each is a cell of the atlas and
+    drawing an item is a single blit of its cell.
+    """
+    def __init__(self, size=12):
+        self.size = size
+        self.cell_size = (size + 4) * 2  # Room for the glow
+        self.surface = None
+        self.areas = {}  # item_type -> Rect of its cell
+        
+    def build(self):
+        """Render every entry in ITEMS into the atlas"""
+        cell = self.cell_size
+        self.surface = pygame.Surface((cell * len(ITEMS), cell), pygame.SRCALPHA)
+        profiler.count('surfaces')
+        self.areas = {}
+        for index, item_type in enumerate(ITEMS):
+            area = pygame.Rect(index * cell, 0, cell, cell)
+            self._draw_icon(self.surface, ITEMS[item_type], area.centerx, area.centery)
+            self.areas[item_type] = area
+            
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+            
+    def get_icon(self, item_type):
+        """Get the atlas surface and the cell of an item type"""
+        if self.surface is None:
+            self.build()
+        return self.surface, self.areas[item_type]
+        
+    def _draw_icon(self, surface, item_data, x, y):
+        """Draw an item's shape, centered at a position"""
+        size = self.size
+        color = item_data['color']
+        
         # Draw item based on rarity
-        rarity = self.item_data['rarity']
+        rarity = item_data['rarity']
         
         # Draw glow effect for rare items
         if rarity in ['rare', 'epic', 'legendary']:
-            glow_size = self.size + 4
-            glow_color = (*self.color, 100)  # Semi-transparent
-            glow_surface = pygame.Surface((glow_size * 2, glow_size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, glow_color, (glow_size, glow_size), glow_size)
-            screen.blit(glow_surface, (screen_x - glow_size, screen_y - glow_size))
+            glow_size = size + 4
+            glow_color = (*color, 100)  # Semi-transparent
+            pygame.draw.circle(surface, glow_color, (x, y), glow_size)
         
         # Draw main item
-        if self.item_data['type'] == 'consumable':
+        if item_data['type'] == 'consumable':
             # Draw as circle for consumables
-            pygame.draw.circle(screen, self.color, (int(screen_x), int(screen_y)), self.size)
-            pygame.draw.circle(screen, (255, 255, 255), (int(screen_x), int(screen_y)), self.size, 2)
-        elif self.item_data['type'] == 'permanent':
+            pygame.draw.circle(surface, color, (x, y), size)
+            pygame.draw.circle(surface, (255, 255, 255), (x, y), size, 2)
+        elif item_data['type'] == 'permanent':
             # Draw as diamond for permanent upgrades
             points = [
-                (screen_x, screen_y - self.size),
-                (screen_x + self.size, screen_y),
-                (screen_x, screen_y + self.size),
-                (screen_x - self.size, screen_y)
+                (x, y - size),
+                (x + size, y),
+                (x, y + size),
+                (x - size, y)
             ]
-            pygame.draw.polygon(screen, self.color, points)
-            pygame.draw.polygon(screen, (255, 255, 255), points, 2)
-        elif self.item_data['type'] == 'buff':
+            pygame.draw.polygon(surface, color, points)
+            pygame.draw.polygon(surface, (255, 255, 255), points, 2)
+        elif item_data['type'] == 'buff':
             # Draw as hexagon for buffs
             points = []
             for i in range(6):
                 angle = i * math.pi / 3
-                px = screen_x + self.size * math.cos(angle)
-                py = screen_y + self.size * math.sin(angle)
+                px = x + size * math.cos(angle)
+                py = y + size * math.sin(angle)
                 points.append((px, py))
-            pygame.draw.polygon(screen, self.color, points)
-            pygame.draw.polygon(screen, (255, 255, 255), points, 2)
+            pygame.draw.polygon(surface, color, points)
+            pygame.draw.polygon(surface, (255, 255, 255), points, 2)
         else:
             # Draw as star for special items
-            self._draw_star(screen, screen_x, screen_y, self.size)
+            self._draw_star(surface, color, x, y, size)
             
-    def _draw_star(self, screen, x, y, size):
+    def _draw_star(self, surface, color, x, y, size):
         """Draw a star shape"""
         points = []
         for i in range(10):
@@ -128,23 +184,12 @@ class Item:
             px = x + radius * math.cos(angle - math.pi / 2)
             py = y + radius * math.sin(angle - math.pi / 2)
             points.append((px, py))
-        pygame.draw.polygon(screen, self.color, points)
-        pygame.draw.polygon(screen, (255, 255, 255), points, 2)
-        
-    def get_rect(self):
-        """Get collision rectangle"""
-        return pygame.Rect(self.x - self.size, self.y - self.size, 
-                          self.size * 2, self.size * 2)
-                          
-    def is_near_player(self, player_x, player_y):
-        """Check if item is within pickup range of player"""
-        distance = math.sqrt((self.x - player_x) ** 2 + (self.y - player_y) ** 2)
-        return distance <= self.pickup_range
-        
-    def collect(self):
-        """Mark item as collected"""
-        self.collected = True
-        
+        pygame.draw.polygon(surface, color, points)
+        pygame.draw.polygon(surface, (255, 255, 255), points, 2)
+
+
+item_icons = ItemIconAtlas()
+
 class ItemManager:
     def __init__(self):
         self.items = []
@@ -169,7 +214,7 @@ class ItemManager:
             count = int(weight * 1000)
             weighted_items.extend([item_type] * count)
         
-        return random.choice(weighted_items) if weighted_items else 'health_potion'
+        return rng.items.choice(weighted_items) if weighted_items else 'health_potion'
         
     def drop_item_from_enemy(self, enemy_x, enemy_y, enemy_type='normal'):
         """Drop an item when an enemy dies"""
@@ -184,10 +229,10 @@ class ItemManager:
         else:
             drop_chance = base_drop_chance
             
-        if random.random() < drop_chance:
+        if rng.items.random() < drop_chance:
             # Add some randomness to drop position
-            drop_x = enemy_x + random.uniform(-20, 20)
-            drop_y = enemy_y + random.uniform(-20, 20)
+            drop_x = enemy_x + rng.items.uniform(-20, 20)
+            drop_y = enemy_y + rng.items.uniform(-20, 20)
             return self.add_item(drop_x, drop_y)
         return None
         
@@ -199,10 +244,10 @@ class ItemManager:
         for item in self.items:
             item.update(dt)
             
-    def draw(self, screen, camera_x, camera_y):
+    def draw(self, screen, camera=SCREEN_CAMERA):
         """Draw all items"""
         for item in self.items:
-            item.draw(screen, camera_x, camera_y)
+            item.draw(screen, camera)
             
     def check_player_pickup(self, player):
         """Check if player can pick up any items"""
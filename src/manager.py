@@ -1,9 +1,16 @@
 import pygame
-import random
 import math
+import numpy as np
 from settings import *
-from src.enemy import Enemy, FastEnemy, TankEnemy, Boss, MajorBoss, XPOrb, DamageNumber
+from src.enemy import Enemy, FastEnemy, TankEnemy, Boss, MajorBoss, XPOrb, DamageNumber, EnemyHorde
 from src.item import ItemManager
+from src.spatial import SpatialHash
+from src.projectiles import EnemyBulletStore
+from src.fonts import render_text
+from src.assets import assets
+from src.rng import rng
+from src.profiler import profiler
+from src.render import SCREEN_CAMERA
 
 class GameManager:
     def __init__(self):
@@ -11,17 +18,25 @@ class GameManager:
         self.wave_active = False
         self.wave_break_timer = 0
         self.enemies = pygame.sprite.Group()
+        self.enemy_bullets = EnemyBulletStore()  # Every enemy projectile in the world
+        self.horde = EnemyHorde(bullets=self.enemy_bullets)  # Array-backed enemy kinematics
         self.xp_orbs = pygame.sprite.Group()
         self.damage_numbers = []  # List of floating damage numbers
         self.item_manager = ItemManager()  # Item system
         
+        # Collision broadphase grid, rebuilt every tick
+        self.enemy_grid = SpatialHash()
+        
         # Screen shake effect
         self.screen_shake_timer = 0
         self.screen_shake_intensity = 0
         
         # Game state
+        self.seed = None  # Seed of the random streams for the current game
+        self.kills = 0  # Enemies killed this game
         self.game_state = GAME_STATE_MENU
         self.skill_selection_player = None
+        self.skill_options = []  # Skills offered to skill_selection_player
         
         # Wave management
         self.enemies_to_spawn = 0
@@ -32,15 +47,35 @@ class GameManager:
         self.boss_spawned = False
         self.major_boss_spawned = False
         
-    def start_new_game(self):
-        """Start a new game"""
+    def __getstate__(self):
+        """Leave the collision grid out of snapshots: update() rebuilds it before any query"""
+        state = self.__dict__.copy()
+        state['enemy_grid'] = SpatialHash(self.enemy_grid.cell_size)
+        return state
+        
+    def start_new_game(self, seed=None):
+        """Start a new game, reseeding the random streams (None picks a fresh seed)"""
+        rng.reseed(seed)
+        self.seed = rng.seed
+        
         self.current_wave = 1
+        self.kills = 0
         self.wave_active = False
         self.wave_break_timer = WAVE_BREAK_TIME
         self.enemies.empty()
+        self.horde.clear()
+        self.enemy_bullets.clear()
         self.xp_orbs.empty()
+        self.item_manager.clear_all_items()
+        self.damage_numbers = []
+        self.screen_shake_timer = 0
+        self.screen_shake_intensity = 0
         self.game_state = GAME_STATE_PLAYING
         self.skill_selection_player = None
+        self.skill_options = []
+        self.enemies_to_spawn = 0
+        self.spawn_timer = 0
+        self.spawn_interval = 1.0
         self.boss_spawned = False
         self.major_boss_spawned = False
         
@@ -53,16 +88,27 @@ class GameManager:
         self._players = players
             
         # Update enemies
-        self.enemies.update(dt, players)
-        
+        with profiler.phase('update.enemies'):
+            self.horde.update(dt, players)
+            self.enemy_grid.rebuild(self.enemies)
+            
+        # Update enemy projectiles
+        with profiler.phase('update.enemy_bullets'):
+            self.enemy_bullets.update(dt)
+            
         # Update XP orbs
-        self.xp_orbs.update(dt, players)
-        
+        with profiler.phase('update.orbs'):
+            self.xp_orbs.update(dt, players)
+            
         # Update items
-        self.item_manager.update(dt)
-        
+        with profiler.phase('update.items'):
+            self.item_manager.update(dt)
+            
         # Update damage numbers
-        self.damage_numbers = [dn for dn in self.damage_numbers if not dn.update(dt)]
+        with profiler.phase('update.damage_numbers'):
+            self.damage_numbers = [dn for dn in self.damage_numbers if not dn.update(dt)]
+        profiler.count('entities', self.horde.count + self.enemy_bullets.count + len(self.xp_orbs) +
+                       self.item_manager.get_item_count() + len(self.damage_numbers))
         
         # Update screen shake
         if self.screen_shake_timer > 0:
@@ -70,42 +116,46 @@ class GameManager:
             if self.screen_shake_timer <= 0:
                 self.screen_shake_intensity = 0
         
-        # Handle XP orb pickup
-        self.handle_xp_pickup(players)
-        
-        # Handle item pickup
-        self.handle_item_pickup(players)
-        
+        # Handle XP orb and item pickup
+        with profiler.phase('update.pickups'):
+            self.handle_xp_pickup(players)
+            self.handle_item_pickup(players)
+            
         # Handle enemy-player collisions
-        self.handle_enemy_collisions(players)
-        
+        with profiler.phase('update.collisions'):
+            self.handle_enemy_collisions(players)
+            
         # Handle player attacks
-        self.handle_player_attacks(players)
-        
+        with profiler.phase('update.attacks'):
+            self.handle_player_attacks(players)
+            
         # Handle enemy projectile collisions
-        self.handle_enemy_projectile_collisions(players)
-        
+        with profiler.phase('update.projectile_hits'):
+            self.handle_enemy_projectile_collisions(players)
+            
         # Check if all players are dead
         if all(not player.is_alive for player in players):
             self.game_state = GAME_STATE_GAME_OVER
             return
             
         # Wave management
-        if not self.wave_active:
-            # Wave break period
-            self.wave_break_timer -= dt
-            if self.wave_break_timer <= 0:
-                self.start_wave()
-        else:
-            # Wave is active
-            self.update_wave_spawning(dt)
-            
-            # Check if wave is complete
-            if len(self.enemies) == 0 and self.enemies_to_spawn == 0:
-                self.complete_wave()
+        with profiler.phase('update.spawning'):
+            if not self.wave_active:
+                # Wave break period
+                self.wave_break_timer -= dt
+                if self.wave_break_timer <= 0:
+                    self.start_wave()
+            else:
+                # Wave is active
+                self.update_wave_spawning(dt)
+                
+                # Check if wave is complete
+                if len(self.enemies) == 0 and self.enemies_to_spawn == 0:
+                    self.complete_wave()
                 
     def start_wave(self):
         """Start a new wave"""
+        profiler.mark('wave start', value=self.current_wave)
         self.wave_active = True
         self.boss_spawned = False
         self.major_boss_spawned = False
@@ -143,48 +193,50 @@ class GameManager:
     def spawn_enemy(self):
         """Spawn a single enemy"""
         # Choose spawn position (from edges of screen)
-        edge = random.randint(0, 3)  # 0=top, 1=right, 2=bottom, 3=left
+        edge = rng.spawn.randint(0, 3)  # 0=top, 1=right, 2=bottom, 3=left
         
         if edge == 0:  # top
-            x = random.randint(0, SCREEN_WIDTH)
+            x = rng.spawn.randint(0, SCREEN_WIDTH)
             y = -ENEMY_SIZE
         elif edge == 1:  # right
             x = SCREEN_WIDTH + ENEMY_SIZE
-            y = random.randint(0, SCREEN_HEIGHT)
+            y = rng.spawn.randint(0, SCREEN_HEIGHT)
         elif edge == 2:  # bottom
-            x = random.randint(0, SCREEN_WIDTH)
+            x = rng.spawn.randint(0, SCREEN_WIDTH)
             y = SCREEN_HEIGHT + ENEMY_SIZE
         else:  # left
             x = -ENEMY_SIZE
-            y = random.randint(0, SCREEN_HEIGHT)
+            y = rng.spawn.randint(0, SCREEN_HEIGHT)
             
         # Determine enemy type
         if (self.current_wave % BOSS_WAVE_INTERVAL == 0 and 
             self.enemies_to_spawn == 0 and not self.boss_spawned):
             # Spawn boss
-            enemy = Boss(SCREEN_WIDTH // 2, -BOSS_SIZE, self.current_wave)
+            enemy = Boss(SCREEN_WIDTH // 2, -BOSS_SIZE, self.current_wave, self.horde)
             self.boss_spawned = True
+            profiler.mark('boss spawn', value=self.current_wave)
         elif (self.enemies_to_spawn == 1 and not self.major_boss_spawned):
             # Spawn major boss as the last enemy of every wave
-            enemy = MajorBoss(SCREEN_WIDTH // 2, -BOSS_SIZE - 20, self.current_wave)
+            enemy = MajorBoss(SCREEN_WIDTH // 2, -BOSS_SIZE - 20, self.current_wave, self.horde)
             self.major_boss_spawned = True
+            profiler.mark('major boss spawn', value=self.current_wave)
         else:
             # Spawn regular enemy with increased chance of TankEnemy towards end of wave
             remaining_ratio = self.enemies_to_spawn / max(1, self.enemies_per_wave)
             if remaining_ratio < 0.3:  # Last 30% of wave - more tank enemies
-                enemy_type = random.choices(
+                enemy_type = rng.spawn.choices(
                     [Enemy, FastEnemy, TankEnemy],
                     weights=[40, 20, 40],  # 40% normal, 20% fast, 40% tank
                     k=1
                 )[0]
             else:
-                enemy_type = random.choices(
+                enemy_type = rng.spawn.choices(
                     [Enemy, FastEnemy, TankEnemy],
                     weights=[60, 25, 15],  # 60% normal, 25% fast, 15% tank
                     k=1
                 )[0]
             
-            enemy = enemy_type(x, y, self.current_wave)
+            enemy = enemy_type(x, y, self.current_wave, self.horde)
             
         self.enemies.add(enemy)
         
@@ -234,9 +286,12 @@ class GameManager:
                 
     def handle_enemy_collisions(self, players):
         """Handle collisions between enemies and players"""
-        for enemy in self.enemies:
-            for player in players:
-                if player.is_alive and enemy.collides_with_player(player):
+        for player in players:
+            if not player.is_alive:
+                continue
+                
+            for enemy in self.enemy_grid.query(player.rect):
+                if enemy.alive() and enemy.collides_with_player(player):
                     # Player takes damage
                     if player.take_damage(enemy.damage):
                         # Knockback effect (optional)
@@ -251,14 +306,14 @@ class GameManager:
             stats = player.get_effective_stats()
             
             # Check collision with enemies
-            for enemy in self.enemies:
-                if player.hitbox.colliderect(enemy.rect):
+            for enemy in self.enemy_grid.query_rect(player.hitbox):
+                if enemy.alive():
                     # Calculate damage
-                    damage = stats['damage']
+                    damage = stats.damage
                     
                     # Apply critical hit
-                    if random.random() < stats['crit_chance']:
-                        damage *= stats['crit_multiplier']
+                    if rng.combat.random() < stats.crit_chance:
+                        damage *= stats.crit_multiplier
                         
                     # Apply execute skill
                     if ('execute' in player.skills and 
@@ -273,7 +328,7 @@ class GameManager:
                         enemy.apply_slow(0.5, 2.0)
                         
                     if 'stun_strike' in player.skills:
-                        if random.random() < 0.2:
+                        if rng.combat.random() < 0.2:
                             enemy.apply_stun(1.5)
                     
                     # Apply elemental effects
@@ -291,13 +346,13 @@ class GameManager:
                         self.apply_chain_lightning(enemy, damage, effect['chain_range'], effect['chain_count'])
                     
                     # Spell echo effect
-                    if 'spell_echo' in player.skills and random.random() < SKILLS['spell_echo']['effect']['echo_chance']:
+                    if 'spell_echo' in player.skills and rng.combat.random() < SKILLS['spell_echo']['effect']['echo_chance']:
                         # Repeat the attack after a short delay
                         player.spell_echo_last_attack = {'damage': damage, 'target': enemy, 'delay': 0.2}
                             
                     # Life steal
-                    if stats['life_steal'] > 0:
-                        heal_amount = damage * stats['life_steal']
+                    if stats.life_steal > 0:
+                        heal_amount = damage * stats.life_steal
                         player.heal(heal_amount)
                         
                     # Handle enemy death
@@ -319,30 +374,33 @@ class GameManager:
             
         stats = player.get_effective_stats()
         
-        # Convert sprite group to list for safe iteration
-        projectile_list = list(player.projectiles.sprites())
+        projectiles = player.projectiles
         
-        for projectile in projectile_list:
-            # Sort enemies by distance from projectile to hit the closest one first
+        for slot in projectiles.active_slots().tolist():
+            projectile_rect = projectiles.get_rect(slot)
+            
+            # Only enemies overlapping the projectile, and not hit by it yet, can be hit; closest first
+            hit_enemies = projectiles.hit_enemies[slot]
             enemies_with_distance = []
-            for enemy in self.enemies:
-                dx = projectile.rect.centerx - enemy.rect.centerx
-                dy = projectile.rect.centery - enemy.rect.centery
-                distance = math.sqrt(dx*dx + dy*dy)
-                enemies_with_distance.append((distance, enemy))
+            for enemy in self.enemy_grid.query_rect(projectile_rect):
+                if not enemy.alive() or (hit_enemies and enemy in hit_enemies):
+                    continue
+                dx = projectile_rect.centerx - enemy.rect.centerx
+                dy = projectile_rect.centery - enemy.rect.centery
+                enemies_with_distance.append((dx * dx + dy * dy, enemy))
             
             # Sort by distance (closest first)
             enemies_with_distance.sort(key=lambda x: x[0])
             
             for distance, enemy in enemies_with_distance:
-                if projectile.rect.colliderect(enemy.rect):
+                if enemy.alive():
                     # Use projectile's damage directly (already calculated in player.py)
-                    damage = projectile.damage
+                    damage = projectiles.damage.item(slot)
                     
                     # Apply critical hit
-                    is_crit = random.random() < stats['crit_chance']
+                    is_crit = rng.combat.random() < stats.crit_chance
                     if is_crit:
-                        damage *= stats['crit_multiplier']
+                        damage *= stats.crit_multiplier
                         
                     # Deal damage
                     enemy_died = enemy.take_damage(damage, player)
@@ -357,41 +415,41 @@ class GameManager:
                     self.add_screen_shake(shake_intensity, 0.1)
                     
                     # Life steal
-                    if stats['life_steal'] > 0:
-                        heal_amount = damage * stats['life_steal']
+                    if stats.life_steal > 0:
+                        heal_amount = damage * stats.life_steal
                         player.heal(heal_amount)
                         
                     # Handle enemy death
                     if enemy_died:
                         self.handle_enemy_death(enemy, player)
                         
+                    # Explosive projectiles damage everything around the impact
+                    if projectiles.explosive_radius[slot] > 0:
+                        self.apply_explosion(
+                            projectile_rect.centerx, projectile_rect.centery,
+                            projectiles.explosive_radius.item(slot),
+                            projectiles.explosive_damage.item(slot),
+                            player, exclude=enemy
+                        )
+                        
                     # Handle piercing
-                    if hasattr(projectile, 'piercing') and projectile.piercing > 0:
-                        projectile.piercing -= 1
+                    if projectiles.piercing[slot] > 0:
+                        projectiles.piercing[slot] -= 1
+                        if hit_enemies is None:
+                            hit_enemies = projectiles.hit_enemies[slot] = set()
+                        hit_enemies.add(enemy)
                     else:
-                        # Remove projectile from sprite group and kill it
-                        player.projectiles.remove(projectile)
-                        projectile.kill()
+                        projectiles.release([slot])
                         break
-            
-
                         
     def handle_enemy_projectile_collisions(self, players):
         """Handle collisions between enemy projectiles and players"""
-        for enemy in self.enemies:
-            for projectile in enemy.projectiles[:]:
-                for player in players:
-                    if player.is_alive and projectile.collides_with_player(player):
-                        # Player takes damage from projectile
-                        if player.take_damage(projectile.damage):
-                            pass  # Player took damage
-                        
-                        # Remove projectile after hit
-                        enemy.projectiles.remove(projectile)
-                        break
+        self.enemy_bullets.collide_players(players)
                         
     def handle_enemy_death(self, enemy, killer_player):
         """Handle enemy death and XP drop"""
+        profiler.count('kills')
+        
         # Create XP orb
         xp_orb = XPOrb(enemy.rect.centerx, enemy.rect.centery, enemy.xp_reward)
         self.xp_orbs.add(xp_orb)
@@ -407,11 +465,20 @@ class GameManager:
         
         # Remove enemy
         enemy.kill()
+        self.kills += 1
         
     def trigger_skill_selection(self, player):
         """Trigger skill selection for a player"""
         # Don't change game state - keep playing
         self.skill_selection_player = player
+        self.skill_options = self.roll_skill_options(player)
+        
+    def roll_skill_options(self, player):
+        """Pick up to three skills to offer a player, from the skills random stream"""
+        available_skills = player.get_available_skills()
+        if len(available_skills) >= 3:
+            return rng.skills.sample(available_skills, 3)
+        return available_skills[:]
         
     def complete_skill_selection(self, selection_data):
         """Complete skill selection"""
@@ -442,20 +509,46 @@ class GameManager:
         return max(0, self.wave_break_timer)
         
     def draw_debug_info(self, screen, font):
-        """Draw debug information"""
+        """Draw debug information: the world's counts, then frame timings while profiling
+        
+        Phases over the frame budget at p99 are drawn red; the graph below
+        shows recent frame times against the budget line.
+        """
+        screen.fill((0, 0, 0, 160))
         debug_info = [
-            f"Wave: {self.current_wave}",
-            f"Enemies: {len(self.enemies)}",
-            f"To Spawn: {self.enemies_to_spawn}",
-            f"XP Orbs: {len(self.xp_orbs)}",
-            f"State: {self.game_state}"
+            f"Wave: {self.current_wave}  Enemies: {len(self.enemies)}  To Spawn: {self.enemies_to_spawn}",
+            f"Bullets: {self.enemy_bullets.count}  XP Orbs: {len(self.xp_orbs)}  State: {self.game_state}"
         ]
         
-        y = SCREEN_HEIGHT - 150
+        y = 4
         for info in debug_info:
-            text_surface = font.render(info, True, WHITE)
-            screen.blit(text_surface, (10, y))
+            text_surface = render_text(font, info, WHITE)
+            screen.blit(text_surface, (4, y))
             y += 20
+        if not profiler.enabled:
+            return
+            
+        budget = PROFILER_FRAME_BUDGET * 1000
+        columns = (4, 200, 250, 300, 350)
+        rows = profiler.report()
+        phase_count = len(profiler.phases)
+        lines = [(('phase (ms)', 'p50', 'p95', 'p99', 'max'), LIGHT_GRAY)]
+        for name, *values in rows[:phase_count]:
+            color = RED if name != 'frame' and values[2] > budget else WHITE
+            lines.append(((name,) + tuple(f"{value:.2f}" for value in values), color))
+        lines.append((('counter', 'p50', 'p95', 'p99', 'max'), LIGHT_GRAY))
+        for name, *values in rows[phase_count:]:
+            lines.append(((name,) + tuple(f"{value:.0f}" for value in values), WHITE))
+            
+        y += 8
+        for cells, color in lines:
+            for x, cell in zip(columns, cells):
+                screen.blit(render_text(font, cell, color), (x, y))
+            y += 17
+            
+        graph = pygame.Rect(4, y + 6, screen.get_width() - 8, min(60, screen.get_height() - y - 10))
+        if graph.height > 0:
+            profiler.draw_graph(screen, graph, budget)
             
     def add_screen_shake(self, intensity, duration):
         """Add screen shake effect"""
@@ -467,9 +560,9 @@ class GameManager:
         if self.screen_shake_timer <= 0:
             return (0, 0)
         
-        import random
-        shake_x = random.randint(-int(self.screen_shake_intensity), int(self.screen_shake_intensity))
-        shake_y = random.randint(-int(self.screen_shake_intensity), int(self.screen_shake_intensity))
+        # Called per rendered frame, so it draws from the cosmetic stream
+        shake_x = rng.effects.randint(-int(self.screen_shake_intensity), int(self.screen_shake_intensity))
+        shake_y = rng.effects.randint(-int(self.screen_shake_intensity), int(self.screen_shake_intensity))
         return (shake_x, shake_y)
     
     def reset_game(self):
@@ -499,8 +592,11 @@ class GameManager:
             nearest_enemy = None
             nearest_distance = float('inf')
             
-            for enemy in self.enemies:
-                if enemy in chained_enemies or not enemy.is_alive:
+            candidates = self.enemy_grid.query_radius(
+                current_enemy.rect.centerx, current_enemy.rect.centery, chain_range
+            )
+            for enemy in candidates:
+                if enemy in chained_enemies or not enemy.alive():
                     continue
                     
                 distance = math.sqrt(
@@ -521,63 +617,125 @@ class GameManager:
                 break
 
 
+    def apply_explosion(self, x, y, radius, damage, player, exclude=None):
+        """Damage every enemy within the blast radius of an explosion"""
+        if damage <= 0:
+            return
+            
+        for enemy in self.enemy_grid.query_radius(x, y, radius):
+            if enemy is exclude or not enemy.alive():
+                continue
+                
+            enemy_died = enemy.take_damage(damage, player)
+            self.damage_numbers.append(DamageNumber(enemy.rect.centerx, enemy.rect.top - 10, damage, ORANGE))
+            
+            if enemy_died:
+                self.handle_enemy_death(enemy, player)
+
+
 class ParticleSystem:
-    """Simple particle system for visual effects"""
-    def __init__(self):
-        self.particles = []
+    """Particle system for visual effects
+    
+    Particles live in fixed-capacity arrays kept dense with swap-remove, so
+    [:count] of each array is the live set and movement, gravity and fading
+    are a few vectorized operations. Drawing blits prebuilt sprites, one per
+    color, size and fade level.
+    """
+    FIELDS = ('position', 'velocity', 'lifetime', 'color', 'size')
+    
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity)
+        self.color = np.zeros(capacity, dtype=np.int32)  # Index into self.colors
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.colors = []
+        self.color_indices = {}
+        self.sprites = {}  # (color index, size, alpha level) -> Surface
+        self.rng = rng.numpy('particles')
+        
+    def __len__(self):
+        return self.count
+        
+    def emit(self, x, y, count, speed, lifetime, color, min_size, max_size):
+        """Add a burst of particles with random velocities and sizes"""
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+            
+        color_index = self.color_indices.get(color)
+        if color_index is None:
+            color_index = len(self.colors)
+            self.colors.append(color)
+            self.color_indices[color] = color_index
+            
+        start = self.count
+        end = start + count
+        self.position[start:end] = (x, y)
+        self.velocity[start:end] = self.rng.uniform(-speed, speed, (count, 2))
+        self.lifetime[start:end] = lifetime
+        self.color[start:end] = color_index
+        self.size[start:end] = self.rng.integers(min_size, max_size + 1, count)
+        self.count = end
         
     def add_blood_particles(self, x, y):
         """Add blood particles at position"""
-        for _ in range(BLOOD_PARTICLE_COUNT):
-            particle = {
-                'x': x,
-                'y': y,
-                'vx': random.uniform(-50, 50),
-                'vy': random.uniform(-50, 50),
-                'lifetime': PARTICLE_LIFETIME,
-                'color': RED,
-                'size': random.randint(2, 4)
-            }
-            self.particles.append(particle)
-            
+        self.emit(x, y, BLOOD_PARTICLE_COUNT, 50, PARTICLE_LIFETIME, RED, 2, 4)
+        
     def add_xp_particles(self, x, y):
         """Add XP particles at position"""
-        for _ in range(3):
-            particle = {
-                'x': x,
-                'y': y,
-                'vx': random.uniform(-30, 30),
-                'vy': random.uniform(-30, 30),
-                'lifetime': PARTICLE_LIFETIME * 0.5,
-                'color': YELLOW,
-                'size': random.randint(1, 3)
-            }
-            self.particles.append(particle)
-            
+        self.emit(x, y, 3, 30, PARTICLE_LIFETIME * 0.5, YELLOW, 1, 3)
+        
     def update(self, dt):
         """Update all particles"""
-        for particle in self.particles[:]:
-            particle['x'] += particle['vx'] * dt
-            particle['y'] += particle['vy'] * dt
-            particle['lifetime'] -= dt
+        n = self.count
+        if n == 0:
+            return
             
-            # Apply gravity
-            particle['vy'] += 100 * dt
+        self.position[:n] += self.velocity[:n] * dt
+        self.lifetime[:n] -= dt
+        
+        # Apply gravity
+        self.velocity[:n, 1] += PARTICLE_GRAVITY * dt
+        
+        # Swap-remove expired particles: live particles from the tail fill the holes
+        expired = self.lifetime[:n] <= 0
+        if expired.any():
+            live = n - int(expired.sum())
+            holes = np.flatnonzero(expired[:live])
+            fillers = live + np.flatnonzero(~expired[live:])
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[holes] = array[fillers]
+            self.count = live
             
-            if particle['lifetime'] <= 0:
-                self.particles.remove(particle)
-                
-    def draw(self, screen):
+    def get_sprite(self, color_index, size, level):
+        """Get the shared sprite for a color, size and fade level"""
+        key = (color_index, size, level)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            alpha = level * 255 // (PARTICLE_ALPHA_LEVELS - 1)
+            sprite = assets.get_solid((size * 2, size * 2), self.colors[color_index], alpha)
+            self.sprites[key] = sprite
+        return sprite
+        
+    def draw(self, screen, camera=SCREEN_CAMERA):
         """Draw all particles"""
-        for particle in self.particles:
-            alpha = int(255 * (particle['lifetime'] / PARTICLE_LIFETIME))
-            color = (*particle['color'][:3], alpha)
-            
-            # Create surface with alpha
-            particle_surface = pygame.Surface((particle['size'] * 2, particle['size'] * 2))
-            particle_surface.set_alpha(alpha)
-            particle_surface.fill(particle['color'])
-            
-            screen.blit(particle_surface, 
-                       (int(particle['x'] - particle['size']), 
-                        int(particle['y'] - particle['size'])))
\ No newline at end of file
+        n = self.count
+        if n == 0:
+            return
+            
+        # Fade with remaining lifetime, quantized to the prebuilt alpha levels
+        alpha = np.clip(self.lifetime[:n] / PARTICLE_LIFETIME, 0.0, 1.0)
+        levels = np.rint(alpha * (PARTICLE_ALPHA_LEVELS - 1)).astype(int).tolist()
+        size = self.size[:n]
+        top_left = camera.points(self.position[:n] - size[:, np.newaxis]).astype(int).tolist()
+        
+        get_sprite = self.get_sprite
+        screen.blits([
+            (get_sprite(color_index, particle_size, level), corner)
+            for color_index, particle_size, level, corner
+            in zip(self.color[:n].tolist(), size.tolist(), levels, top_left)
+        ], doreturn=False)
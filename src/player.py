@@ -2,50 +2,11 @@ import pygame
 import math
 import random
 from settings import *
-
-class PlayerProjectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=WHITE):
-        super().__init__()
-        self.image = pygame.Surface((PROJECTILE_SIZE, PROJECTILE_SIZE))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        
-        # Calculate direction
-        dx = target_x - x
-        dy = target_y - y
-        distance = math.sqrt(dx * dx + dy * dy)
-        
-        if distance > 0:
-            self.velocity_x = (dx / distance) * speed
-            self.velocity_y = (dy / distance) * speed
-        else:
-            self.velocity_x = 0
-            self.velocity_y = 0
-            
-        self.damage = damage
-        self.lifetime = 3.0  # seconds
-        
-    def update(self, dt):
-        """Update projectile position"""
-        self.rect.x += self.velocity_x * dt
-        self.rect.y += self.velocity_y * dt
-        
-        self.lifetime -= dt
-        
-        # Remove if off screen or lifetime expired
-        if (self.rect.right < 0 or self.rect.left > SCREEN_WIDTH or 
-            self.rect.bottom < 0 or self.rect.top > SCREEN_HEIGHT or
-            self.lifetime <= 0):
-            self.kill()
-            
-    def draw(self, screen):
-        """Draw the projectile"""
-        screen.blit(self.image, self.rect)
-        
-    def check_collision(self, target_rect):
-        """Check collision with target"""
-        return self.rect.colliderect(target_rect)
+from src.projectiles import PlayerProjectileStore
+from src.stats import PlayerStats, SkillTotals
+from src.assets import assets
+from src.render import SCREEN_CAMERA, interpolation_lag
+from src.profiler import profiler
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, player_id, x, y):
@@ -53,14 +14,16 @@ class Player(pygame.sprite.Sprite):
         self.player_id = player_id
         
         # Create player sprite
-        self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
-        self.image.fill(BLUE if player_id == 1 else RED)
+        self.archetype = 'player1' if player_id == 1 else 'player2'
+        self.image = assets.get_image(self.archetype)
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
+        self.previous_center = self.rect.center  # For interpolated drawing
         
         # Player stats
         self.max_hp = PLAYER_STARTING_HP
         self.hp = self.max_hp
+        self.damage_taken = 0  # Total HP lost to damage this game
         self.max_mana = 100  # Add mana system for item effects
         self.mana = self.max_mana
         self.level = PLAYER_STARTING_LEVEL
@@ -73,6 +36,11 @@ class Player(pygame.sprite.Sprite):
         # Skills
         self.skills = {}
         
+        # Effective stats cache (see get_effective_stats)
+        self.skill_totals = None
+        self.stats = None
+        self.stats_key = None
+        
         # Combat
         self.attack_cooldown = 0
         self.attack_duration = 0
@@ -127,7 +95,7 @@ class Player(pygame.sprite.Sprite):
         self.has_phoenix_feather = False
         
         # Shooting system
-        self.projectiles = pygame.sprite.Group()
+        self.projectiles = PlayerProjectileStore()
         self.shoot_cooldown = 0
         self.can_shoot = True  # Basic shooting ability available from start
         
@@ -143,77 +111,58 @@ class Player(pygame.sprite.Sprite):
         return BASE_XP_REQUIREMENT + (tier * XP_TIER_INCREASE)
     
     def get_effective_stats(self):
-        """Calculate current stats with skill bonuses"""
-        stats = {
-            'speed': self.base_speed,
-            'damage': self.base_damage,
-            'max_hp': self.max_hp,
-            'attack_range': PLAYER_HITBOX_SIZE,
-            'crit_chance': 0,
-            'crit_multiplier': 1.0,
-            'damage_reduction': 0,
-            'life_steal': 0,
-            'shoot_speed': 1.0,
-            'projectile_speed': 1.0,
-            'projectile_damage': 1.0,
-            'piercing': 0,
-            'multi_shot': 1,
-            'explosive_damage': 0
-        }
-        
+        """Get current stats with skill bonuses and buffs applied
+        
+        The stats are cached and only recomputed when the skills, base stats,
+        active buffs or (with berserker rage) HP change. The returned record is
+        shared, so callers must not modify it.
+        """
+        if self.skill_totals is None:
+            self.skill_totals = SkillTotals(self.skills)
+            
+        berserker_hp = self.hp if 'berserker_rage' in self.skills else None
+        key = (self.base_speed, self.base_damage, self.max_hp, berserker_hp,
+               self.damage_boost_multiplier if self.damage_boost_timer > 0 else 1.0,
+               self.speed_boost_multiplier if self.speed_boost_timer > 0 else 1.0,
+               self.crit_boost_amount if self.crit_boost_timer > 0 else 0)
+        if key != self.stats_key:
+            self.stats = self.compute_stats()
+            self.stats_key = key
+        return self.stats
+        
+    def compute_stats(self):
+        """Calculate current stats from the compiled skill modifiers"""
         # Apply berserker rage damage bonus
+        damage = self.base_damage
         if 'berserker_rage' in self.skills:
             hp_ratio = self.hp / self.max_hp
             damage_bonus = (1 - hp_ratio) * SKILLS['berserker_rage']['effect']['max_damage_bonus']
-            stats['damage'] *= (1 + damage_bonus)
-        
+            damage *= (1 + damage_bonus)
+            
         # Apply skill effects
-        for skill_name, skill_level in self.skills.items():
-            if skill_name in SKILLS:
-                skill_data = SKILLS[skill_name]
-                effect = skill_data['effect']
-                
-                if 'speed_multiplier' in effect:
-                    stats['speed'] *= (1 + effect['speed_multiplier'] * skill_level)
-                if 'damage_multiplier' in effect:
-                    stats['damage'] *= (1 + effect['damage_multiplier'] * skill_level)
-                if 'max_hp_bonus' in effect:
-                    stats['max_hp'] += effect['max_hp_bonus'] * skill_level
-                if 'range_multiplier' in effect:
-                    stats['attack_range'] *= (1 + effect['range_multiplier'] * skill_level)
-                if 'crit_chance' in effect:
-                    stats['crit_chance'] += effect['crit_chance']
-                if 'crit_multiplier' in effect:
-                    stats['crit_multiplier'] = effect['crit_multiplier']
-                if 'damage_reduction' in effect:
-                    stats['damage_reduction'] += effect['damage_reduction'] * skill_level
-                if 'life_steal' in effect:
-                    stats['life_steal'] += effect['life_steal'] * skill_level
-                    
-            # Handle shooting skills
-            if skill_name == 'ranged_combat':
-                self.can_shoot = True
-            elif skill_name == 'rapid_fire':
-                stats['shoot_speed'] *= (1 + 0.3 * skill_level)  # 30% faster per level
-            elif skill_name == 'piercing_shot':
-                stats['piercing'] += skill_level
-            elif skill_name == 'explosive_shot':
-                stats['explosive_damage'] += 20 * skill_level
-            elif skill_name == 'multi_shot':
-                stats['multi_shot'] += skill_level
-        
+        totals = self.skill_totals
+        stats = PlayerStats(speed=self.base_speed, damage=damage, max_hp=self.max_hp)
+        for stat in PlayerStats.__slots__:
+            setattr(stats, stat, totals.apply(stat, getattr(stats, stat)))
+            
         # Apply item buff effects
         if self.damage_boost_timer > 0:
-            stats['damage'] *= self.damage_boost_multiplier
+            stats.damage *= self.damage_boost_multiplier
         if self.speed_boost_timer > 0:
-            stats['speed'] *= self.speed_boost_multiplier
+            stats.speed *= self.speed_boost_multiplier
         if self.crit_boost_timer > 0:
-            stats['crit_chance'] += self.crit_boost_amount
-                    
+            stats.crit_chance += self.crit_boost_amount
+            
         return stats
-    
-    def update(self, dt, keys_pressed, other_player=None, enemies=None):
-        """Update player state"""
+        
+    def invalidate_stats(self):
+        """Force the stats to be recomputed, e.g. after editing skills directly"""
+        self.skill_totals = None
+        self.stats_key = None
+        
+    def update(self, dt, action, other_player=None, enemies=None):
+        """Update player state, following this tick's controller action"""
+        self.previous_center = self.rect.center
         if not self.is_alive:
             return
             
@@ -298,7 +247,7 @@ class Player(pygame.sprite.Sprite):
             self.regen_timer = 0
             
         # Handle movement
-        self.handle_movement(dt, keys_pressed)
+        self.handle_movement(dt, action)
         
         # Handle attack
         if self.attack_duration > 0:
@@ -309,7 +258,7 @@ class Player(pygame.sprite.Sprite):
                 self.hitbox = None
                 
         # Handle attack input with long press detection
-        attack_key_current = keys_pressed[self.controls['attack']]
+        attack_key_current = action.attack
         
         if attack_key_current:
             if not self.attack_key_pressed:
@@ -339,23 +288,14 @@ class Player(pygame.sprite.Sprite):
             self.attack_key_pressed = False
             self.attack_key_hold_time = 0
             
-    def handle_movement(self, dt, keys_pressed):
+    def handle_movement(self, dt, action):
         """Handle player movement"""
         stats = self.get_effective_stats()
-        speed = stats['speed']
+        speed = stats.speed
         
         # Get movement input
-        dx = 0
-        dy = 0
-        
-        if keys_pressed[self.controls['left']]:
-            dx -= 1
-        if keys_pressed[self.controls['right']]:
-            dx += 1
-        if keys_pressed[self.controls['up']]:
-            dy -= 1
-        if keys_pressed[self.controls['down']]:
-            dy += 1
+        dx = action.move_x
+        dy = action.move_y
             
         # Normalize diagonal movement
         if dx != 0 and dy != 0:
@@ -387,7 +327,7 @@ class Player(pygame.sprite.Sprite):
         
         # Create hitbox
         stats = self.get_effective_stats()
-        hitbox_size = int(stats['attack_range'])
+        hitbox_size = int(stats.attack_range)
         
         self.hitbox = pygame.Rect(
             self.rect.centerx - hitbox_size // 2,
@@ -439,12 +379,12 @@ class Player(pygame.sprite.Sprite):
                 dx, dy = 0, -1
             
         # Create projectile(s)
-        projectile_speed = PROJECTILE_SPEED * stats['shoot_speed']
-        projectile_damage = stats['damage'] // 2  # Shooting does less damage than melee
+        projectile_speed = PROJECTILE_SPEED * stats.shoot_speed
+        projectile_damage = stats.damage // 2  # Shooting does less damage than melee
         
         # Handle multi-shot
-        if 'multi_shot' in stats and stats['multi_shot'] > 1:
-            num_shots = stats['multi_shot']
+        if stats.multi_shot > 1:
+            num_shots = stats.multi_shot
             angle_spread = 0.3  # Radians
             
             for i in range(num_shots):
@@ -462,31 +402,27 @@ class Player(pygame.sprite.Sprite):
                 target_x = self.rect.centerx + shot_dx * 1000
                 target_y = self.rect.centery + shot_dy * 1000
                 
-                projectile = PlayerProjectile(
+                self.fire_projectile(
                     self.rect.centerx, self.rect.centery,
                     target_x, target_y,
                     speed=projectile_speed,
                     damage=projectile_damage
                 )
-                
-                self.projectiles.add(projectile)
         else:
             # Single shot
             target_x = self.rect.centerx + dx * 1000
             target_y = self.rect.centery + dy * 1000
             
-            projectile = PlayerProjectile(
+            self.fire_projectile(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=projectile_speed,
                 damage=projectile_damage
             )
             
-            self.projectiles.add(projectile)
-            
         # Set cooldown
         base_cooldown = 0.3  # Base shooting cooldown
-        self.shoot_cooldown = base_cooldown / stats['shoot_speed']
+        self.shoot_cooldown = base_cooldown / stats.shoot_speed
         
     def use_special_weapon(self):
         """Use special weapon based on unlocked skills"""
@@ -519,16 +455,17 @@ class Player(pygame.sprite.Sprite):
         target_y = self.rect.centery + dy * 1000
         
         # Create a larger, slower projectile that explodes
-        projectile = PlayerProjectile(
+        stats = self.get_effective_stats()
+        self.fire_projectile(
             self.rect.centerx, self.rect.centery,
             target_x, target_y,
             speed=PROJECTILE_SPEED * 0.7,
-            damage=self.get_effective_stats()['damage'],
-            color=(255, 165, 0)  # Orange color for explosive
+            damage=stats.damage,
+            color=(255, 165, 0),  # Orange color for explosive
+            explosive_radius=SKILLS['explosive_shot']['effect']['explosion_radius'],
+            explosive_damage=stats.explosive_damage
         )
         
-        self.projectiles.add(projectile)
-        
     def create_piercing_shot(self):
         """Create a piercing projectile"""
         if hasattr(self, 'last_direction') and self.last_direction:
@@ -540,16 +477,16 @@ class Player(pygame.sprite.Sprite):
         target_y = self.rect.centery + dy * 1000
         
         # Create a fast piercing projectile
-        projectile = PlayerProjectile(
+        stats = self.get_effective_stats()
+        self.fire_projectile(
             self.rect.centerx, self.rect.centery,
             target_x, target_y,
             speed=PROJECTILE_SPEED * 1.5,
-            damage=self.get_effective_stats()['damage'] // 2,
-            color=(0, 255, 255)  # Cyan color for piercing
+            damage=stats.damage // 2,
+            color=(0, 255, 255),  # Cyan color for piercing
+            piercing=stats.piercing
         )
         
-        self.projectiles.add(projectile)
-        
     def create_multi_shot_burst(self):
         """Create a burst of projectiles in multiple directions"""
         num_shots = 8
@@ -561,16 +498,14 @@ class Player(pygame.sprite.Sprite):
             target_x = self.rect.centerx + dx * 1000
             target_y = self.rect.centery + dy * 1000
             
-            projectile = PlayerProjectile(
+            self.fire_projectile(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED * 0.8,
-                damage=self.get_effective_stats()['damage'] // 3,
+                damage=self.get_effective_stats().damage // 3,
                 color=(255, 255, 0)  # Yellow color for multi-shot
             )
             
-            self.projectiles.add(projectile)
-            
     def create_rapid_fire_burst(self):
         """Create a rapid fire burst"""
         if hasattr(self, 'last_direction') and self.last_direction:
@@ -583,14 +518,25 @@ class Player(pygame.sprite.Sprite):
             target_x = self.rect.centerx + dx * 1000
             target_y = self.rect.centery + dy * 1000
             
-            projectile = PlayerProjectile(
+            self.fire_projectile(
                 self.rect.centerx, self.rect.centery,
                 target_x, target_y,
                 speed=PROJECTILE_SPEED * 1.2,
-                damage=self.get_effective_stats()['damage'] // 3
+                damage=self.get_effective_stats().damage // 3
             )
-            
-            self.projectiles.add(projectile)
+    
+    def fire_projectile(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=WHITE,
+                        piercing=0, explosive_radius=0, explosive_damage=0):
+        """Fire a projectile; only the piercing and explosive special shots pass those fields"""
+        self.projectiles.fire(
+            x, y, target_x, target_y,
+            speed=speed,
+            damage=damage,
+            color=color,
+            piercing=piercing,
+            explosive_radius=explosive_radius,
+            explosive_damage=explosive_damage
+        )
     
     def shoot(self, target_x, target_y):
         """Legacy method for compatibility - now redirects to shoot_forward"""
@@ -606,7 +552,7 @@ class Player(pygame.sprite.Sprite):
             return False
             
         stats = self.get_effective_stats()
-        actual_damage = damage * (1 - stats['damage_reduction'])
+        actual_damage = damage * (1 - stats.damage_reduction)
         
         # Handle mana shield
         if 'mana_shield' in self.skills and self.mana > 0:
@@ -620,6 +566,7 @@ class Player(pygame.sprite.Sprite):
             
             actual_damage = hp_damage + max(0, mana_damage - absorbed_damage)
         
+        self.damage_taken += min(actual_damage, max(self.hp, 0))  # Overkill isn't HP lost
         self.hp -= actual_damage
         self.invincible_time = PLAYER_INVINCIBILITY_TIME
         
@@ -683,6 +630,7 @@ class Player(pygame.sprite.Sprite):
         
         # Increase level
         self.level += 1
+        profiler.mark('level up', self.archetype, self.level)
         
         # Calculate new XP requirement
         self.xp_to_next_level = self.calculate_xp_requirement()
@@ -691,25 +639,29 @@ class Player(pygame.sprite.Sprite):
         # Full heal on level up
         old_max_hp = self.max_hp
         stats = self.get_effective_stats()
-        self.max_hp = stats['max_hp']
+        self.max_hp = stats.max_hp
         self.hp = self.max_hp
         
         return True  # Signal that skill selection should be triggered
         
     def add_skill(self, skill_name):
         """Add or upgrade a skill"""
+        profiler.mark('skill pick', skill_name, self.player_id)
         if skill_name in SKILLS:
             if skill_name in self.skills:
                 if self.skills[skill_name] < SKILLS[skill_name]['max_level']:
                     self.skills[skill_name] += 1
             else:
                 self.skills[skill_name] = 1
+            self.invalidate_stats()
                 
             # Apply immediate effects
-            if skill_name == 'vitality':
+            if skill_name == 'ranged_combat':
+                self.can_shoot = True
+            elif skill_name == 'vitality':
                 stats = self.get_effective_stats()
                 old_max_hp = self.max_hp
-                self.max_hp = stats['max_hp']
+                self.max_hp = stats.max_hp
                 self.hp += (self.max_hp - old_max_hp)  # Increase current HP too
                 
     def get_available_skills(self):
@@ -726,18 +678,21 @@ class Player(pygame.sprite.Sprite):
         self.xp += amount
         # Note: Level up logic would be handled elsewhere if needed
         
-    def draw(self, screen):
-        """Draw the player"""
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
+        """Draw the player, alpha of the way from the previous tick's position to the current one"""
+        lag = interpolation_lag(self.previous_center, self.rect.center, alpha)
+        rect = camera.rect(self.rect, lag)  # Screen position
+        
         if self.visible:
-            screen.blit(self.image, self.rect)
+            screen.blit(self.image, rect)
             
         # Draw attack hitbox for debugging
         if self.is_attacking and self.hitbox:
-            pygame.draw.rect(screen, YELLOW, self.hitbox, 2)
+            screen.blit(assets.get_frame(self.hitbox.size, YELLOW, 2),
+                        camera.rect(self.hitbox, lag))
             
         # Draw projectiles
-        for projectile in self.projectiles:
-            projectile.draw(screen)
+        self.projectiles.draw(screen, camera, alpha)
             
     def get_center(self):
         """Get player center position"""
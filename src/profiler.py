@@ -0,0 +1,388 @@
+import json
+import logging
+import math
+import os
+import sys
+import time
+import numpy as np
+import pygame
+from settings import *
+
+logger = logging.getLogger(__name__)
+
+# Percentiles shown for every phase and counter
+PERCENTILES = (50, 95, 99)
+
+# Trace event kinds
+SPAN = 0  # A timed phase
+INSTANT = 1  # A game event marker
+COUNTER = 2  # A counter's total for one frame
+
+
+class _Phase:
+    """Context manager adding the time spent inside it to a phase of the current frame"""
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        profiler = self.profiler
+        times = profiler.phase_times
+        times[self.name] = times.get(self.name, 0.0) + duration
+        if profiler.tracing:
+            profiler.trace.add(SPAN, self.name, profiler.frame_number, self.start, duration)
+        return False
+
+
+class _NoPhase:
+    """Stand-in for _Phase while profiling is off"""
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class RollingSeries:
+    """The last `window` per-frame values of one metric, in a ring buffer"""
+    def __init__(self, window):
+        self.values = np.zeros(window)
+        self.index = 0
+        self.filled = 0
+        
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        self.filled = min(self.filled + 1, len(self.values))
+        
+    def recent(self):
+        """Values oldest first"""
+        if self.filled < len(self.values):
+            return self.values[:self.filled]
+        return np.roll(self.values, -self.index)
+        
+    def percentiles(self, percentiles=PERCENTILES):
+        """The given percentiles and the maximum of the window"""
+        values = self.values[:self.filled]
+        if not len(values):
+            return [0.0] * (len(percentiles) + 1)
+        return np.percentile(values, percentiles).tolist() + [float(values.max())]
+
+
+class TraceBuffer:
+    """Ring buffer of trace events in preallocated arrays, saved in the Chrome trace-event format
+    
+    Names and details are interned, so recording an event writes a few
+    array cells and allocates nothing. Once full, each event overwrites the
+    oldest. Open saved traces in ui.perfetto.dev or chrome://tracing.
+    """
+    def __init__(self, capacity=PROFILER_TRACE_CAPACITY):
+        self.capacity = capacity
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.name = np.zeros(capacity, dtype=np.int32)  # Index in strings
+        self.detail = np.zeros(capacity, dtype=np.int32)  # Index in strings, -1 for none
+        self.frame = np.zeros(capacity, dtype=np.int64)
+        self.start = np.zeros(capacity)  # perf_counter() seconds
+        self.value = np.zeros(capacity)  # Seconds for spans, the total for counters
+        self.strings = []
+        self.string_ids = {}
+        self.next = 0  # Slot of the next event
+        self.size = 0
+        self.origin = time.perf_counter()  # Time 0 of the trace
+        
+    def __len__(self):
+        return self.size
+        
+    def intern(self, text):
+        """Get the index of a string, adding it on first use"""
+        index = self.string_ids.get(text)
+        if index is None:
+            index = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+        
+    def add(self, kind, name, frame, start, value=0.0, detail=None):
+        """Record one event"""
+        slot = self.next
+        self.kind[slot] = kind
+        self.name[slot] = self.intern(name)
+        self.detail[slot] = -1 if detail is None else self.intern(detail)
+        self.frame[slot] = frame
+        self.start[slot] = start
+        self.value[slot] = value
+        self.next = (slot + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+            
+    def events(self):
+        """The recorded events, oldest first, as trace-event dicts"""
+        order = (np.arange(self.size) + self.next - self.size) % self.capacity
+        strings = self.strings
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': 1, 'args': {'name': 'Dual Fury'}},
+                  {'ph': 'M', 'name': 'thread_name', 'pid': 1, 'tid': 1, 'args': {'name': 'game loop'}}]
+        columns = (self.kind[order], self.name[order], self.detail[order], self.frame[order],
+                   (self.start[order] - self.origin) * 1e6, self.value[order])
+        for kind, name, detail, frame, timestamp, value in zip(*(column.tolist() for column in columns)):
+            name = strings[name]
+            if kind == SPAN:
+                events.append({'ph': 'X', 'name': name, 'cat': name.split('.', 1)[0], 'pid': 1, 'tid': 1,
+                               'ts': timestamp, 'dur': value * 1e6, 'args': {'frame': frame}})
+            elif kind == INSTANT:
+                args = {'frame': frame}
+                if detail >= 0:
+                    args['detail'] = strings[detail]
+                if not math.isnan(value):
+                    args['value'] = int(value) if value.is_integer() else value
+                events.append({'ph': 'i', 's': 'g', 'name': name, 'cat': 'game', 'pid': 1, 'tid': 1,
+                               'ts': timestamp, 'args': args})
+            else:
+                events.append({'ph': 'C', 'name': name, 'pid': 1, 'ts': timestamp, 'args': {name: value}})
+        return events
+        
+    def dump(self, path):
+        """Write the events to a trace-event JSON file"""
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, file)
+
+
+class Profiler:
+    """Per-frame phase timings and counters, with rolling percentiles over recent frames
+    
+    Code wraps each phase in `with profiler.phase(name):` and counts work
+    with profiler.count(name, amount). A phase entered several times in
+    a frame (one simulation phase over several ticks) adds up.
+    end_frame() files the frame into the rolling window. Everything is a
+    no-op while the profiler is disabled.
+    
+    While tracing, every phase is also recorded as a span, counters as
+    per-frame counter events and mark() calls as instant markers, into a
+    TraceBuffer. A frame slower than spike_time saves the trace on its own,
+    at most once per PROFILER_SPIKE_COOLDOWN.
+    """
+    def __init__(self, window=PROFILER_WINDOW):
+        self.enabled = False  # Keeping percentiles for the overlay
+        self.tracing = False
+        self.active = False  # Enabled or tracing; phases, counters and frames cost nothing otherwise
+        self.window = window
+        self.phase_times = {}  # Phase -> seconds spent this frame
+        self.counters = {}  # Counter -> amount this frame
+        self.phases = {}  # Phase -> RollingSeries of milliseconds, in first-seen order
+        self.counts = {}  # Counter -> RollingSeries
+        self.frames = 0
+        self.frame_start = None
+        self.last_frame = {}  # Phase -> milliseconds in the last finished frame, 'frame' included
+        
+        self.trace = None
+        self.frame_number = 0  # Frames since the start, never reset, to label trace events
+        self.spike_time = PROFILER_SPIKE_TIME
+        self.last_dump = None  # perf_counter() of the last automatic trace dump
+        
+    def enable(self, enabled=True):
+        """Turn profiling on or off, starting from an empty window"""
+        self.enabled = enabled
+        self.active = self.enabled or self.tracing
+        self.reset()
+        
+    def start_trace(self, capacity=PROFILER_TRACE_CAPACITY):
+        """Start recording trace events, into a fresh buffer"""
+        self.trace = TraceBuffer(capacity)
+        self.tracing = True
+        self.active = True
+        
+    def stop_trace(self):
+        """Stop recording trace events; the buffer can still be dumped"""
+        self.tracing = False
+        self.active = self.enabled
+        
+    def dump_trace(self, path=None, reason='manual'):
+        """Save the trace buffer; returns the path, by default a new file in PROFILER_TRACE_DIRECTORY"""
+        if path is None:
+            os.makedirs(PROFILER_TRACE_DIRECTORY, exist_ok=True)
+            path = os.path.join(PROFILER_TRACE_DIRECTORY, time.strftime('%Y%m%d-%H%M%S') + f'-{reason}.json')
+        self.trace.dump(path)
+        return path
+        
+    def reset(self):
+        """Forget every frame measured so far"""
+        self.phase_times = {}
+        self.counters = {}
+        self.phases = {}
+        self.counts = {}
+        self.frames = 0
+        self.frame_start = None
+        self.last_frame = {}
+        
+    def phase(self, name):
+        """Time a phase of the current frame: use as `with profiler.phase(name):`"""
+        if not self.active:
+            return _NO_PHASE
+        return _Phase(self, name)
+        
+    def count(self, name, amount=1):
+        """Add to a counter of the current frame"""
+        if self.active:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            
+    def mark(self, name, detail=None, value=None):
+        """Record a game event as an instant marker in the trace
+        
+        detail is an optional fixed string, such as a skill name; like the
+        name it is interned for the life of the trace, so never format one
+        per call. value is an optional number, such as the wave.
+        """
+        if self.tracing:
+            self.trace.add(INSTANT, name, self.frame_number, time.perf_counter(),
+                           math.nan if value is None else value, detail)
+            
+    def end_frame(self):
+        """File the current frame's phases and counters, plus the whole frame's time, and start the next"""
+        if not self.active:
+            return
+        now = time.perf_counter()
+        frame_time = None
+        if self.frame_start is not None:
+            frame_time = self.phase_times['frame'] = now - self.frame_start
+            if self.tracing:
+                self.trace.add(SPAN, 'frame', self.frame_number, self.frame_start, frame_time)
+        if self.tracing:
+            for name in self.counts.keys() | self.counters.keys():
+                self.trace.add(COUNTER, name, self.frame_number, now, self.counters.get(name, 0))
+                
+        self.last_frame = {name: seconds * 1000 for name, seconds in self.phase_times.items()}
+        for name, milliseconds in self.last_frame.items():
+            self.series(self.phases, name).add(milliseconds)
+        for name in self.phases.keys() - self.last_frame.keys():
+            self.phases[name].add(0.0)
+        for name, amount in self.counters.items():
+            self.series(self.counts, name).add(amount)
+        for name in self.counts.keys() - self.counters.keys():
+            self.counts[name].add(0)
+            
+        self.phase_times = {}
+        self.counters = {}
+        self.frames += 1
+        self.frame_number += 1
+        
+        if (self.tracing and self.spike_time and frame_time is not None and frame_time > self.spike_time and
+                (self.last_dump is None or now - self.last_dump > PROFILER_SPIKE_COOLDOWN)):
+            path = self.dump_trace(reason='spike')
+            logger.warning("Frame %d took %.1f ms, trace saved to %s", self.frame_number - 1, frame_time * 1000, path)
+            self.last_dump = now
+            now = time.perf_counter()  # Saving isn't part of the next frame
+        self.frame_start = now
+        
+    def series(self, table, name):
+        """Get a metric's RollingSeries, creating it on first use"""
+        series = table.get(name)
+        if series is None:
+            series = table[name] = RollingSeries(self.window)
+        return series
+        
+    def report(self):
+        """Rows of (name, p50, p95, p99, max) for every phase (milliseconds), then every counter"""
+        rows = [(name, *series.percentiles()) for name, series in self.phases.items()]
+        rows.extend((name, *series.percentiles()) for name, series in self.counts.items())
+        return rows
+        
+    def worst_phase(self, percentile=PERCENTILES[-1]):
+        """The innermost phase with the highest given percentile; None before any frame
+        
+        Phases named 'parent.child' are inside 'parent', so only phases
+        without children of their own (and not the whole frame) compete.
+        """
+        parents = {name.rsplit('.', 1)[0] for name in self.phases if '.' in name}
+        worst = None
+        worst_time = -1.0
+        for name, series in self.phases.items():
+            if name != 'frame' and name not in parents and series.filled:
+                value = np.percentile(series.values[:series.filled], percentile)
+                if value > worst_time:
+                    worst, worst_time = name, value
+        return worst
+        
+    def draw_graph(self, surface, rect, budget=PROFILER_FRAME_BUDGET * 1000):
+        """Plot recent frame times as bars, scaled so the budget line sits halfway up"""
+        series = self.phases.get('frame')
+        if series is None or not series.filled:
+            return
+        values = series.recent()[-rect.width // 2:]
+        scale = rect.height / (2 * budget)
+        for index, milliseconds in enumerate(values.tolist()):
+            height = min(rect.height, max(1, int(milliseconds * scale)))
+            color = RED if milliseconds > budget else GREEN
+            pygame.draw.rect(surface, color, (rect.left + index * 2, rect.bottom - height, 1, height))
+        pygame.draw.line(surface, YELLOW, (rect.left, rect.bottom - rect.height // 2),
+                         (rect.right - 1, rect.bottom - rect.height // 2))
+
+
+profiler = Profiler()
+
+
+def format_report(rows, counter_start):
+    """Lay out report() rows as a text table; rows from counter_start on are counters"""
+    lines = [f"{'phase (ms)':<24}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+    for index, (name, *values) in enumerate(rows):
+        if index == counter_start:
+            lines.append(f"{'counter':<24}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+        if index < counter_start:
+            lines.append(f"{name:<24}" + ''.join(f"{value:8.2f}" for value in values))
+        else:
+            lines.append(f"{name:<24}" + ''.join(f"{value:8.0f}" for value in values))
+    return lines
+
+
+def main(argv=None):
+    """Profile the simulation phases of a headless bot game from a chosen wave"""
+    import argparse
+    from src.simulation import HeadlessGame
+    from src.controllers import CONTROLLERS
+    # Run as a script this module is __main__, so get the instance the game code reports to
+    from src.profiler import profiler, format_report
+    
+    parser = argparse.ArgumentParser(description="Per-phase timings of a headless Dual Fury game")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--wave', type=int, default=1, help="start at this wave")
+    parser.add_argument('--ticks', type=int, default=1800)
+    parser.add_argument('--bot', choices=sorted(CONTROLLERS), default='kite')
+    parser.add_argument('--trace', metavar='PATH', help="also record a timeline trace and save it here")
+    args = parser.parse_args(argv)
+    
+    game = HeadlessGame(controllers=[CONTROLLERS[args.bot](), CONTROLLERS[args.bot]()])
+    game.reset(args.seed)
+    game.game_manager.current_wave = args.wave  # Starts after the first wave break
+    
+    profiler.window = args.ticks
+    profiler.enable()
+    if args.trace:
+        profiler.start_trace()
+        profiler.spike_time = None  # One trace of the whole run
+    ticks = 0
+    while ticks < args.ticks:
+        running = game.step()
+        profiler.end_frame()
+        ticks += 1
+        if not running:
+            break
+            
+    rows = profiler.report()
+    print(f"{ticks} ticks from wave {args.wave} to {game.game_manager.current_wave}, one tick per frame")
+    for line in format_report(rows, len(profiler.phases)):
+        print(line)
+    print(f"Slowest phase at p{PERCENTILES[-1]}: {profiler.worst_phase()}")
+    if args.trace:
+        profiler.dump_trace(args.trace)
+        print(f"Trace of the last {len(profiler.trace)} events saved to {args.trace}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
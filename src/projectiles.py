@@ -0,0 +1,322 @@
+import pygame
+import math
+import numpy as np
+from settings import *
+from src.assets import assets
+from src.profiler import profiler
+from src.render import SCREEN_CAMERA
+
+# Enemy bullet kinds
+BULLET_STRAIGHT = 0
+BULLET_LARGE = 1
+BULLET_HOMING = 2
+
+
+def aim(x, y, target_x, target_y, speed):
+    """Get the velocity that moves from (x, y) towards a target at the given speed"""
+    dx = target_x - x
+    dy = target_y - y
+    distance = math.sqrt(dx * dx + dy * dy)
+    
+    if distance > 0:
+        return (dx / distance) * speed, (dy / distance) * speed
+    return 0.0, 0.0
+
+
+class ProjectilePool:
+    """Preallocated projectile arrays with free-list slot reuse
+    
+    Slots are flagged in `active`; released slots go on a free list and are
+    handed out again by spawn(), so steady-state firing allocates nothing.
+    """
+    def __init__(self, capacity):
+        self.count = 0
+        self.capacity = 0
+        self.free_slots = []
+        self.colors = []  # Palette shared by all slots
+        self.color_indices = {}
+        self.surfaces = {}  # (color index, size) -> Surface
+        self._allocate(capacity)
+        
+    def _fields(self):
+        """Names of the per-slot arrays"""
+        return ('active', 'position', 'previous_position', 'velocity', 'size', 'damage', 'lifetime', 'color')
+        
+    def _allocate(self, capacity):
+        """(Re)allocate the arrays, keeping existing slots"""
+        old_capacity = self.capacity
+        old = {name: getattr(self, name) for name in self._fields()} if old_capacity else {}
+        
+        self.capacity = capacity
+        self.active = np.zeros(capacity, dtype=bool)
+        self.position = np.zeros((capacity, 2))  # Center, in pixels
+        self.previous_position = np.zeros((capacity, 2))  # Center before the last move, for interpolation
+        self.velocity = np.zeros((capacity, 2))
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.damage = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self._allocate_extra(capacity)
+        
+        for name, array in old.items():
+            getattr(self, name)[:old_capacity] = array
+            
+        # New slots go on the free list, lowest index handed out first
+        self.free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+        
+    def _allocate_extra(self, capacity):
+        """Allocate subclass-specific arrays"""
+        pass
+        
+    def _color_index(self, color):
+        """Get the palette index of a color"""
+        index = self.color_indices.get(color)
+        if index is None:
+            index = len(self.colors)
+            self.colors.append(color)
+            self.color_indices[color] = index
+        return index
+        
+    def spawn(self, x, y, velocity_x, velocity_y, size, damage, lifetime, color):
+        """Claim a free slot for a new projectile; returns the slot index"""
+        if not self.free_slots:
+            self._allocate(self.capacity * 2)
+            
+        slot = self.free_slots.pop()
+        self.active[slot] = True
+        self.position[slot] = (x, y)
+        self.previous_position[slot] = (x, y)
+        self.velocity[slot] = (velocity_x, velocity_y)
+        self.size[slot] = size
+        self.damage[slot] = damage
+        self.lifetime[slot] = lifetime
+        self.color[slot] = self._color_index(tuple(color))
+        self.count += 1
+        return slot
+        
+    def release(self, slots):
+        """Return slots to the free list"""
+        slots = [slot for slot in slots if self.active[slot]]
+        if not slots:
+            return
+        self.active[slots] = False
+        self.free_slots.extend(slots)
+        self.count -= len(slots)
+        
+    def clear(self):
+        """Release every projectile"""
+        self.active[:] = False
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.count = 0
+        
+    def __getstate__(self):
+        """Pickle the arrays up to the last live slot, as raw bytes, so snapshots stay small and quick to take"""
+        state = self.__dict__.copy()
+        used = self.active_slots()[-1] + 1 if self.count else 0
+        for name in self._fields():
+            state[name] = state[name][:used].tobytes()
+        return state
+        
+    def __setstate__(self, state):
+        used = {name: state.pop(name) for name in self._fields()}
+        self.__dict__.update(state)
+        capacity, free_slots = self.capacity, self.free_slots
+        self.capacity = 0
+        self.free_slots = []
+        self._allocate(capacity)
+        self.free_slots = free_slots
+        for name, data in used.items():
+            array = getattr(self, name)
+            values = np.frombuffer(data, dtype=array.dtype)
+            array.reshape(-1)[:len(values)] = values
+            
+    def active_slots(self):
+        """Get the indices of the live projectiles"""
+        return np.flatnonzero(self.active)
+        
+    def __len__(self):
+        return self.count
+        
+    def move(self, dt):
+        """Move every live projectile and release the expired or off-screen ones"""
+        if self.count == 0:
+            return
+            
+        slots = self.active_slots()
+        previous_position = self.position[slots]
+        self.previous_position[slots] = previous_position
+        position = previous_position + self.velocity[slots] * dt
+        self.position[slots] = position
+        lifetime = self.lifetime[slots] - dt
+        self.lifetime[slots] = lifetime
+        
+        # Remove if out of bounds or lifetime expired
+        half = self.size[slots] / 2
+        expired = ((position[:, 0] + half < 0) | (position[:, 0] - half > SCREEN_WIDTH) |
+                   (position[:, 1] + half < 0) | (position[:, 1] - half > SCREEN_HEIGHT) |
+                   (lifetime <= 0))
+        if expired.any():
+            self.release(slots[expired].tolist())
+            
+    def overlapping(self, rect, slots=None):
+        """Get the live slots whose square overlaps a rect"""
+        if slots is None:
+            slots = self.active_slots()
+        profiler.count('collision_pairs', len(slots))
+        position = self.position[slots]
+        half = self.size[slots] / 2
+        hit = ((position[:, 0] - half < rect.right) & (position[:, 0] + half > rect.left) &
+               (position[:, 1] - half < rect.bottom) & (position[:, 1] + half > rect.top))
+        return slots[hit]
+        
+    def get_rect(self, slot):
+        """Get the collision rect of a slot"""
+        size = int(self.size[slot])
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = (round(self.position[slot, 0]), round(self.position[slot, 1]))
+        return rect
+        
+    def get_surface(self, color_index, size):
+        """Get the shared image for a palette color and size"""
+        key = (color_index, size)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = assets.get_solid((size, size), self.colors[color_index])
+            self.surfaces[key] = surface
+        return surface
+        
+    def draw(self, screen, camera=SCREEN_CAMERA, alpha=1.0):
+        """Draw all projectiles, alpha of the way from their previous to their current position"""
+        if self.count == 0:
+            return
+            
+        slots = self.active_slots()
+        size = self.size[slots]
+        position = self.position[slots]
+        if alpha < 1.0:
+            previous_position = self.previous_position[slots]
+            position = previous_position + (position - previous_position) * alpha
+        top_left = camera.points(position - size[:, np.newaxis] / 2)
+        top_left = np.rint(top_left).astype(int).tolist()
+        get_surface = self.get_surface
+        screen.blits([
+            (get_surface(color_index, item_size), corner)
+            for color_index, item_size, corner in zip(self.color[slots].tolist(), size.tolist(), top_left)
+        ], doreturn=False)
+
+
+class EnemyBulletStore(ProjectilePool):
+    """World-level store for every enemy projectile
+    
+    Bullets belong to the world rather than the enemy that fired them, so
+    they keep flying after their shooter dies.
+    """
+    def __init__(self, capacity=ENEMY_BULLET_CAPACITY):
+        super().__init__(capacity)
+        
+    def _fields(self):
+        return super()._fields() + ('kind',)
+        
+    def _allocate_extra(self, capacity):
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        
+    def fire(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=RED):
+        """Fire a straight bullet towards a target point"""
+        velocity_x, velocity_y = aim(x, y, target_x, target_y, speed)
+        slot = self.spawn(x, y, velocity_x, velocity_y, PROJECTILE_SIZE, damage, 5.0, color)
+        self.kind[slot] = BULLET_STRAIGHT
+        return slot
+        
+    def fire_large(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=20, color=RED):
+        """Fire a larger, slower bullet with more damage"""
+        velocity_x, velocity_y = aim(x, y, target_x, target_y, speed * 0.7)  # 30% slower
+        slot = self.spawn(x, y, velocity_x, velocity_y, PROJECTILE_SIZE * 2, damage, 5.0, color)
+        self.kind[slot] = BULLET_LARGE
+        return slot
+        
+    def fire_homing(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=RED):
+        """Fire a homing attack bullet
+        
+        Like the old per-enemy homing projectiles, which were never handed
+        the players, it flies straight at where the player was.
+        """
+        velocity_x, velocity_y = aim(x, y, target_x, target_y, speed)
+        slot = self.spawn(x, y, velocity_x, velocity_y, PROJECTILE_SIZE, damage, 5.0, color)
+        self.kind[slot] = BULLET_HOMING
+        return slot
+        
+    def update(self, dt):
+        """Move every bullet"""
+        if self.count == 0:
+            return
+        self.move(dt)
+        
+    def collide_players(self, players):
+        """Test every bullet against the players in one pass; hit bullets are removed"""
+        if self.count == 0:
+            return
+            
+        slots = self.active_slots()
+        for player in players:
+            if not player.is_alive or len(slots) == 0:
+                continue
+                
+            hits = self.overlapping(player.rect, slots)
+            if len(hits) == 0:
+                continue
+                
+            for slot in hits.tolist():
+                # Player takes damage from projectile
+                if player.is_alive:
+                    player.take_damage(self.damage.item(slot))
+                    
+            # Remove projectiles after hit
+            self.release(hits.tolist())
+            slots = slots[~np.isin(slots, hits)]
+
+
+class PlayerProjectileStore(ProjectilePool):
+    """Pooled store for one player's projectiles, with piercing and explosive fields"""
+    def __init__(self, capacity=PLAYER_PROJECTILE_CAPACITY):
+        super().__init__(capacity)
+        
+    def _fields(self):
+        return super()._fields() + ('piercing', 'explosive_radius', 'explosive_damage')
+        
+    def _allocate_extra(self, capacity):
+        self.piercing = np.zeros(capacity, dtype=np.int32)  # Enemies it can still pass through
+        self.explosive_radius = np.zeros(capacity)
+        self.explosive_damage = np.zeros(capacity)
+        
+        # Set of enemies already hit (None before the first), so a piercing shot
+        # hits each enemy it passes through once, however many frames it overlaps
+        hit_enemies = getattr(self, 'hit_enemies', [])
+        self.hit_enemies = hit_enemies + [None] * (capacity - len(hit_enemies))
+        
+    def fire(self, x, y, target_x, target_y, speed=PROJECTILE_SPEED, damage=10, color=WHITE,
+             piercing=0, explosive_radius=0, explosive_damage=0):
+        """Fire a projectile towards a target point"""
+        velocity_x, velocity_y = aim(x, y, target_x, target_y, speed)
+        slot = self.spawn(x, y, velocity_x, velocity_y, PROJECTILE_SIZE, damage, 3.0, color)
+        self.piercing[slot] = piercing
+        self.explosive_radius[slot] = explosive_radius
+        self.explosive_damage[slot] = explosive_damage
+        self.hit_enemies[slot] = None
+        return slot
+        
+    def release(self, slots):
+        """Return slots to the free list, dropping their hit enemies"""
+        for slot in slots:
+            self.hit_enemies[slot] = None
+        super().release(slots)
+        
+    def clear(self):
+        """Release every projectile"""
+        super().clear()
+        self.hit_enemies = [None] * self.capacity
+        
+    def update(self, dt):
+        """Move every projectile"""
+        if self.count == 0:
+            return
+        self.move(dt)
@@ -0,0 +1,286 @@
+import pygame
+from settings import *
+from src.assets import assets
+from src.profiler import profiler
+
+# Draw order of the world; each owner's bars and labels go one layer above it
+LAYER_BACKGROUND = 0
+LAYER_PICKUPS = 10
+LAYER_ENEMIES = 20
+LAYER_PROJECTILES = 30
+LAYER_PLAYERS = 40
+LAYER_EFFECTS = 50
+LAYER_DAMAGE_NUMBERS = 60
+LAYER_HUD = 100
+LAYER_OVERLAY = 110
+
+
+class Camera:
+    """World-to-screen transform that every world draw call goes through
+    
+    For now it is the view offset (screen shake moves it). Draw code only
+    uses these methods, so a zoom can be added here without touching it.
+    """
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+        
+    def move_to(self, x, y):
+        """Show the world from (x, y) at the screen's top left"""
+        self.x = x
+        self.y = y
+        
+    def point(self, x, y):
+        """Screen position of a world point"""
+        return x - self.x, y - self.y
+        
+    def points(self, positions):
+        """Screen positions of an (n, 2) array of world points"""
+        return positions - (self.x, self.y)
+        
+    def rect(self, rect, lag=(0, 0)):
+        """Screen rect of a world rect, drawn lag pixels behind its position"""
+        return rect.move(-self.x - lag[0], -self.y - lag[1])
+
+
+# Camera at the world origin, for drawing without a view
+SCREEN_CAMERA = Camera()
+
+
+class StaticLayer:
+    """World layer that never changes, painted once and blitted in one call
+    
+    painter is called with the layer surface the first time the layer is drawn
+    (and again after invalidate). Opaque layers start filled with the
+    background color; transparent layers keep per-pixel alpha so they can be
+    stacked over other layers.
+    """
+    def __init__(self, painter, size=(SCREEN_WIDTH, SCREEN_HEIGHT), transparent=False,
+                 background=BLACK):
+        self.painter = painter
+        self.size = size
+        self.transparent = transparent
+        self.background = background
+        self.surface = None
+        
+    def bake(self):
+        """Paint the layer into a display-format surface"""
+        profiler.count('surfaces')
+        if self.transparent:
+            surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        else:
+            surface = pygame.Surface(self.size)
+            surface.fill(self.background)
+        self.painter(surface)
+        
+        # Match the display format so blits don't convert every frame
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if self.transparent else surface.convert()
+        self.surface = surface
+        
+    def invalidate(self):
+        """Repaint the layer the next time it is drawn"""
+        self.surface = None
+        
+    def draw(self, screen, position=(0, 0)):
+        """Blit the baked layer"""
+        if self.surface is None:
+            self.bake()
+        screen.blit(self.surface, position)
+
+
+class CachedLayer:
+    """Retained widget surface that is repainted only when its key changes
+    
+    The key should hold every input the widget shows (values, options,
+    language). While it is unchanged, drawing the widget is a single blit.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.surface = None
+        self.spare = None  # The surface before, repainted next
+        self.key = None
+        
+    def draw(self, screen, position, key, painter, *args):
+        """Blit the widget, calling painter(surface, *args) first if key changed"""
+        if key != self.key:
+            # Paint the other of two surfaces, so last frame's commands still hold the
+            # old image and the dirty-rect presenter sees the widget change
+            surface = self.spare
+            if surface is None:
+                surface = pygame.Surface(self.size, pygame.SRCALPHA)
+                profiler.count('surfaces')
+                if pygame.display.get_surface() is not None:
+                    surface = surface.convert_alpha()
+            else:
+                surface.fill((0, 0, 0, 0))
+            painter(surface, *args)
+            self.spare = self.surface
+            self.surface = surface
+            self.key = key
+        screen.blit(self.surface, position)
+        
+    def invalidate(self):
+        """Repaint the widget the next time it is drawn"""
+        self.key = None
+
+
+class RenderBuffer:
+    """Command buffer that batches world blits into one Surface.blits call
+    
+    It accepts blit and blits calls like a Surface, so entity draw methods
+    can target it unchanged. Each command is recorded in the current layer
+    (or an explicit one) and grouped with earlier commands for the same
+    image. flush submits the layers in order, each layer's commands
+    grouped by image, in a single batch.
+    """
+    def __init__(self):
+        self.layers = {}  # layer -> {image: [blit commands]}
+        self.layer = LAYER_BACKGROUND
+        self.count = 0
+        
+    def __len__(self):
+        return self.count
+        
+    def blit(self, source, dest, area=None, layer=None):
+        """Record one blit command"""
+        groups = self.layers.get(self.layer if layer is None else layer)
+        if groups is None:
+            groups = self.layers[self.layer if layer is None else layer] = {}
+        commands = groups.get(source)
+        if commands is None:
+            commands = groups[source] = []
+        commands.append((source, dest) if area is None else (source, dest, area))
+        self.count += 1
+        
+    def blits(self, blit_sequence, doreturn=True, layer=None):
+        """Record (source, dest) or (source, dest, area) commands"""
+        for command in blit_sequence:
+            self.blit(*command[:3], layer=layer)
+            
+    def fill(self, color):
+        """Record a fill of the whole screen"""
+        self.blit(assets.get_solid((SCREEN_WIDTH, SCREEN_HEIGHT), color), (0, 0))
+        
+    def take(self):
+        """Get every recorded command in draw order and clear the buffer"""
+        batch = []
+        for layer in sorted(self.layers):
+            for commands in self.layers[layer].values():
+                batch.extend(commands)
+        self.layers.clear()
+        self.count = 0
+        return batch
+        
+    def flush(self, screen):
+        """Submit every recorded command in draw order and clear the buffer"""
+        if self.count:
+            screen.blits(self.take(), doreturn=False)
+
+
+class FullPresenter:
+    """Redraws the whole screen every frame and flips the display"""
+    def present(self, screen, buffer):
+        """Draw a frame's commands over a cleared screen"""
+        screen.fill(BLACK)
+        buffer.flush(screen)
+        pygame.display.flip()
+
+
+class DirtyRectPresenter:
+    """Redraws and updates only the screen regions that changed since the last frame
+    
+    A command is unchanged when the same image is blitted to the same rect
+    as last frame. The bounds of every added or removed command are dirty;
+    each dirty rect is cleared and every command overlapping it is redrawn,
+    clipped to it. When too much of the screen changes (moving camera,
+    crowded fights) it falls back to a full redraw.
+    """
+    def __init__(self, max_coverage=DIRTY_RECT_MAX_COVERAGE, max_rects=DIRTY_RECT_LIMIT):
+        self.max_coverage = max_coverage
+        self.max_rects = max_rects
+        self.screen_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.previous = {}  # signature -> rect, for last frame's commands
+        self.previous_commands = []  # Keeps last frame's images alive so their ids stay unique
+        self.full_frames = 0
+        self.dirty_frames = 0
+        
+    def invalidate(self):
+        """Redraw the whole screen on the next frame"""
+        self.previous = {}
+        
+    def present(self, screen, buffer):
+        """Draw a frame's commands, touching only the regions that changed"""
+        commands = buffer.take()
+        rects = []
+        current = {}
+        for command in commands:
+            source, dest = command[0], command[1]
+            area = command[2] if len(command) > 2 else None
+            if area is None:
+                rect = pygame.Rect(dest[0], dest[1], *source.get_size())
+                signature = (id(source), rect.x, rect.y)
+            else:
+                area = pygame.Rect(area)
+                rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+                signature = (id(source), rect.x, rect.y, area.x, area.y, area.width, area.height)
+            rects.append(rect)
+            current[signature] = rect
+            
+        if not self.previous:
+            self.present_full(screen, commands)
+        else:
+            dirty = [self.previous[signature] for signature in self.previous.keys() - current.keys()]
+            dirty += [current[signature] for signature in current.keys() - self.previous.keys()]
+            dirty = [rect.clip(self.screen_rect) for rect in dirty]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+            
+            coverage = sum(rect.width * rect.height for rect in dirty) / self.screen_rect.width / self.screen_rect.height
+            if len(dirty) > self.max_rects or coverage > self.max_coverage:
+                self.present_full(screen, commands)
+            elif dirty:
+                for rect in dirty:
+                    screen.set_clip(rect)
+                    screen.fill(BLACK, rect)
+                    screen.blits([commands[index] for index in rect.collidelistall(rects)], doreturn=False)
+                screen.set_clip(None)
+                pygame.display.update(dirty)
+                self.dirty_frames += 1
+                
+        self.previous = current
+        self.previous_commands = commands
+        
+    def present_full(self, screen, commands):
+        """Redraw the whole screen and flip the display"""
+        screen.fill(BLACK)
+        screen.blits(commands, doreturn=False)
+        pygame.display.flip()
+        self.full_frames += 1
+
+
+def blit_overlay(screen, image, position, area=None):
+    """Blit an owner's bar or label, one layer above the owner when buffered"""
+    if isinstance(screen, RenderBuffer):
+        screen.blit(image, position, area, screen.layer + 1)
+    else:
+        screen.blit(image, position, area)
+        
+        
+_bar_images = {}
+
+def draw_bar(screen, x, y, width, height, fraction, fill_color, back_color=RED):
+    """Draw a bar from shared solid images instead of pygame.draw calls"""
+    key = (width, height, fill_color, back_color)
+    images = _bar_images.get(key)
+    if images is None:
+        images = _bar_images[key] = (assets.get_solid((width, height), back_color),
+                                     assets.get_solid((width, height), fill_color))
+    fill_width = max(0, min(width, int(fraction * width)))
+    blit_overlay(screen, images[0], (x, y))
+    blit_overlay(screen, images[1], (x, y), (0, 0, fill_width, height))
+
+
+def interpolation_lag(previous, current, alpha):
+    """Get how far behind its current position an entity is drawn, alpha of the way between two ticks"""
+    lag = 1.0 - alpha
+    return round((current[0] - previous[0]) * lag), round((current[1] - previous[1]) * lag)
@@ -0,0 +1,201 @@
+import pickle
+import sys
+import time
+import zlib
+from array import array
+from settings import *
+from src.simulation import HeadlessGame
+from src.controllers import Action
+from src.snapshot import save_state, load_state
+
+REPLAY_VERSION = 2  # 2: keyframes pickled with the snapshot dispatch table and array-backed stores
+
+# Each player's action takes CONTROL_BITS bits of an input mask, player 1 lowest:
+# up, down, left, right and attack, like the keys that produce it
+CONTROL_NAMES = ('up', 'down', 'left', 'right', 'attack')
+CONTROL_BITS = len(CONTROL_NAMES)
+
+_decoded_actions = {}
+
+
+def encode_actions(actions):
+    """Pack every player's action into an input mask"""
+    mask = 0
+    for index, action in enumerate(actions):
+        bits = ((action.move_y < 0) | (action.move_y > 0) << 1 | (action.move_x < 0) << 2 |
+                (action.move_x > 0) << 3 | bool(action.attack) << 4)
+        mask |= bits << (index * CONTROL_BITS)
+    return mask
+
+
+def decode_actions(mask, players=2):
+    """Get each player's action from an input mask"""
+    actions = _decoded_actions.get((mask, players))
+    if actions is None:
+        actions = []
+        for index in range(players):
+            bits = mask >> (index * CONTROL_BITS)
+            actions.append(Action((bits >> 3 & 1) - (bits >> 2 & 1), (bits >> 1 & 1) - (bits & 1), bool(bits >> 4 & 1)))
+        actions = _decoded_actions[(mask, players)] = tuple(actions)
+    return actions
+
+
+class Replay:
+    """A recorded game: its seed, one action mask per tick, skill picks and state keyframes
+    
+    Inputs and skill picks are enough to reproduce the game from its seed.
+    Keyframes are snapshots taken before a tick's inputs are applied, so
+    playback can seek without simulating from the start.
+    """
+    def __init__(self, seed, dt=SIMULATION_DT):
+        self.seed = seed
+        self.dt = dt
+        self.inputs = array('H')  # encode_actions() mask per tick
+        self.skill_picks = {}  # tick -> [(player_id, skill)], applied before the tick
+        self.keyframes = {}  # tick -> save_state() bytes
+        
+    def __len__(self):
+        return len(self.inputs)
+        
+    def save(self, path):
+        """Write the replay to a file"""
+        data = {
+            'version': REPLAY_VERSION,
+            'seed': self.seed,
+            'dt': self.dt,
+            'inputs': self.inputs.tobytes(),
+            'skill_picks': self.skill_picks,
+            'keyframes': self.keyframes
+        }
+        with open(path, 'wb') as file:
+            file.write(zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)))
+            
+    @classmethod
+    def load(cls, path):
+        """Read a replay written by save(); only load replays from trusted sources"""
+        with open(path, 'rb') as file:
+            data = pickle.loads(zlib.decompress(file.read()))
+        if data['version'] != REPLAY_VERSION:
+            raise ValueError(f"unsupported replay version {data['version']}")
+            
+        replay = cls(data['seed'], data['dt'])
+        replay.inputs.frombytes(data['inputs'])
+        replay.skill_picks = data['skill_picks']
+        replay.keyframes = data['keyframes']
+        return replay
+
+
+class ReplayRecorder:
+    """Records a game as it is played, one call per simulated tick
+    
+    Call record_skill_pick() before applying a pick and record_tick() before
+    simulating a tick, so keyframes capture the state the tick started from.
+    """
+    def __init__(self, game_manager, players, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        self.game_manager = game_manager
+        self.players = players
+        self.keyframe_interval = keyframe_interval
+        self.replay = Replay(game_manager.seed)
+        
+    @property
+    def tick(self):
+        """The tick the next inputs belong to"""
+        return len(self.replay.inputs)
+        
+    def take_keyframe(self):
+        """Snapshot the state once per keyframe interval"""
+        tick = self.tick
+        if tick % self.keyframe_interval == 0 and tick not in self.replay.keyframes:
+            self.replay.keyframes[tick] = save_state(self.game_manager, self.players)
+            
+    def record_skill_pick(self, player_id, skill):
+        """Record a player picking a skill before the next tick"""
+        self.take_keyframe()
+        self.replay.skill_picks.setdefault(self.tick, []).append((player_id, skill))
+        
+    def record_tick(self, actions):
+        """Record the players' actions for the tick about to be simulated"""
+        self.take_keyframe()
+        self.replay.inputs.append(encode_actions(actions))
+
+
+class ReplayPlayer:
+    """Plays a replay back on a headless game as fast as the simulation runs"""
+    def __init__(self, replay):
+        self.replay = replay
+        self.game = HeadlessGame(skill_picker=None, dt=replay.dt)
+        self.game.reset(replay.seed)
+        
+    @property
+    def tick(self):
+        """The next tick to simulate"""
+        return self.game.tick
+        
+    @property
+    def finished(self):
+        """Whether every recorded tick has been played"""
+        return self.game.tick >= len(self.replay)
+        
+    def step(self):
+        """Play one tick; returns False at the end of the replay or the game"""
+        tick = self.game.tick
+        if tick >= len(self.replay):
+            return False
+            
+        for player_id, skill in self.replay.skill_picks.get(tick, ()):
+            self.game.game_manager.complete_skill_selection({'player_id': player_id, 'skill': skill})
+        return self.game.step(decode_actions(self.replay.inputs[tick]))
+        
+    def seek(self, tick):
+        """Jump to a tick, restoring the closest keyframe before it and fast-forwarding the rest"""
+        tick = min(tick, len(self.replay))
+        keyframe = max((start for start in self.replay.keyframes if start <= tick), default=None)
+        
+        if keyframe is not None and (tick < self.game.tick or keyframe > self.game.tick):
+            self.game.game_manager, self.game.players = load_state(self.replay.keyframes[keyframe])
+            self.game.tick = keyframe
+        elif tick < self.game.tick:
+            self.game.reset(self.replay.seed)
+            
+        while self.game.tick < tick:
+            if not self.step():
+                break
+                
+    def run(self, max_ticks=None):
+        """Play until the end of the replay or max_ticks; returns the number of ticks played"""
+        start_tick = self.game.tick
+        while max_ticks is None or self.game.tick - start_tick < max_ticks:
+            if not self.step():
+                break
+                
+        return self.game.tick - start_tick
+
+
+def main(argv=None):
+    """Fast-forward through a recorded replay and report where it ends"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play a Dual Fury replay without a window")
+    parser.add_argument('path', help="replay file")
+    parser.add_argument('--seek', type=int, default=0, help="jump to this tick through the keyframes first")
+    parser.add_argument('--ticks', type=int, default=None, help="stop after playing this many ticks")
+    args = parser.parse_args(argv)
+    
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    
+    start = time.perf_counter()
+    player.seek(args.seek)
+    seek_time = time.perf_counter() - start
+    ticks = player.run(args.ticks)
+    elapsed = time.perf_counter() - start - seek_time
+    
+    print(f"Replay: {len(replay)} ticks, seed {replay.seed}, {len(replay.keyframes)} keyframes")
+    print(f"Seek to tick {args.seek}: {seek_time:.2f}s")
+    print(f"Played: {ticks} ticks in {elapsed:.2f}s ({ticks * replay.dt / max(elapsed, 1e-9):.1f}x real time)")
+    print(f"Wave reached: {player.game.game_manager.current_wave} (tick {player.tick})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
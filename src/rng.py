@@ -0,0 +1,55 @@
+import random
+import numpy as np
+
+# One stream per subsystem, so e.g. a change to item drops doesn't shift spawn positions
+STREAMS = ('spawn', 'combat', 'items', 'skills', 'particles', 'effects')
+
+
+class RandomStreams:
+    """Seeded random number generators, one independent stream per subsystem
+    
+    Simulation code draws from rng.spawn, rng.combat, rng.items and
+    rng.skills, so a run is reproduced exactly from its seed and inputs.
+    rng.effects is for cosmetic randomness that depends on the render rate
+    (screen shake) and is never part of the simulation state.
+    """
+    def __init__(self, seed=None):
+        self.reseed(seed)
+        
+    def reseed(self, seed=None):
+        """Restart every stream from a seed; None picks a fresh random seed"""
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        for name in STREAMS:
+            # String seeds are hashed with SHA-512, so streams are stable across runs and platforms
+            setattr(self, name, random.Random(f"{seed}:{name}"))
+            
+    def use(self, streams):
+        """Draw from another RandomStreams' generators, to switch between games simulated in one process"""
+        self.seed = streams.seed
+        for name in STREAMS:
+            setattr(self, name, getattr(streams, name))
+            
+    def detach(self):
+        """Get a RandomStreams holding the current generators, which the next reseed() leaves alone"""
+        streams = RandomStreams.__new__(RandomStreams)
+        streams.use(self)
+        return streams
+        
+    def numpy(self, name):
+        """Get a NumPy generator seeded from a stream, for vectorized sampling"""
+        return np.random.default_rng(getattr(self, name).getrandbits(64))
+        
+    def getstate(self):
+        """Get the seed and the state of every simulation stream"""
+        return self.seed, {name: getattr(self, name).getstate() for name in STREAMS if name != 'effects'}
+        
+    def setstate(self, state):
+        """Restore streams saved with getstate()"""
+        self.seed, streams = state
+        for name, stream_state in streams.items():
+            getattr(self, name).setstate(stream_state)
+
+
+rng = RandomStreams()
@@ -0,0 +1,497 @@
+import asyncio
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from settings import *
+from src.simulation import HeadlessGame, NO_KEYS, first_skill_option
+from src.controllers import CONTROLLERS, IDLE
+from src.replay import decode_actions
+from src.replication import Replicator, Viewer, SnapshotDecoder
+from src.rng import rng
+
+# Message types. Every message over TCP is a uint16 length, then the type byte and the payload.
+MSG_HELLO = 1  # Client: name of the session to play in (UTF-8)
+MSG_INPUT = 2  # Client: encode_actions() bits of its player's action
+MSG_PICK = 3  # Client: name of the skill it picks
+MSG_REDIRECT = 4  # Lobby: port of the worker hosting the session
+MSG_WELCOME = 5  # Worker: the client's player id and the session's seed
+MSG_FULL = 6  # Worker: both players of the session are taken
+MSG_STATE = 7  # Worker: the part of the world the client sees, see src/replication.py
+MSG_GAME_OVER = 8  # Worker: the wave the game ended on
+MSG_ACK = 9  # Client: sequence of the latest state it decoded
+MSG_SPECTATE = 10  # Client: name of the session to watch (UTF-8)
+
+_LENGTH = struct.Struct('<H')
+_PORT = struct.Struct('<H')
+_WELCOME = struct.Struct('<BQ')
+_WAVE = struct.Struct('<H')
+_ACK = struct.Struct('<I')
+
+
+def pack_message(kind, payload=b''):
+    """Frame a message for the stream"""
+    return _LENGTH.pack(len(payload) + 1) + bytes((kind,)) + payload
+
+
+async def read_message(reader):
+    """Read one message; returns (type, payload)"""
+    length, = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    if length == 0:
+        raise ConnectionError("empty message")
+    data = await reader.readexactly(length)
+    return data[0], data[1:]
+
+
+def shard_for(name, workers):
+    """Index of the worker hosting a session, the same in every process"""
+    return zlib.crc32(name.encode()) % workers
+
+
+class Slot:
+    """One player's seat in a session: the client connected to it, or a bot, and its latest input"""
+    def __init__(self):
+        self.writer = None
+        self.viewer = None  # Replication state of the connected client
+        self.bot = None
+        self.action = IDLE
+        self.skill = None  # Skill the client asked for at its next level-up choice
+        
+    @property
+    def taken(self):
+        return self.writer is not None or self.bot is not None
+
+
+class ServerSession:
+    """One authoritative match: a headless game, the two seats in it and who sits there
+    
+    Clients only send their inputs; the session simulates every tick and
+    sends the state back, to spectators too. Seats nobody took stay idle,
+    unless a bot sits in them.
+    """
+    def __init__(self, name, seed=None, bot=None):
+        self.name = name
+        self.game = HeadlessGame(skill_picker=None)
+        self.game.reset(seed)
+        self.seed = self.game.game_manager.seed
+        self.streams = rng.detach()  # Sessions in one process take turns with the shared rng
+        self.slots = [Slot(), Slot()]
+        self.spectators = {}  # Writer -> Viewer
+        self.replicator = Replicator()
+        if bot:
+            for slot in self.slots:
+                slot.bot = CONTROLLERS[bot]()
+                
+    @property
+    def empty(self):
+        """Whether nobody is left playing"""
+        return not any(slot.taken for slot in self.slots)
+        
+    def join(self, writer):
+        """Seat a client; returns its player id, or None when the session is full"""
+        for index, slot in enumerate(self.slots):
+            if not slot.taken:
+                slot.writer = writer
+                slot.viewer = Viewer()
+                slot.action = IDLE
+                return index + 1
+        return None
+        
+    def leave(self, player_id):
+        """Free a client's seat; its player stands still from now on"""
+        slot = self.slots[player_id - 1]
+        slot.writer = None
+        slot.viewer = None
+        slot.action = IDLE
+        
+    def tick(self):
+        """Simulate one tick on the latest inputs; returns False once the game is over"""
+        rng.use(self.streams)
+        game = self.game
+        actions = []
+        for slot, player in zip(self.slots, game.players):
+            if slot.bot:
+                actions.append(slot.bot.act(player, game.game_manager, NO_KEYS))
+            else:
+                actions.append(slot.action)
+        running = game.step(actions)
+        self.resolve_skill_selection()
+        return running
+        
+    def resolve_skill_selection(self):
+        """Apply a pending skill choice: bots take the first option, clients what they asked for"""
+        game_manager = self.game.game_manager
+        player = game_manager.skill_selection_player
+        if not player:
+            return
+        slot = self.slots[player.player_id - 1]
+        options = game_manager.skill_options
+        if slot.bot:
+            skill = first_skill_option(player, options) if options else None
+        else:
+            skill = slot.skill if slot.skill in options else None
+        if skill:
+            slot.skill = None
+            game_manager.complete_skill_selection({'player_id': player.player_id, 'skill': skill})
+            
+    def viewers(self):
+        """(writer, Viewer) of every connected client not too far behind to keep up"""
+        viewers = [(slot.writer, slot.viewer) for slot in self.slots if slot.writer is not None]
+        viewers.extend(self.spectators.items())
+        return [(writer, viewer) for writer, viewer in viewers
+                if writer.transport.get_write_buffer_size() < SERVER_MAX_WRITE_BUFFER]
+                
+    def broadcast(self, kind, payload=b''):
+        """Send a message to every connected client, skipping those too far behind to keep up"""
+        message = pack_message(kind, payload)
+        for writer, _ in self.viewers():
+            writer.write(message)
+            
+    def send_states(self):
+        """Send each client the part of the state it sees, as a delta from what it acknowledged
+        
+        Returns the number of messages and bytes sent.
+        """
+        viewers = self.viewers()
+        if not viewers:
+            return 0, 0
+        game = self.game
+        snapshot = self.replicator.capture(game.tick, game.game_manager, game.players)
+        size = 0
+        for writer, viewer in viewers:
+            data = viewer.encode(snapshot)
+            size += len(data)
+            writer.write(pack_message(MSG_STATE, data))
+        return len(viewers), size
+        
+    def close(self):
+        """Disconnect every client"""
+        writers = [slot.writer for slot in self.slots if slot.writer is not None]
+        for writer in writers + list(self.spectators):
+            writer.close()
+
+
+class SessionWorker:
+    """Hosts many sessions in one process, all ticked by one asyncio scheduler
+    
+    Each tick runs every session once. A tick that ends after the next one
+    was due is an overrun; the schedule then restarts from the present
+    instead of bursting to catch up, so an overloaded worker slows its
+    games down rather than stalling.
+    """
+    def __init__(self, worker_id=0, dt=SIMULATION_DT, state_interval=SERVER_STATE_INTERVAL):
+        self.worker_id = worker_id
+        self.dt = dt
+        self.state_interval = state_interval
+        self.sessions = {}  # Name -> ServerSession
+        self.tick_count = 0
+        
+        # Load statistics since the last report
+        self.ticks = 0
+        self.overruns = 0
+        self.busy_time = 0.0
+        self.games_finished = 0
+        self.states_sent = 0
+        self.state_bytes = 0
+        self.encode_time = 0.0  # Capturing and encoding states
+        
+    def add_bot_sessions(self, count, bot='kite', seed=0):
+        """Host sessions played by bots on both seats, for load testing"""
+        for index in range(count):
+            name = f'bots-{self.worker_id}-{index}'
+            self.sessions[name] = ServerSession(name, seed + index, bot)
+            
+    async def run_ticks(self):
+        """Tick every session at the fixed simulation rate, forever"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            start = loop.time()
+            self.tick_all()
+            now = loop.time()
+            self.busy_time += now - start
+            self.ticks += 1
+            
+            next_tick += self.dt
+            if now > next_tick:
+                self.overruns += 1
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
+            
+    def tick_all(self):
+        """Run one tick of every session, sending states and retiring finished games"""
+        self.tick_count += 1
+        send_state = self.tick_count % self.state_interval == 0
+        for name, session in list(self.sessions.items()):
+            if not session.tick():
+                session.broadcast(MSG_GAME_OVER, _WAVE.pack(session.game.game_manager.current_wave))
+                session.close()
+                del self.sessions[name]
+                self.games_finished += 1
+            elif send_state:
+                start = time.perf_counter()
+                messages, size = session.send_states()
+                if messages:
+                    self.encode_time += time.perf_counter() - start
+                    self.states_sent += messages
+                    self.state_bytes += size
+                    
+    async def handle_client(self, reader, writer):
+        """Seat a client in the session it names, or let it watch one, and take its messages until it leaves"""
+        session = None
+        player_id = None
+        try:
+            kind, payload = await read_message(reader)
+            name = payload.decode()
+            if kind == MSG_SPECTATE:
+                session = self.sessions.get(name)
+                if session is None:
+                    return
+                viewer = session.spectators[writer] = Viewer()
+                writer.write(pack_message(MSG_WELCOME, _WELCOME.pack(0, session.seed)))
+                slot = None
+            elif kind == MSG_HELLO:
+                session = self.sessions.get(name)
+                if session is None:
+                    session = self.sessions[name] = ServerSession(name)
+                player_id = session.join(writer)
+                if player_id is None:
+                    writer.write(pack_message(MSG_FULL))
+                    return
+                writer.write(pack_message(MSG_WELCOME, _WELCOME.pack(player_id, session.seed)))
+                slot = session.slots[player_id - 1]
+                viewer = slot.viewer
+            else:
+                return
+                
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == MSG_ACK and len(payload) == _ACK.size:
+                    viewer.acknowledge(_ACK.unpack(payload)[0])
+                elif slot is None:
+                    continue
+                elif kind == MSG_INPUT and payload:
+                    slot.action = decode_actions(payload[0], players=1)[0]
+                elif kind == MSG_PICK:
+                    slot.skill = payload.decode()
+        except (asyncio.IncompleteReadError, ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            if player_id is not None:
+                session.leave(player_id)
+                if session.empty and self.sessions.get(session.name) is session:
+                    del self.sessions[session.name]
+            elif session is not None:
+                session.spectators.pop(writer, None)
+            writer.close()
+            
+    def take_report(self):
+        """Get the load statistics since the last report and start counting afresh"""
+        report = {'worker': self.worker_id, 'sessions': len(self.sessions), 'ticks': self.ticks,
+                  'overruns': self.overruns, 'busy_time': self.busy_time, 'games_finished': self.games_finished,
+                  'states_sent': self.states_sent, 'state_bytes': self.state_bytes, 'encode_time': self.encode_time}
+        self.ticks = self.overruns = self.games_finished = self.states_sent = self.state_bytes = 0
+        self.busy_time = self.encode_time = 0.0
+        return report
+
+
+def _run_worker(worker_id, host, port, bot_sessions, bot, reports):
+    """Worker process: host sessions on its own port and send load reports to the lobby"""
+    async def serve():
+        worker = SessionWorker(worker_id)
+        worker.add_bot_sessions(bot_sessions, bot, seed=worker_id * 100000)
+        server = await asyncio.start_server(worker.handle_client, host, port)
+        async with server:
+            ticker = asyncio.ensure_future(worker.run_ticks())
+            while not ticker.done():
+                await asyncio.sleep(SERVER_REPORT_INTERVAL)
+                reports.put(worker.take_report())
+            ticker.result()
+            
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+async def _lobby(host, port, workers):
+    """Answer each client's hello or spectate with the port of the worker hosting its session"""
+    async def redirect(reader, writer):
+        try:
+            kind, payload = await read_message(reader)
+            if kind in (MSG_HELLO, MSG_SPECTATE):
+                shard = shard_for(payload.decode(errors='replace'), workers)
+                writer.write(pack_message(MSG_REDIRECT, _PORT.pack(port + 1 + shard)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            
+    return await asyncio.start_server(redirect, host, port)
+
+
+def summarize_reports(reports, workers):
+    """Combine one round of worker reports into a load summary"""
+    ticks = sum(report['ticks'] for report in reports)
+    sessions = sum(report['sessions'] for report in reports)
+    busy_time = sum(report['busy_time'] for report in reports)
+    busy = busy_time / (len(reports) * SERVER_REPORT_INTERVAL) if reports else 0.0
+    states_sent = sum(report['states_sent'] for report in reports)
+    return {
+        'sessions': sessions,
+        'sessions_per_core': sessions / workers,
+        'overrun_rate': sum(report['overruns'] for report in reports) / max(ticks, 1),
+        'busy': busy,
+        # Sessions a core could tick on time if ticks cost the same with more sessions
+        'capacity_per_core': sessions / workers / busy if busy else 0.0,
+        'mean_tick_time': busy_time / max(ticks, 1),
+        'games_finished': sum(report['games_finished'] for report in reports),
+        'state_bandwidth': sum(report['state_bytes'] for report in reports) / SERVER_REPORT_INTERVAL,
+        'mean_state_size': sum(report['state_bytes'] for report in reports) / max(states_sent, 1),
+        'mean_encode_time': sum(report['encode_time'] for report in reports) / max(states_sent, 1)
+    }
+
+
+async def _serve(host, port, workers, bot_sessions, bot, duration):
+    """Start the workers and the lobby, then print load reports until stopped"""
+    import multiprocessing
+    
+    context = multiprocessing.get_context('spawn')
+    reports = context.Queue()
+    processes = []
+    for worker_id in range(workers):
+        sessions = bot_sessions // workers + (worker_id < bot_sessions % workers)
+        process = context.Process(target=_run_worker, daemon=True,
+                                  args=(worker_id, host, port + 1 + worker_id, sessions, bot, reports))
+        process.start()
+        processes.append(process)
+        
+    lobby = await _lobby(host, port, workers)
+    print(f"Lobby on port {port}, {workers} worker processes on ports {port + 1}-{port + workers}")
+    start = time.perf_counter()
+    pending = {}
+    try:
+        while duration is None or time.perf_counter() - start < duration:
+            await asyncio.sleep(0.1)
+            while not reports.empty():
+                report = reports.get_nowait()
+                pending[report['worker']] = report
+            if len(pending) == workers:
+                summary = summarize_reports(list(pending.values()), workers)
+                pending = {}
+                print(f"{summary['sessions']} sessions ({summary['sessions_per_core']:.1f} per core), "
+                      f"tick overruns {summary['overrun_rate']:.1%}, workers {summary['busy']:.0%} busy "
+                      f"(about {summary['capacity_per_core']:.0f} sessions per core at full load), "
+                      f"{summary['mean_tick_time'] * 1000:.2f} ms per tick, "
+                      f"{summary['games_finished']} games finished")
+                if summary['mean_state_size']:
+                    print(f"  states: {summary['state_bandwidth'] / 1024:.0f} KiB/s, "
+                          f"{summary['mean_state_size']:.0f} bytes and {summary['mean_encode_time'] * 1e6:.0f} us "
+                          f"to capture and encode each")
+    finally:
+        lobby.close()
+        for process in processes:
+            process.terminate()
+
+
+async def _play_client(host, port, name, ticks, dt, received, spectate=False):
+    """Load-test client: join or watch a session through the lobby, decode its states and send random inputs"""
+    hello = pack_message(MSG_SPECTATE if spectate else MSG_HELLO, name.encode())
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(hello)
+    kind, payload = await read_message(reader)
+    writer.close()
+    if kind != MSG_REDIRECT:
+        return
+        
+    reader, writer = await asyncio.open_connection(host, _PORT.unpack(payload)[0])
+    writer.write(hello)
+    try:
+        kind, payload = await read_message(reader)
+    except asyncio.IncompleteReadError:
+        kind = None
+    if kind != MSG_WELCOME:
+        writer.close()
+        return
+        
+    async def read_states():
+        decoder = SnapshotDecoder()
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == MSG_STATE:
+                    sequence, _ = decoder.decode(payload)
+                    writer.write(pack_message(MSG_ACK, _ACK.pack(sequence)))
+                    received[0] += 1
+                    received[1] += len(payload)
+                elif kind == MSG_GAME_OVER:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+            
+    reading = asyncio.ensure_future(read_states())
+    inputs = random.Random(name)
+    for _ in range(ticks):
+        if reading.done():
+            break
+        if not spectate:
+            writer.write(pack_message(MSG_INPUT, bytes((inputs.randrange(32),))))
+        await asyncio.sleep(dt)
+    reading.cancel()
+    writer.close()
+
+
+async def _watch_later(host, port, name, ticks, dt, received, delay=1.0):
+    """Load-test spectator: watch a session once its players have had time to start it"""
+    await asyncio.sleep(delay)
+    await _play_client(host, port, name, ticks - int(delay / dt), dt, received, spectate=True)
+
+
+async def _run_clients(host, port, sessions, seconds, spectators=0):
+    """Connect two load-test clients and some spectators to each of many sessions and report what they received"""
+    received = [0, 0]  # State messages, bytes
+    ticks = int(seconds / SIMULATION_DT)
+    clients = [_play_client(host, port, f'load-{index // 2}', ticks, SIMULATION_DT, received)
+               for index in range(sessions * 2)]
+    clients.extend(_watch_later(host, port, f'load-{index % sessions}', ticks, SIMULATION_DT, received)
+                   for index in range(sessions * spectators))
+    start = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+    print(f"{len(clients)} clients received {received[0]} states ({received[0] / max(elapsed, 1e-9):.0f}/s, "
+          f"{received[1] / max(elapsed, 1e-9) / 1024:.0f} KiB/s)")
+
+
+def main(argv=None):
+    """Run the game server, or load-test clients against one"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Authoritative multi-session Dual Fury server")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on, or of the server with --clients")
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help="lobby port")
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS, help="worker processes (default: one per CPU)")
+    parser.add_argument('--bot-sessions', type=int, default=0, help="host this many sessions played by bots")
+    parser.add_argument('--bot', choices=sorted(CONTROLLERS), default='kite', help="bot for --bot-sessions")
+    parser.add_argument('--seconds', type=float, default=None, help="stop after this long")
+    parser.add_argument('--clients', type=int, metavar='SESSIONS',
+                        help="instead of serving, play this many sessions with two load-test clients each")
+    parser.add_argument('--spectators', type=int, default=0, help="load-test spectators per session with --clients")
+    args = parser.parse_args(argv)
+    
+    if args.clients:
+        asyncio.run(_run_clients(args.host, args.port, args.clients, args.seconds or 10.0, args.spectators))
+        return 0
+        
+    workers = args.workers or os.cpu_count()
+    try:
+        asyncio.run(_serve(args.host, args.port, workers, args.bot_sessions, args.bot, args.seconds))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
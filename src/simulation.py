@@ -0,0 +1,231 @@
+import pygame
+import sys
+import time
+from settings import *
+from src.player import Player
+from src.manager import GameManager
+from src.controllers import CONTROLLERS, keyboard_controllers, read_actions
+from src.profiler import profiler
+
+class ScriptedKeys:
+    """Stand-in for pygame.key.get_pressed() backed by a set of pressed keys"""
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+        
+    def __getitem__(self, key):
+        return key in self.pressed
+        
+
+NO_KEYS = ScriptedKeys()
+
+
+def create_players():
+    """Create the two players at their starting positions"""
+    player1 = Player(1, SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
+    player2 = Player(2, 3 * SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2)
+    return [player1, player2]
+
+
+def step_simulation(game_manager, players, dt, actions):
+    """Advance players, each following its controller action, and the game manager by one tick"""
+    with profiler.phase('update.players'):
+        for i, player in enumerate(players):
+            other_player = players[1 - i] if len(players) > 1 else None
+            player.update(dt, actions[i], other_player, game_manager.enemies)
+            
+    game_manager.update(dt, players)
+
+
+class FixedTimestep:
+    """Accumulator that runs the simulation at a fixed rate, decoupled from the render rate
+    
+    Each rendered frame adds its real duration to the accumulator and
+    advance() says how many fixed ticks to run. At most max_steps run per
+    frame; while still behind, should_render() skips up to
+    max_skipped_frames frames in a row to give the simulation the time,
+    after which the backlog is dropped and the game slows down instead.
+    """
+    def __init__(self, dt=SIMULATION_DT, max_steps=SIMULATION_MAX_STEPS,
+                 max_skipped_frames=SIMULATION_MAX_SKIPPED_FRAMES, max_frame_time=SIMULATION_MAX_FRAME_TIME):
+        self.dt = dt
+        self.max_steps = max_steps
+        self.max_skipped_frames = max_skipped_frames
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.skipped_frames = 0
+        
+    def advance(self, frame_time):
+        """Add a frame's real duration; returns the number of ticks to simulate"""
+        self.accumulator += min(frame_time, self.max_frame_time)
+        steps = min(int(self.accumulator / self.dt), self.max_steps)
+        self.accumulator -= steps * self.dt
+        return steps
+        
+    @property
+    def behind(self):
+        """Whether a whole tick is still owed after the capped catch-up"""
+        return self.accumulator >= self.dt
+        
+    @property
+    def alpha(self):
+        """How far the render time is between the last two ticks, from 0 to 1"""
+        return min(self.accumulator / self.dt, 1.0)
+        
+    def should_render(self):
+        """Whether to draw this frame, skipping frames while the simulation catches up"""
+        if self.behind:
+            if self.skipped_frames < self.max_skipped_frames:
+                self.skipped_frames += 1
+                return False
+            # Still behind after skipping: drop the backlog rather than spiral
+            self.accumulator %= self.dt
+            
+        self.skipped_frames = 0
+        return True
+        
+    def reset(self):
+        """Forget any accumulated time, e.g. after a pause or loading"""
+        self.accumulator = 0.0
+        self.skipped_frames = 0
+
+
+def first_skill_option(player, options):
+    """Default skill picker: always take the first offered skill"""
+    return options[0]
+
+
+class HeadlessGame:
+    """Window-less simulation driver running at a fixed timestep as fast as possible
+    
+    Players are driven by controllers, one per player; by default keyboard
+    controllers reading the scripted keys. skill_picker(player, options)
+    answers level-up skill choices; with None they are left to the caller
+    (replays apply the recorded picks). Set recorder to a ReplayRecorder to
+    record the run.
+    """
+    def __init__(self, input_script=None, skill_picker=first_skill_option, dt=SIMULATION_DT, controllers=None):
+        # Damage numbers still render their text, so fonts are needed (no display is)
+        pygame.font.init()
+        
+        self.dt = dt
+        self.input_script = input_script
+        self.skill_picker = skill_picker
+        self.controllers = controllers
+        self.recorder = None
+        
+        self.game_manager = GameManager()
+        self.players = []
+        self.tick = 0
+        
+    def reset(self, seed=None):
+        """Start a fresh game from a seed (None picks a fresh one)"""
+        self.players = create_players()
+        if self.controllers is None:
+            self.controllers = keyboard_controllers(self.players)
+        self.game_manager.start_new_game(seed)
+        self.tick = 0
+        
+    def get_keys(self, tick):
+        """Get the scripted keys held on a given tick"""
+        script = self.input_script
+        if script is None:
+            return NO_KEYS
+            
+        if callable(script):
+            pressed = script(tick)
+        elif tick < len(script):
+            pressed = script[tick]
+        else:
+            return NO_KEYS
+            
+        if isinstance(pressed, ScriptedKeys):
+            return pressed
+        return ScriptedKeys(pressed or ())
+        
+    def step(self, actions=None):
+        """Simulate one tick, asking the controllers unless actions are given; returns False once the game is over"""
+        if self.game_manager.game_state != GAME_STATE_PLAYING:
+            return False
+            
+        if actions is None:
+            actions = read_actions(self.game_manager, self.players, self.controllers, self.get_keys(self.tick))
+        if self.recorder:
+            self.recorder.record_tick(actions)
+            
+        step_simulation(self.game_manager, self.players, self.dt, actions)
+        if self.skill_picker:
+            self.resolve_skill_selection()
+        self.tick += 1
+        
+        return self.game_manager.game_state == GAME_STATE_PLAYING
+        
+    def resolve_skill_selection(self):
+        """Answer a pending level-up skill choice without any UI"""
+        player = self.game_manager.skill_selection_player
+        if not player:
+            return
+            
+        # The options offered by the game manager, like SkillSelectionUI shows them
+        options = self.game_manager.skill_options
+        if not options:
+            self.game_manager.skill_selection_player = None
+            return
+            
+        skill = self.skill_picker(player, options)
+        if self.recorder:
+            self.recorder.record_skill_pick(player.player_id, skill)
+        self.game_manager.complete_skill_selection({'player_id': player.player_id, 'skill': skill})
+        
+    def run(self, max_ticks=None):
+        """Run until game over or max_ticks; returns the number of ticks simulated"""
+        if not self.players:
+            self.reset()
+            
+        start_tick = self.tick
+        while max_ticks is None or self.tick - start_tick < max_ticks:
+            if not self.step():
+                break
+                
+        return self.tick - start_tick
+
+
+def main(argv=None):
+    """Run a single headless game and report how far it got"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run Dual Fury without a window")
+    parser.add_argument('--ticks', type=int, default=None, help="stop after this many ticks")
+    parser.add_argument('--hold-attack', action='store_true', help="both players hold their attack key")
+    parser.add_argument('--bots', choices=sorted(CONTROLLERS), help="drive both players with a scripted bot")
+    parser.add_argument('--seed', type=int, default=None, help="seed for the random streams")
+    parser.add_argument('--record', metavar='PATH', help="save the run as a replay")
+    args = parser.parse_args(argv)
+    
+    script = None
+    if args.hold_attack:
+        held = ScriptedKeys([PLAYER1_CONTROLS['attack'], PLAYER2_CONTROLS['attack']])
+        script = lambda tick: held
+        
+    controllers = [CONTROLLERS[args.bots](), CONTROLLERS[args.bots]()] if args.bots else None
+    game = HeadlessGame(input_script=script, controllers=controllers)
+    game.reset(args.seed)
+    if args.record:
+        from src.replay import ReplayRecorder
+        game.recorder = ReplayRecorder(game.game_manager, game.players)
+        
+    start = time.perf_counter()
+    ticks = game.run(args.ticks)
+    elapsed = time.perf_counter() - start
+    
+    if args.record:
+        game.recorder.replay.save(args.record)
+    
+    sim_seconds = ticks * game.dt
+    print(f"Ticks: {ticks} ({sim_seconds:.1f}s simulated)")
+    print(f"Wave reached: {game.game_manager.current_wave} (seed {game.game_manager.seed})")
+    print(f"Wall time: {elapsed:.2f}s ({sim_seconds / max(elapsed, 1e-9):.1f}x real time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import copyreg
+import io
+import pickle
+import pygame
+from src.assets import assets
+from src.rng import rng
+
+
+def _shared_image(key):
+    """Look a shared image up in the asset manager, when loading a snapshot"""
+    return assets.get_by_key(key)
+
+
+def _reduce_surface(surface):
+    """Pickle a shared image as its asset key instead of its pixels"""
+    key = assets.get_key(surface)
+    if key is None:
+        raise pickle.PicklingError("only shared asset images can be saved in a snapshot")
+    return _shared_image, (key,)
+
+
+class _StatePickler(pickle.Pickler):
+    """Pickler that stores shared images by their asset key
+    
+    A dispatch table is used rather than persistent_id(), which would be
+    called for every object in the state; this keeps snapshots cheap enough
+    to take every tick.
+    """
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[pygame.Surface] = _reduce_surface
+
+
+def _dump(obj):
+    """Pickle simulation objects, shared images by key"""
+    buffer = io.BytesIO()
+    _StatePickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+def save_state(game_manager, players):
+    """Capture the whole simulation state, random streams included, as bytes"""
+    return _dump((game_manager, players, rng.getstate()))
+
+
+def load_state(data):
+    """Restore a snapshot taken by save_state(); returns (game_manager, players)
+    
+    The random streams are rewound to the snapshot as well.
+    """
+    game_manager, players, rng_state = pickle.loads(data)
+    rng.setstate(rng_state)
+    return game_manager, players
+
+
+def take_snapshot(game_manager, players):
+    """Capture the simulation state in memory, to restore within the same process
+    
+    Cheaper than save_state(): the random streams' states are kept as
+    tuples instead of being pickled along with the objects.
+    """
+    return _dump((game_manager, players)), rng.getstate()
+
+
+def restore_snapshot(snapshot):
+    """Restore a snapshot taken by take_snapshot(); returns (game_manager, players)"""
+    data, rng_state = snapshot
+    rng.setstate(rng_state)
+    return pickle.loads(data)
@@ -0,0 +1,92 @@
+import pygame
+from settings import *
+from src.profiler import profiler
+
+class SpatialHash:
+    """Uniform grid broadphase for rect overlap and radius queries
+    
+    Objects are registered in every cell their rect covers, so large bodies
+    such as bosses are found from any cell they overlap.
+    """
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        
+    def clear(self):
+        """Remove every object from the grid"""
+        self.cells.clear()
+        
+    def cell_range(self, rect):
+        """Get the inclusive cell bounds covered by a rect"""
+        cell_size = self.cell_size
+        return (rect.left // cell_size, rect.top // cell_size,
+                (rect.right - 1) // cell_size, (rect.bottom - 1) // cell_size)
+        
+    def insert(self, obj, rect):
+        """Register an object in every cell its rect covers"""
+        cells = self.cells
+        min_x, min_y, max_x, max_y = self.cell_range(rect)
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket is None:
+                    cells[(cell_x, cell_y)] = [obj]
+                else:
+                    bucket.append(obj)
+                    
+    def rebuild(self, objects):
+        """Clear the grid and register each object by its rect"""
+        cells = self.cells
+        cells.clear()
+        cell_size = self.cell_size
+        for obj in objects:
+            rect = obj.rect
+            cell = (rect.left // cell_size, rect.top // cell_size)
+            # Fast path: most objects sit inside a single cell
+            if ((rect.right - 1) // cell_size, (rect.bottom - 1) // cell_size) != cell:
+                self.insert(obj, rect)
+                continue
+            bucket = cells.get(cell)
+            if bucket is None:
+                cells[cell] = [obj]
+            else:
+                bucket.append(obj)
+            
+    def query(self, rect):
+        """Get the objects registered in the cells a rect covers (may not overlap it)"""
+        cells = self.cells
+        min_x, min_y, max_x, max_y = self.cell_range(rect)
+        
+        # Fast path: the rect sits inside a single cell, no duplicates possible
+        if min_x == max_x and min_y == max_y:
+            found = list(cells.get((min_x, min_y), ()))
+            profiler.count('collision_pairs', len(found))
+            return found
+            
+        found = []
+        seen = set()
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                for obj in cells.get((cell_x, cell_y), ()):
+                    if obj not in seen:
+                        seen.add(obj)
+                        found.append(obj)
+        profiler.count('collision_pairs', len(found))
+        return found
+        
+    def query_rect(self, rect):
+        """Get the objects whose rect actually overlaps the given rect"""
+        return [obj for obj in self.query(rect) if rect.colliderect(obj.rect)]
+        
+    def query_radius(self, x, y, radius):
+        """Get the objects whose rect center lies within radius of a point"""
+        size = int(radius * 2) + 1
+        area = pygame.Rect(int(x - radius), int(y - radius), size, size)
+        radius_sq = radius * radius
+        found = []
+        for obj in self.query(area):
+            dx = obj.rect.centerx - x
+            dy = obj.rect.centery - y
+            if dx * dx + dy * dy <= radius_sq:
+                found.append(obj)
+        return found
@@ -0,0 +1,118 @@
+from settings import *
+
+# Stats every player has, with their value before any skill or buff
+BASE_STATS = {
+    'speed': PLAYER_SPEED,
+    'damage': PLAYER_BASE_DAMAGE,
+    'max_hp': PLAYER_STARTING_HP,
+    'attack_range': PLAYER_HITBOX_SIZE,
+    'crit_chance': 0,
+    'crit_multiplier': 1.0,
+    'damage_reduction': 0,
+    'life_steal': 0,
+    'shoot_speed': 1.0,
+    'projectile_speed': 1.0,
+    'projectile_damage': 1.0,
+    'piercing': 0,
+    'multi_shot': 1,
+    'explosive_damage': 0
+}
+
+# How a skill effect key modifies a stat: (stat, operation, scales with skill level)
+EFFECT_MODIFIERS = {
+    'speed_multiplier': ('speed', 'multiply', True),
+    'damage_multiplier': ('damage', 'multiply', True),
+    'max_hp_bonus': ('max_hp', 'add', True),
+    'range_multiplier': ('attack_range', 'multiply', True),
+    'crit_chance': ('crit_chance', 'add', False),
+    'crit_multiplier': ('crit_multiplier', 'set', False),
+    'damage_reduction': ('damage_reduction', 'add', True),
+    'life_steal': ('life_steal', 'add', True)
+}
+
+# Shooting skills modify stats by name rather than through their effect data
+SHOOTING_MODIFIERS = {
+    'rapid_fire': [('shoot_speed', 'multiply', 0.3, True)],  # 30% faster per level
+    'piercing_shot': [('piercing', 'add', 1, True)],
+    'explosive_shot': [('explosive_damage', 'add', 20, True)],
+    'multi_shot': [('multi_shot', 'add', 1, True)]
+}
+
+
+def compile_skill_modifiers(skills=None):
+    """Compile skill effects into per-skill lists of (stat, operation, amount, scales with level)"""
+    if skills is None:
+        skills = SKILLS
+        
+    modifiers = {}
+    for skill_name, skill_data in skills.items():
+        skill_modifiers = []
+        for effect_name, amount in skill_data['effect'].items():
+            if effect_name in EFFECT_MODIFIERS:
+                stat, operation, per_level = EFFECT_MODIFIERS[effect_name]
+                skill_modifiers.append((stat, operation, amount, per_level))
+        modifiers[skill_name] = skill_modifiers
+        
+    for skill_name, skill_modifiers in SHOOTING_MODIFIERS.items():
+        modifiers[skill_name] = modifiers.get(skill_name, []) + skill_modifiers
+        
+    return modifiers
+
+
+SKILL_MODIFIERS = compile_skill_modifiers()
+
+
+def refresh_skill_modifiers(skills=None):
+    """Recompile the modifier tables after the skill definitions change
+    
+    Players notice the new tables the next time their skills change, so call
+    this before creating the players that should use them.
+    """
+    SKILL_MODIFIERS.clear()
+    SKILL_MODIFIERS.update(compile_skill_modifiers(skills))
+
+
+class SkillTotals:
+    """Combined skill modifiers for one set of skill levels
+    
+    Multipliers are applied before additions. A 'set' modifier replaces the
+    base value, and the last skill to set a stat wins.
+    """
+    __slots__ = ('multiply', 'add', 'set')
+    
+    def __init__(self, skills):
+        self.multiply = {}
+        self.add = {}
+        self.set = {}
+        for skill_name, skill_level in skills.items():
+            for stat, operation, amount, per_level in SKILL_MODIFIERS.get(skill_name, ()):
+                if per_level:
+                    amount *= skill_level
+                if operation == 'multiply':
+                    self.multiply[stat] = self.multiply.get(stat, 1.0) * (1 + amount)
+                elif operation == 'add':
+                    self.add[stat] = self.add.get(stat, 0) + amount
+                else:
+                    self.set[stat] = amount
+                    
+    def apply(self, stat, value):
+        """Apply the combined modifiers to a base value"""
+        value = self.set.get(stat, value)
+        if stat in self.multiply:
+            value *= self.multiply[stat]
+        if stat in self.add:
+            value += self.add[stat]
+        return value
+
+
+class PlayerStats:
+    """A player's effective stats with skill bonuses and buffs applied"""
+    __slots__ = tuple(BASE_STATS)
+    
+    def __init__(self, **values):
+        for stat, value in BASE_STATS.items():
+            setattr(self, stat, values.get(stat, value))
+            
+    def as_dict(self):
+        """Get the stats as a plain dictionary"""
+        return {stat: getattr(self, stat) for stat in self.__slots__}
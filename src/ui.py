@@ -1,6 +1,9 @@
 import pygame
 import random
+import settings
 from settings import *
+from src.fonts import get_font, render_text
+from src.render import CachedLayer
 
 def get_text(key):
     """Get translated text based on current language"""
@@ -22,16 +25,15 @@ def get_skill_description(skill_key):
 
 class UI:
     def __init__(self):
-        # Try to use a system font that supports Chinese characters
-        try:
-            self.font = pygame.font.SysFont('simsun,arial,helvetica', UI_FONT_SIZE)
-            self.small_font = pygame.font.SysFont('simsun,arial,helvetica', UI_SMALL_FONT_SIZE)
-            self.large_font = pygame.font.SysFont('simsun,arial,helvetica', UI_LARGE_FONT_SIZE)
-        except:
-            # Fallback to default font
-            self.font = pygame.font.Font(None, UI_FONT_SIZE)
-            self.small_font = pygame.font.Font(None, UI_SMALL_FONT_SIZE)
-            self.large_font = pygame.font.Font(None, UI_LARGE_FONT_SIZE)
+        self.font = get_font(UI_FONT_SIZE)
+        self.small_font = get_font(UI_SMALL_FONT_SIZE)
+        self.large_font = get_font(UI_LARGE_FONT_SIZE)
+        
+        # Cached widgets, repainted only when the values they show change
+        hud_size = (HEALTH_BAR_WIDTH * 2, 240)  # Room for long skill names
+        self.hud_layers = {'left': CachedLayer(hud_size), 'right': CachedLayer(hud_size)}
+        self.wave_break_layer = CachedLayer((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.game_over_layer = CachedLayer((SCREEN_WIDTH, SCREEN_HEIGHT))
         
     def draw_player_hud(self, screen, player, position='left'):
         """Draw HUD for a player (health, XP, level)"""
@@ -42,9 +44,19 @@ class UI:
             x = SCREEN_WIDTH - UI_MARGIN - HEALTH_BAR_WIDTH
             y = UI_MARGIN
             
+        health_width = int((player.hp / player.max_hp) * HEALTH_BAR_WIDTH) if player.max_hp > 0 else 0
+        key = (settings.CURRENT_LANGUAGE, player.player_id, int(player.hp), int(player.max_hp), health_width,
+               player.xp, player.xp_to_next_level, player.level, tuple(player.skills.items()))
+        self.hud_layers[position].draw(screen, (x, y), key, self.paint_player_hud, player)
+        
+    def paint_player_hud(self, screen, player):
+        """Paint a player's HUD into the top-left corner of its widget surface"""
+        x = 0
+        y = 0
+        
         # Player label
         label = f"{get_text('player')} {player.player_id}"
-        label_surface = self.font.render(label, True, WHITE)
+        label_surface = render_text(self.font, label, WHITE)
         screen.blit(label_surface, (x, y))
         y += 30
         
@@ -58,21 +70,21 @@ class UI:
         
         # Level
         level_text = f"{get_text('level')}: {player.level}"
-        level_surface = self.font.render(level_text, True, WHITE)
+        level_surface = render_text(self.font, level_text, WHITE)
         screen.blit(level_surface, (x, y))
         
         # Skills (show active skills)
         y += 30
         if player.skills:
             skills_text = f"{get_text('skills')}:"
-            skills_surface = self.small_font.render(skills_text, True, WHITE)
+            skills_surface = render_text(self.small_font, skills_text, WHITE)
             screen.blit(skills_surface, (x, y))
             y += 20
             
             for skill_name, level in list(player.skills.items())[:5]:  # Show max 5 skills
                 if skill_name in SKILLS:
                     skill_display = f"{get_skill_name(skill_name)} ({level})"
-                    skill_surface = self.small_font.render(skill_display, True, YELLOW)
+                    skill_surface = render_text(self.small_font, skill_display, YELLOW)
                     screen.blit(skill_surface, (x, y))
                     y += 18
                     
@@ -91,7 +103,7 @@ class UI:
         
         # Text
         health_text = f"{int(player.hp)}/{int(player.max_hp)}"
-        text_surface = self.small_font.render(health_text, True, WHITE)
+        text_surface = render_text(self.small_font, health_text, WHITE)
         text_rect = text_surface.get_rect(center=(x + HEALTH_BAR_WIDTH // 2, y + HEALTH_BAR_HEIGHT // 2))
         screen.blit(text_surface, text_rect)
         
@@ -110,110 +122,117 @@ class UI:
         
         # Text
         xp_text = f"{player.xp}/{player.xp_to_next_level}"
-        text_surface = self.small_font.render(xp_text, True, WHITE)
+        text_surface = render_text(self.small_font, xp_text, WHITE)
         text_rect = text_surface.get_rect(center=(x + XP_BAR_WIDTH // 2, y + XP_BAR_HEIGHT // 2))
         screen.blit(text_surface, text_rect)
         
     def draw_wave_info(self, screen, current_wave, enemies_remaining=0):
         """Draw current wave information"""
         wave_text = f"{get_text('wave')} {current_wave}"
-        wave_surface = self.large_font.render(wave_text, True, WHITE)
+        wave_surface = render_text(self.large_font, wave_text, WHITE)
         wave_rect = wave_surface.get_rect(center=(SCREEN_WIDTH // 2, 50))
         screen.blit(wave_surface, wave_rect)
         
         if enemies_remaining > 0:
             enemies_text = f"{get_text('enemies')}: {enemies_remaining}"
-            enemies_surface = self.font.render(enemies_text, True, WHITE)
+            enemies_surface = render_text(self.font, enemies_text, WHITE)
             enemies_rect = enemies_surface.get_rect(center=(SCREEN_WIDTH // 2, 80))
             screen.blit(enemies_surface, enemies_rect)
             
     def draw_game_over(self, screen, final_wave, final_score=0):
         """Draw game over screen"""
+        key = (settings.CURRENT_LANGUAGE, final_wave)
+        self.game_over_layer.draw(screen, (0, 0), key, self.paint_game_over, final_wave)
+        
+    def paint_game_over(self, screen, final_wave):
+        """Paint the game over overlay into its widget surface"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        screen.blit(overlay, (0, 0))
+        screen.fill((*BLACK, 180))
         
         # Game Over text
         game_over_text = get_text('game_over').upper()
-        game_over_surface = self.large_font.render(game_over_text, True, RED)
+        game_over_surface = render_text(self.large_font, game_over_text, RED)
         game_over_rect = game_over_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100))
         screen.blit(game_over_surface, game_over_rect)
         
         # Final stats
         wave_text = f"{get_text('final_wave')}: {final_wave}"
-        wave_surface = self.font.render(wave_text, True, WHITE)
+        wave_surface = render_text(self.font, wave_text, WHITE)
         wave_rect = wave_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         screen.blit(wave_surface, wave_rect)
         
         # Instructions
         restart_text = "Press R to restart or ESC to quit"  # Keep English for key instructions
-        restart_surface = self.font.render(restart_text, True, WHITE)
+        restart_surface = render_text(self.font, restart_text, WHITE)
         restart_rect = restart_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
         screen.blit(restart_surface, restart_rect)
         
     def draw_wave_break(self, screen, next_wave, time_remaining):
         """Draw wave break countdown"""
+        seconds = int(time_remaining) + 1
+        key = (settings.CURRENT_LANGUAGE, next_wave, seconds)
+        self.wave_break_layer.draw(screen, (0, 0), key, self.paint_wave_break, next_wave, seconds)
+        
+    def paint_wave_break(self, screen, next_wave, seconds):
+        """Paint the wave break overlay into its widget surface"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(100)
-        overlay.fill(BLACK)
-        screen.blit(overlay, (0, 0))
+        screen.fill((*BLACK, 100))
         
         # Wave complete text
         complete_text = f"{get_text('wave_break')}!"
-        complete_surface = self.large_font.render(complete_text, True, GREEN)
+        complete_surface = render_text(self.large_font, complete_text, GREEN)
         complete_rect = complete_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         screen.blit(complete_surface, complete_rect)
         
         # Next wave countdown
-        countdown_text = f"{get_text('next_wave')} {int(time_remaining) + 1}s"
-        countdown_surface = self.font.render(countdown_text, True, WHITE)
+        countdown_text = f"{get_text('next_wave')} {seconds}s"
+        countdown_surface = render_text(self.font, countdown_text, WHITE)
         countdown_rect = countdown_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         screen.blit(countdown_surface, countdown_rect)
         
         # Next wave number
         next_text = f"{get_text('wave')} {next_wave}"
-        next_surface = self.font.render(next_text, True, YELLOW)
+        next_surface = render_text(self.font, next_text, YELLOW)
         next_rect = next_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
         screen.blit(next_surface, next_rect)
 
 
 class SkillSelectionUI:
     def __init__(self):
-        # Try to use a system font that supports Chinese characters
-        try:
-            self.font = pygame.font.SysFont('simsun,arial,helvetica', UI_FONT_SIZE)
-            self.small_font = pygame.font.SysFont('simsun,arial,helvetica', UI_SMALL_FONT_SIZE)
-            self.large_font = pygame.font.SysFont('simsun,arial,helvetica', UI_LARGE_FONT_SIZE)
-        except:
-            # Fallback to default font
-            self.font = pygame.font.Font(None, UI_FONT_SIZE)
-            self.small_font = pygame.font.Font(None, UI_SMALL_FONT_SIZE)
-            self.large_font = pygame.font.Font(None, UI_LARGE_FONT_SIZE)
+        self.font = get_font(UI_FONT_SIZE)
+        self.small_font = get_font(UI_SMALL_FONT_SIZE)
+        self.large_font = get_font(UI_LARGE_FONT_SIZE)
+        
+        # Cached side panels, repainted only when the options or levels change
+        self.panel_width = 250
+        self.panel_height = SCREEN_HEIGHT - 100
+        self.panel_layers = {
+            'left': CachedLayer((self.panel_width, self.panel_height)),
+            'right': CachedLayer((self.panel_width, self.panel_height))
+        }
         
         # Track active skill selections for both players
         self.player1_selection = {'active': False, 'player': None, 'options': []}
         self.player2_selection = {'active': False, 'player': None, 'options': []}
         
-    def show(self, player):
-        """Show skill selection for a player"""
+    def show(self, player, skill_options=None):
+        """Show skill selection for a player, offering skill_options or three random skills"""
         # Check if this player already has an active selection
         if player.player_id == 1 and self.player1_selection['active']:
             return  # Already showing selection for this player
         elif player.player_id == 2 and self.player2_selection['active']:
             return  # Already showing selection for this player
             
-        # Get available skills
-        available_skills = player.get_available_skills()
-        
-        # Randomly select 3 skills
-        if len(available_skills) >= 3:
-            skill_options = random.sample(available_skills, 3)
-        else:
-            skill_options = available_skills[:]
+        if skill_options is None:
+            # Get available skills
+            available_skills = player.get_available_skills()
             
+            # Randomly select 3 skills
+            if len(available_skills) >= 3:
+                skill_options = random.sample(available_skills, 3)
+            else:
+                skill_options = available_skills[:]
+                
         # Assign to appropriate player slot
         if player.player_id == 1:
             self.player1_selection = {'active': True, 'player': player, 'options': skill_options}
@@ -275,35 +294,40 @@ class SkillSelectionUI:
         player = selection['player']
         options = selection['options']
         
-        # Panel dimensions
-        panel_width = 250
-        panel_height = SCREEN_HEIGHT - 100
-        
         if side == 'left':
             panel_x = 20
         else:
-            panel_x = SCREEN_WIDTH - panel_width - 20
+            panel_x = SCREEN_WIDTH - self.panel_width - 20
             
         panel_y = 50
         
+        key = (settings.CURRENT_LANGUAGE, player.player_id, player.level, tuple(options),
+               tuple(player.skills.get(skill_name, 0) for skill_name in options))
+        self.panel_layers[side].draw(screen, (panel_x, panel_y), key,
+                                     self._paint_player_selection, player, options, side)
+        
+    def _paint_player_selection(self, screen, player, options, side):
+        """Paint one player's skill selection panel into its widget surface"""
+        panel_x = 0
+        panel_y = 0
+        panel_width = self.panel_width
+        panel_height = self.panel_height
+        
         # Semi-transparent panel background
-        panel_surface = pygame.Surface((panel_width, panel_height))
-        panel_surface.set_alpha(200)
-        panel_surface.fill(DARK_GRAY)
-        screen.blit(panel_surface, (panel_x, panel_y))
+        screen.fill((*DARK_GRAY, 200))
         
         # Panel border
         pygame.draw.rect(screen, YELLOW, (panel_x, panel_y, panel_width, panel_height), 3)
         
         # Title
         title_text = f"Player {player.player_id} - Level {player.level}!"
-        title_surface = self.font.render(title_text, True, YELLOW)
+        title_surface = render_text(self.font, title_text, YELLOW)
         title_rect = title_surface.get_rect(centerx=panel_x + panel_width // 2, y=panel_y + 10)
         screen.blit(title_surface, title_rect)
         
         # Choose skill text
         choose_text = "Choose Skill:"
-        choose_surface = self.small_font.render(choose_text, True, WHITE)
+        choose_surface = render_text(self.small_font, choose_text, WHITE)
         choose_rect = choose_surface.get_rect(centerx=panel_x + panel_width // 2, y=panel_y + 40)
         screen.blit(choose_surface, choose_rect)
         
@@ -330,12 +354,12 @@ class SkillSelectionUI:
                 
                 # Key number indicator
                 key_text = f"{i + 1}"
-                key_surface = self.large_font.render(key_text, True, YELLOW)
+                key_surface = render_text(self.large_font, key_text, YELLOW)
                 key_rect = key_surface.get_rect(x=option_rect.x + 5, y=option_rect.y + 5)
                 screen.blit(key_surface, key_rect)
                 
                 # Skill name
-                name_surface = self.small_font.render(get_skill_name(skill_name), True, WHITE)
+                name_surface = render_text(self.small_font, get_skill_name(skill_name), WHITE)
                 name_rect = name_surface.get_rect(
                     x=option_rect.x + 30,
                     y=option_rect.y + 5
@@ -343,7 +367,7 @@ class SkillSelectionUI:
                 screen.blit(name_surface, name_rect)
                 
                 # Skill description
-                desc_surface = self.small_font.render(get_skill_description(skill_name), True, LIGHT_GRAY)
+                desc_surface = render_text(self.small_font, get_skill_description(skill_name), LIGHT_GRAY)
                 desc_rect = desc_surface.get_rect(
                     x=option_rect.x + 5,
                     y=option_rect.y + 25
@@ -358,7 +382,7 @@ class SkillSelectionUI:
                 else:
                     level_info = f"New (Max:{max_level})"
                     
-                level_surface = self.small_font.render(level_info, True, YELLOW)
+                level_surface = render_text(self.small_font, level_info, YELLOW)
                 level_rect = level_surface.get_rect(
                     x=option_rect.x + 5,
                     y=option_rect.y + 50
@@ -371,7 +395,7 @@ class SkillSelectionUI:
         else:
             instruction_text = "Press Numpad 1, 2, or 3"
             
-        instruction_surface = self.small_font.render(instruction_text, True, WHITE)
+        instruction_surface = render_text(self.small_font, instruction_text, WHITE)
         instruction_rect = instruction_surface.get_rect(
             centerx=panel_x + panel_width // 2,
             y=panel_y + panel_height - 30
@@ -381,16 +405,9 @@ class SkillSelectionUI:
 
 class MainMenu:
     def __init__(self):
-        # Try to use a system font that supports Chinese characters
-        try:
-            self.font = pygame.font.SysFont('simsun,arial,helvetica', UI_FONT_SIZE)
-            self.large_font = pygame.font.SysFont('simsun,arial,helvetica', UI_LARGE_FONT_SIZE)
-            self.title_font = pygame.font.SysFont('simsun,arial,helvetica', 72)
-        except:
-            # Fallback to default font
-            self.font = pygame.font.Font(None, UI_FONT_SIZE)
-            self.large_font = pygame.font.Font(None, UI_LARGE_FONT_SIZE)
-            self.title_font = pygame.font.Font(None, 72)
+        self.font = get_font(UI_FONT_SIZE)
+        self.large_font = get_font(UI_LARGE_FONT_SIZE)
+        self.title_font = get_font(72)
         
     def draw(self, screen):
         """Draw main menu"""
@@ -398,13 +415,13 @@ class MainMenu:
         
         # Title
         title_text = "DUAL FURY"
-        title_surface = self.title_font.render(title_text, True, YELLOW)
+        title_surface = render_text(self.title_font, title_text, YELLOW)
         title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 200))
         screen.blit(title_surface, title_rect)
         
         # Subtitle
         subtitle_text = "Cooperative Survival Game"  # Keep English for game subtitle
-        subtitle_surface = self.large_font.render(subtitle_text, True, WHITE)
+        subtitle_surface = render_text(self.large_font, subtitle_text, WHITE)
         subtitle_rect = subtitle_surface.get_rect(center=(SCREEN_WIDTH // 2, 250))
         screen.blit(subtitle_surface, subtitle_rect)
         
@@ -425,7 +442,7 @@ class MainMenu:
         for i, instruction in enumerate(instructions):
             if instruction:  # Skip empty lines
                 color = YELLOW if "Press" in instruction else WHITE
-                instruction_surface = self.font.render(instruction, True, color)
+                instruction_surface = render_text(self.font, instruction, color)
                 instruction_rect = instruction_surface.get_rect(center=(SCREEN_WIDTH // 2, start_y + i * 30))
                 screen.blit(instruction_surface, instruction_rect)
             else:
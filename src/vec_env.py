@@ -0,0 +1,232 @@
+import sys
+import time
+import numpy as np
+from settings import *
+from src.controllers import Action
+from src.simulation import HeadlessGame, first_skill_option
+from src.rng import rng
+
+# Per-player features, in observation order
+PLAYER_FEATURES = ('x', 'y', 'hp', 'alive', 'level', 'attack_cooldown', 'shoot_cooldown',
+                   'special_weapon_cooldown', 'invincible_time')
+
+# Every Action a batch can ask for, indexed [move_x + 1][move_y + 1][attack]
+_ACTIONS = [[[Action(move_x, move_y, bool(attack)) for attack in (0, 1)] for move_y in (-1, 0, 1)]
+            for move_x in (-1, 0, 1)]
+
+
+class VecEnv:
+    """Steps many independent headless games in lockstep inside one process
+    
+    Actions come in as one int array of shape (num_envs, 2, 3) holding each
+    player's move_x, move_y (-1, 0 or 1) and attack (0 or 1). Observations
+    are NumPy arrays with a leading env axis, refilled in place every step
+    from the games' array-backed stores, so the caller should copy anything
+    it keeps. Enemies and bullets are the ones closest to the players,
+    nearest first, with unused rows zeroed and flagged in the mask arrays.
+    
+    Like Gym's vector environments, an env whose game ends (or runs for
+    max_ticks) is reset straight away: `dones` flags it and its observation
+    is already the new game's first one. The reward is enemies killed minus
+    damage taken scaled by damage_penalty.
+    """
+    def __init__(self, num_envs, seed=None, ticks_per_step=1, max_ticks=VEC_ENV_MAX_TICKS,
+                 max_enemies=VEC_ENV_MAX_ENEMIES, max_bullets=VEC_ENV_MAX_BULLETS, max_orbs=VEC_ENV_MAX_ORBS,
+                 damage_penalty=0.01, skill_picker=first_skill_option):
+        self.num_envs = num_envs
+        self.ticks_per_step = ticks_per_step
+        self.max_ticks = max_ticks
+        self.damage_penalty = damage_penalty
+        self.games = [HeadlessGame(skill_picker=skill_picker) for _ in range(num_envs)]
+        self.streams = [None] * num_envs  # Each game's own random streams
+        self.seeds = [None] * num_envs
+        self.next_seed = seed
+        
+        self.observations = {
+            'players': np.zeros((num_envs, 2, len(PLAYER_FEATURES)), dtype=np.float32),
+            'enemies': np.zeros((num_envs, max_enemies, 3), dtype=np.float32),  # x, y, hp fraction
+            'enemy_mask': np.zeros((num_envs, max_enemies), dtype=bool),
+            'bullets': np.zeros((num_envs, max_bullets, 4), dtype=np.float32),  # x, y, velocity x, velocity y
+            'bullet_mask': np.zeros((num_envs, max_bullets), dtype=bool),
+            'orbs': np.zeros((num_envs, max_orbs, 2), dtype=np.float32),
+            'orb_mask': np.zeros((num_envs, max_orbs), dtype=bool),
+            'wave': np.zeros(num_envs, dtype=np.int32)
+        }
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.scores = np.zeros(num_envs)  # kills - damage penalty at the last step, per env
+        
+    def seed_for(self, index, seed):
+        """Pick the seed for an env's next game"""
+        if seed is not None:
+            return seed
+        if self.next_seed is None:
+            return None
+        seed = self.next_seed
+        self.next_seed += 1
+        return seed
+        
+    def reset_env(self, index, seed=None):
+        """Start a new game in one env; None continues the env's seed sequence"""
+        game = self.games[index]
+        game.reset(self.seed_for(index, seed))
+        self.streams[index] = rng.detach()
+        self.seeds[index] = game.game_manager.seed
+        self.scores[index] = 0.0
+        self.observe(index)
+        
+    def reset(self, seed=None):
+        """Start a new game in every env; returns the observations
+        
+        An int seed restarts the seed sequence there: env i gets seed + i
+        now, and every later auto-reset takes the next unused seed.
+        """
+        if seed is not None:
+            self.next_seed = seed
+        for index in range(self.num_envs):
+            self.reset_env(index)
+        self.dones[:] = False
+        return self.observations
+        
+    def step(self, actions):
+        """Apply one batch of actions; returns (observations, rewards, dones, infos)
+        
+        infos holds, for each env that finished this step, the final wave,
+        ticks and seed of its game, keyed by env index.
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs, 2, 3), f"actions must have shape ({self.num_envs}, 2, 3)"
+        actions = np.clip(actions, (-1, -1, 0), 1).astype(int).tolist()  # Out of range values press the key fully
+        infos = {}
+        for index, game in enumerate(self.games):
+            (move_x1, move_y1, attack1), (move_x2, move_y2, attack2) = actions[index]
+            env_actions = (_ACTIONS[move_x1 + 1][move_y1 + 1][attack1],
+                           _ACTIONS[move_x2 + 1][move_y2 + 1][attack2])
+            
+            # The simulation draws from the shared rng, so point it at this game's streams
+            rng.use(self.streams[index])
+            running = True
+            for _ in range(self.ticks_per_step):
+                running = game.step(env_actions)
+                if not running:
+                    break
+            done = not running or game.tick >= self.max_ticks
+            
+            game_manager = game.game_manager
+            players = game.players
+            score = game_manager.kills - self.damage_penalty * (players[0].damage_taken + players[1].damage_taken)
+            self.rewards[index] = score - self.scores[index]
+            self.scores[index] = score
+            self.dones[index] = done
+            if done:
+                infos[index] = {'wave': game_manager.current_wave, 'ticks': game.tick, 'seed': self.seeds[index]}
+                self.reset_env(index)
+            else:
+                self.observe(index)
+                
+        return self.observations, self.rewards, self.dones, infos
+        
+    def observe(self, index):
+        """Refill one env's rows of the observation arrays"""
+        game = self.games[index]
+        game_manager = game.game_manager
+        observations = self.observations
+        
+        centers = []
+        player_rows = observations['players'][index]
+        for row, player in zip(player_rows, game.players):
+            row[:] = (player.rect.centerx, player.rect.centery, player.hp / player.max_hp, player.is_alive,
+                      player.level, player.attack_cooldown, player.shoot_cooldown,
+                      player.special_weapon_cooldown, player.invincible_time)
+            if player.is_alive:
+                centers.append(player.rect.center)
+        focus = np.array(centers, dtype=float) if centers else np.array([[SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2]])
+        observations['wave'][index] = game_manager.current_wave
+        
+        # Enemies, straight from the horde arrays
+        horde = game_manager.horde
+        order = self.nearest(horde.position[:horde.count], focus, observations['enemies'].shape[1])
+        enemies = observations['enemies'][index]
+        enemy_mask = observations['enemy_mask'][index]
+        count = len(order)
+        enemies[:count, :2] = horde.position[order]
+        enemies[:count, 2] = [horde.members[slot].hp / horde.members[slot].max_hp for slot in order.tolist()]
+        enemies[count:] = 0
+        enemy_mask[:count] = True
+        enemy_mask[count:] = False
+        
+        # Enemy bullets, from the pooled store
+        bullets_store = game_manager.enemy_bullets
+        slots = bullets_store.active_slots()
+        slots = slots[self.nearest(bullets_store.position[slots], focus, observations['bullets'].shape[1])]
+        bullets = observations['bullets'][index]
+        bullet_mask = observations['bullet_mask'][index]
+        count = len(slots)
+        bullets[:count, :2] = bullets_store.position[slots]
+        bullets[:count, 2:] = bullets_store.velocity[slots]
+        bullets[count:] = 0
+        bullet_mask[:count] = True
+        bullet_mask[count:] = False
+        
+        # XP orbs, in spawn order
+        orbs = observations['orbs'][index]
+        orb_mask = observations['orb_mask'][index]
+        count = 0
+        for orb in game_manager.xp_orbs:
+            if count == len(orbs):
+                break
+            orbs[count] = orb.rect.center
+            count += 1
+        orbs[count:] = 0
+        orb_mask[:count] = True
+        orb_mask[count:] = False
+        
+    @staticmethod
+    def nearest(positions, focus, limit):
+        """Get the indices of up to `limit` positions closest to any focus point, nearest first"""
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.intp)
+        offsets = positions[:, np.newaxis, :] - focus[np.newaxis, :, :]
+        distance_sq = np.einsum('ijk,ijk->ij', offsets, offsets).min(axis=1)
+        if len(positions) > limit:
+            candidates = np.argpartition(distance_sq, limit - 1)[:limit]
+            return candidates[np.argsort(distance_sq[candidates])]
+        return np.argsort(distance_sq)
+        
+    def close(self):
+        """Release the games"""
+        self.games = []
+
+
+def main(argv=None):
+    """Benchmark stepping a batch of envs with random actions"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Step many Dual Fury games in lockstep")
+    parser.add_argument('--envs', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    env = VecEnv(args.envs, seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    actions = np.zeros((args.envs, 2, 3), dtype=np.int64)
+    
+    start = time.perf_counter()
+    finished = 0
+    for _ in range(args.steps):
+        actions[:, :, :2] = rng.integers(-1, 2, (args.envs, 2, 2))
+        actions[:, :, 2] = rng.integers(0, 2, (args.envs, 2))
+        _, _, dones, _ = env.step(actions)
+        finished += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    
+    env_steps = args.envs * args.steps
+    print(f"{env_steps} env steps in {elapsed:.2f}s ({env_steps / max(elapsed, 1e-9):.0f} steps/s), "
+          f"{finished} games finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import numpy as np
+from src.controllers import CONTROLLERS
+from src.replication import (DTYPES, NO_BASELINE, AreaOfInterest, Replicator, Snapshot, SnapshotDecoder, Viewer,
+                             encode_delta)
+from src.simulation import HeadlessGame, NO_KEYS
+
+SEED = 3
+TICKS = 300
+ACK_DELAY = 3  # State messages sent before an acknowledgement reaches the server
+
+
+def make_snapshot(tick, enemies):
+    """A snapshot holding only enemy records"""
+    records = {name: np.zeros(0, dtype=dtype) for name, dtype in DTYPES.items()}
+    records['enemies'] = np.array(enemies, dtype=DTYPES['enemies'])
+    return Snapshot(tick, 1, records)
+
+
+def assert_same_records(decoded, expected):
+    for name, records in expected.records.items():
+        assert decoded.records[name].dtype == records.dtype
+        assert decoded.records[name].tobytes() == records.tobytes(), name
+
+
+def test_delta_round_trip():
+    """Removed, moved and new records survive a delta from an acknowledged baseline"""
+    baseline = make_snapshot(1, [(1, 10, 10, 255, 0), (2, 20, 20, 255, 1), (3, 30, 30, 200, 2)])
+    current = make_snapshot(2, [(2, 20, 20, 255, 1), (3, 35, -30, 100, 2), (7, 500, 5, 255, 3)])
+    decoder = SnapshotDecoder()
+    decoder.decode(encode_delta(1, baseline))
+    
+    sequence, decoded = decoder.decode(encode_delta(2, current, 1, baseline))
+    assert sequence == 2
+    assert (decoded.tick, decoded.wave) == (2, 1)
+    assert_same_records(decoded, current)
+
+
+def test_viewer_deltas_decode_to_what_was_sent():
+    """Every state message of a bot game decodes to the view the server sent, with late acknowledgements"""
+    game = HeadlessGame()
+    game.reset(SEED)
+    game.game_manager.current_wave = 5
+    bots = [CONTROLLERS['kite']() for _ in game.players]
+    replicator = Replicator()
+    viewers = [Viewer(), Viewer(AreaOfInterest(400, 300, follow=2))]
+    decoders = [SnapshotDecoder(), SnapshotDecoder()]
+    pending = [[], []]
+    deltas = 0
+    
+    for _ in range(TICKS):
+        game_manager = game.game_manager
+        assert game.step([bot.act(player, game_manager, NO_KEYS) for bot, player in zip(bots, game.players)])
+        snapshot = replicator.capture(game.tick, game_manager, game.players)
+        for viewer, decoder, acks in zip(viewers, decoders, pending):
+            deltas += viewer.acked != NO_BASELINE
+            sequence, decoded = decoder.decode(viewer.encode(snapshot))
+            assert_same_records(decoded, viewer.sent[sequence])
+            acks.append(sequence)
+            if len(acks) > ACK_DELAY:
+                viewer.acknowledge(acks.pop(0))
+                
+    assert deltas > TICKS